@@ -0,0 +1,285 @@
+"""
+Tier-aware admission control and scheduling for /analyze.
+
+At most ANALYZE_MAX_CONCURRENT analyses run at once. Requests beyond that
+wait in one FIFO queue per tier, and a freed slot goes to the backlogged tier
+with the lowest virtual time, which advances by 1/weight per admitted
+request. Enterprise traffic (weight 8) therefore gets eight slots for every
+one a free-tier request gets while both are queued, but no tier starves.
+
+Each tier has a queue latency target, a multiple (target_factor) of the
+measured service time: a moving average of how long admitted requests hold
+their slot, starting from ANALYZE_SERVICE_MS until requests have finished.
+When the oldest request waiting in a tier's queue has been there longer than
+the target, new requests for that tier are refused right away with 503 and
+Retry-After instead of joining a queue they would time out in. A tier whose
+queue is full gets 429. Lower tiers have lower targets, so they are shed
+first and enterprise p99 holds.
+
+A queued request gives up with 503 after ANALYZE_QUEUE_TIMEOUT_FACTOR times
+its tier's target, and leaves the queue as soon as its caller is cancelled
+or the client disconnects, so abandoned requests never take a slot.
+"""
+
+import asyncio
+import contextlib
+import logging
+import math
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+ANALYZE_MAX_CONCURRENT = int(os.getenv("ANALYZE_MAX_CONCURRENT", "32"))
+ANALYZE_MAX_QUEUE = int(os.getenv("ANALYZE_MAX_QUEUE", "256"))  # per tier
+
+# Service time assumed until admitted requests have been measured
+ANALYZE_SERVICE_MS = float(os.getenv("ANALYZE_SERVICE_MS", "1000"))
+# A queued request times out after this many times its tier's target
+ANALYZE_QUEUE_TIMEOUT_FACTOR = float(os.getenv("ANALYZE_QUEUE_TIMEOUT_FACTOR", "2"))
+# Seconds between checks for a client that disconnected while queued
+DISCONNECT_POLL_SECONDS = 0.5
+# Weight of the newest request in the service time moving average
+SERVICE_TIME_ALPHA = 0.05
+
+# Share of freed slots, and queue latency target in service times, per tier
+TIER_POLICIES = {
+    "enterprise": {"weight": 8, "target_factor": 10},
+    "pro": {"weight": 4, "target_factor": 4},
+    "basic": {"weight": 2, "target_factor": 2},
+    "free": {"weight": 1, "target_factor": 1},
+    "demo": {"weight": 1, "target_factor": 1},
+}
+DEFAULT_TIER = "demo"
+
+
+def _percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+class Overloaded(Exception):
+    """A request was shed; carries the HTTP status and Retry-After seconds."""
+
+    def __init__(self, status_code: int, retry_after: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.detail = detail
+
+
+class TierScheduler:
+    def __init__(
+        self,
+        max_concurrent: int = ANALYZE_MAX_CONCURRENT,
+        max_queue: int = ANALYZE_MAX_QUEUE,
+        policies: Optional[Dict[str, Dict]] = None,
+        service_ms: float = ANALYZE_SERVICE_MS,
+        queue_timeout_factor: float = ANALYZE_QUEUE_TIMEOUT_FACTOR,
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_concurrent: Requests allowed to run at once
+            max_queue: Requests allowed to wait per tier
+            policies: Tier name -> {"weight", "target_factor"}
+            service_ms: Initial service time estimate
+            queue_timeout_factor: Queued requests time out after this many
+                times their tier's target
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(1, max_queue)
+        self.policies = policies or TIER_POLICIES
+        self.service_time = service_ms / 1000
+        self.queue_timeout_factor = queue_timeout_factor
+        self._queues = {tier: deque() for tier in self.policies}
+        self._vtime = {tier: 0.0 for tier in self.policies}
+        self._active = 0
+        self.stats = {
+            tier: {
+                "admitted": 0,
+                "shed_latency": 0,
+                "shed_queue_full": 0,
+                "timed_out": 0,
+                "abandoned": 0,
+            }
+            for tier in self.policies
+        }
+        self._waits = {tier: deque(maxlen=1000) for tier in self.policies}
+
+    def _tier(self, tier: str) -> str:
+        return tier if tier in self.policies else DEFAULT_TIER
+
+    def target(self, tier: str) -> float:
+        """Queue latency target of a tier in seconds."""
+        return self.policies[self._tier(tier)]["target_factor"] * self.service_time
+
+    def _shed(self, tier: str):
+        """Raise Overloaded if this tier's queue is over its target or full."""
+        queue = self._queues[tier]
+        if not queue:
+            return
+        target = self.target(tier)
+        head_age = time.monotonic() - queue[0][1]
+        if head_age > target:
+            self.stats[tier]["shed_latency"] += 1
+            raise Overloaded(
+                503,
+                max(1, math.ceil(head_age)),
+                f"Server busy: {tier} queue latency over target",
+            )
+        if len(queue) >= self.max_queue:
+            self.stats[tier]["shed_queue_full"] += 1
+            raise Overloaded(
+                429, max(1, math.ceil(target)), f"Too many queued {tier} requests"
+            )
+
+    async def acquire(
+        self,
+        tier: str,
+        timeout: Optional[float] = None,
+        disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    ):
+        """
+        Wait for a slot for a request of this tier.
+
+        Args:
+            tier: Request tier
+            timeout: Seconds to wait in the queue; defaults to the tier's
+                target times the queue timeout factor
+            disconnected: Returns whether the client has gone away; polled
+                while the request waits
+
+        Raises:
+            Overloaded: If the request is shed instead of queued, times out
+                in the queue or its client disconnects
+        """
+        tier = self._tier(tier)
+        if self._active < self.max_concurrent and not any(self._queues.values()):
+            self._active += 1
+            self._admitted(tier, 0.0)
+            return
+
+        self._shed(tier)
+        queue = self._queues[tier]
+        if not queue:
+            # A tier returning from idle doesn't get credit for its idle time
+            backlogged = [self._vtime[t] for t, q in self._queues.items() if q]
+            if backlogged:
+                self._vtime[tier] = max(self._vtime[tier], min(backlogged))
+        if timeout is None:
+            timeout = self.queue_timeout_factor * self.target(tier)
+        future = asyncio.get_running_loop().create_future()
+        entry = (future, time.monotonic())
+        queue.append(entry)
+        deadline = entry[1] + timeout
+        poll = DISCONNECT_POLL_SECONDS if disconnected is not None else None
+        try:
+            while not future.done():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats[tier]["timed_out"] += 1
+                    raise Overloaded(
+                        503,
+                        max(1, math.ceil(self.target(tier))),
+                        f"Server busy: timed out in the {tier} queue",
+                    )
+                # asyncio.wait leaves the future alone when it times out
+                await asyncio.wait({future}, timeout=min(remaining, poll or remaining))
+                if not future.done() and disconnected and await disconnected():
+                    self.stats[tier]["abandoned"] += 1
+                    raise Overloaded(503, 1, "Client disconnected while queued")
+        except (asyncio.CancelledError, Overloaded):
+            self._abandon(queue, entry)
+            raise
+        self._admitted(tier, time.monotonic() - entry[1])
+
+    def _abandon(self, queue: deque, entry: tuple):
+        """Take a request that stopped waiting out of line."""
+        future = entry[0]
+        if future.done() and not future.cancelled():
+            # The slot was handed over just as the caller went away
+            self.release()
+            return
+        future.cancel()
+        if entry in queue:
+            queue.remove(entry)
+
+    def release(self):
+        """Free a slot and hand it to the next request in line."""
+        self._active -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._active < self.max_concurrent:
+            backlogged = [tier for tier, queue in self._queues.items() if queue]
+            if not backlogged:
+                return
+            tier = min(backlogged, key=self._vtime.get)
+            future, _ = self._queues[tier].popleft()
+            self._vtime[tier] += 1 / self.policies[tier]["weight"]
+            if future.done():
+                continue
+            self._active += 1
+            future.set_result(None)
+
+    def _admitted(self, tier: str, waited: float):
+        self.stats[tier]["admitted"] += 1
+        self._waits[tier].append(waited)
+
+    def _served(self, seconds: float):
+        self.service_time += SERVICE_TIME_ALPHA * (seconds - self.service_time)
+
+    @contextlib.asynccontextmanager
+    async def slot(
+        self,
+        tier: str,
+        timeout: Optional[float] = None,
+        disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    ):
+        """Hold a slot for the duration of the block (see acquire)."""
+        await self.acquire(tier, timeout, disconnected)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._served(time.monotonic() - started)
+            self.release()
+
+    def get_metrics(self) -> Dict:
+        """Get running/queued counts, shed counters and queue wait per tier."""
+        return {
+            "running": self._active,
+            "max_concurrent": self.max_concurrent,
+            "service_ms": self.service_time * 1000,
+            "tiers": {
+                tier: {
+                    **self.stats[tier],
+                    "queued": len(self._queues[tier]),
+                    "weight": self.policies[tier]["weight"],
+                    "target_ms": self.target(tier) * 1000,
+                    "wait_ms": {
+                        "p50": _percentile(self._waits[tier], 50) * 1000,
+                        "p99": _percentile(self._waits[tier], 99) * 1000,
+                    },
+                }
+                for tier in self.policies
+            },
+        }
+
+
+# Global instance
+tier_scheduler: Optional[TierScheduler] = None
+
+
+def get_tier_scheduler() -> TierScheduler:
+    """Get or create global tier scheduler instance."""
+    global tier_scheduler
+    if tier_scheduler is None:
+        tier_scheduler = TierScheduler()
+    return tier_scheduler
@@ -0,0 +1,229 @@
+"""
+Dynamic micro-batching for model pipelines.
+
+Concurrent requests for the same pipeline are gathered for up to a short time
+window (or until the batch is full), run as one batched call on the CPU pool,
+and each caller gets back its own result. If a batched call fails, its inputs
+are retried one at a time, so only the callers whose input fails get the error.
+If the batching loop itself fails, the callers in the batch it was running
+get its error and the loop is restarted on the same queue, so inputs still
+waiting are not lost.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Dict, List, Optional
+
+from executor import ExecutionLayer, get_execution_layer
+
+logger = logging.getLogger(__name__)
+
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "16"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "5"))
+
+
+def _percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = MICROBATCH_MAX_SIZE,
+        max_wait_ms: float = MICROBATCH_MAX_WAIT_MS,
+        execution: Optional[ExecutionLayer] = None,
+    ):
+        """
+        Initialize a micro-batcher for one pipeline.
+
+        Args:
+            name: Name used in logs and metrics
+            batch_fn: Blocking function mapping a list of inputs to a list of
+                results of the same length and order
+            max_batch_size: Maximum number of inputs per batched call
+            max_wait_ms: How long to wait for more inputs after the first one
+            execution: Execution layer used to run batch_fn off the event loop
+        """
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.execution = execution or get_execution_layer()
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.total_items = 0
+        self.total_batches = 0
+        self.failed_batches = 0
+        self.failed_items = 0
+        self.worker_restarts = 0
+        self.batch_size_histogram: Counter = Counter()
+        self._wait_times = deque(maxlen=1000)
+        self._batch_times = deque(maxlen=1000)
+
+    def _ensure_worker(self):
+        """Start the batching loop in the running event loop on first use."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # A queue and its callers' futures belong to one event loop
+            self._queue = asyncio.Queue()
+            self._loop = loop
+            self._worker = None
+        if self._worker is None or self._worker.done():
+            self._start_worker()
+
+    def _start_worker(self):
+        self._worker = self._loop.create_task(self._run())
+        self._worker.add_done_callback(self._worker_done)
+
+    def _worker_done(self, worker: asyncio.Task):
+        if worker.cancelled() or worker.exception() is None:
+            return
+        self.worker_restarts += 1
+        logger.error(
+            f"Batching loop of {self.name} failed: {worker.exception()}; restarting"
+        )
+        if worker is self._worker and not self._loop.is_closed():
+            # Same queue, so inputs waiting in it are picked up again
+            self._start_worker()
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue one input and wait for its result.
+
+        Args:
+            item: A single pipeline input
+
+        Returns:
+            The result of batch_fn for this input
+        """
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect_batch(self) -> List:
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                # Still take anything that is already waiting
+                if self._queue.empty():
+                    break
+                batch.append(self._queue.get_nowait())
+                continue
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        batch: List = []
+        try:
+            while True:
+                batch = await self._collect_batch()
+                await self._run_batch(batch)
+        except Exception as e:
+            # Only the batch in hand is lost; _worker_done restarts the loop
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            raise
+
+    async def _run_batch(self, batch: List):
+        # Drop callers that went away while queued
+        batch = [entry for entry in batch if not entry[1].done()]
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        for _, _, enqueued in batch:
+            self._wait_times.append(started - enqueued)
+        self.total_items += len(batch)
+        self.total_batches += 1
+        self.batch_size_histogram[len(batch)] += 1
+
+        inputs = [item for item, _, _ in batch]
+        try:
+            results = await self._call(inputs)
+        except Exception as e:
+            self.failed_batches += 1
+            if len(batch) == 1:
+                self._fail(batch[0][1], e)
+            else:
+                logger.warning(
+                    f"Batch of {len(inputs)} failed in {self.name}: {e}; "
+                    f"retrying inputs one at a time"
+                )
+                await self._run_individually(batch)
+            return
+        finally:
+            self._batch_times.append(time.perf_counter() - started)
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _call(self, inputs: List[Any]) -> List[Any]:
+        results = await self.execution.run_cpu(self.batch_fn, inputs)
+        if len(results) != len(inputs):
+            raise RuntimeError(
+                f"{self.name} returned {len(results)} results for {len(inputs)} inputs"
+            )
+        return results
+
+    async def _run_individually(self, batch: List):
+        """Run each input of a failed batch alone so one bad input fails alone."""
+        for item, future, _ in batch:
+            if future.done():
+                continue
+            try:
+                (result,) = await self._call([item])
+            except Exception as e:
+                self._fail(future, e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+
+    def _fail(self, future: asyncio.Future, error: Exception):
+        self.failed_items += 1
+        logger.error(f"Input failed in {self.name}: {error}")
+        if not future.done():
+            future.set_exception(error)
+
+    def get_metrics(self) -> Dict:
+        """Get queue depth, batch-size histogram and wait/run times."""
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "total_items": self.total_items,
+            "total_batches": self.total_batches,
+            "failed_batches": self.failed_batches,
+            "failed_items": self.failed_items,
+            "worker_restarts": self.worker_restarts,
+            "avg_batch_size": (
+                self.total_items / self.total_batches if self.total_batches else 0.0
+            ),
+            "batch_size_histogram": dict(sorted(self.batch_size_histogram.items())),
+            "wait_ms": {
+                "p50": _percentile(self._wait_times, 50) * 1000,
+                "p99": _percentile(self._wait_times, 99) * 1000,
+            },
+            "batch_run_ms": {
+                "p50": _percentile(self._batch_times, 50) * 1000,
+                "p99": _percentile(self._batch_times, 99) * 1000,
+            },
+        }
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Recall@k versus latency benchmark for the corpus index types.
+
+Builds every index type from corpus_index.py over the same vectors, sweeps
+the query-time knobs (nprobe for IVF, efSearch for HNSW) and reports
+recall@k against exact flat search, query latency, build time and index
+size. Uses an existing corpus store with --store-dir, or synthetic clustered
+vectors otherwise.
+"""
+
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from corpus_index import INDEX_TYPES, build_index, set_search_params
+from corpus_store import load_store
+
+
+def synthetic_vectors(rows: int, dimension: int, clusters: int = 256) -> np.ndarray:
+    """Gaussian clusters, roughly like sentence embeddings of related articles."""
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((clusters, dimension), dtype=np.float32)
+    assignment = rng.integers(0, clusters, rows)
+    noise = rng.standard_normal((rows, dimension), dtype=np.float32) * 0.5
+    return centers[assignment] + noise
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / (len(truth) * k)
+
+
+def time_queries(index: faiss.Index, queries: np.ndarray, k: int):
+    """Return (results, per-query p50 ms) searching one query at a time."""
+    latencies = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        _, ids = index.search(query[None, :], k)
+        latencies.append(time.perf_counter() - start)
+        results.append(ids[0])
+    return np.array(results), float(np.median(latencies) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--store-dir", help="Existing corpus store to benchmark")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    faiss.omp_set_num_threads(args.threads)
+
+    if args.store_dir:
+        _, embeddings, _ = load_store(args.store_dir)
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    else:
+        embeddings = synthetic_vectors(args.rows, args.dimension)
+
+    rng = np.random.default_rng(1)
+    picked = rng.choice(len(embeddings), args.queries, replace=False)
+    queries = (
+        embeddings[picked]
+        + rng.standard_normal((args.queries, embeddings.shape[1]), dtype=np.float32)
+        * 0.1
+    )
+
+    sweeps = {
+        "flat": [{}],
+        "sq8": [{}],
+        "ivf_flat": [{"nprobe": n} for n in (1, 4, 16, 64)],
+        "ivf_pq": [{"nprobe": n} for n in (1, 4, 16, 64)],
+        "hnsw": [{"ef_search": n} for n in (16, 32, 64, 128)],
+    }
+
+    truth = None
+    print(
+        f"{'index':<10}{'params':<16}{'recall@' + str(args.k):>10}"
+        f"{'p50 ms':>10}{'build s':>10}{'size MB':>10}"
+    )
+    for index_type in INDEX_TYPES:
+        start = time.perf_counter()
+        index = build_index(embeddings, index_type)
+        build_s = time.perf_counter() - start
+        size_mb = len(faiss.serialize_index(index)) / 1e6
+
+        for params in sweeps[index_type]:
+            set_search_params(index, **params)
+            found, p50_ms = time_queries(index, queries, args.k)
+            if truth is None:
+                truth = found  # flat runs first and is exact
+            label = ",".join(f"{key}={value}" for key, value in params.items()) or "-"
+            print(
+                f"{index_type:<10}{label:<16}{recall_at_k(found, truth):>10.3f}"
+                f"{p50_ms:>10.3f}{build_s:>10.2f}{size_mb:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for the /analyze request path.
+
+By default this simulates the /analyze pipeline (URL fetch, claim extraction,
+evidence search, classification) with blocking calls and compares running them
+inline on the event loop ("before") against the execution layer ("after").
+Cheap health-check requests are mixed in to show how much the event loop is
+blocked.
+
+With --url it instead load-tests a running server, so the same numbers can be
+collected against two deployed versions.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from executor import ExecutionLayer
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Return the pct-th percentile of values (nearest-rank)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def summarize(name: str, latencies: List[float]) -> Dict:
+    return {
+        "name": name,
+        "requests": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+def print_summary(rows: List[Dict]):
+    print(
+        f"{'scenario':<28}{'requests':>10}{'p50 ms':>12}{'p99 ms':>12}{'mean ms':>12}"
+    )
+    for row in rows:
+        print(
+            f"{row['name']:<28}{row['requests']:>10}{row['p50_ms']:>12.1f}"
+            f"{row['p99_ms']:>12.1f}{row['mean_ms']:>12.1f}"
+        )
+
+
+def simulated_fetch(delay: float) -> str:
+    time.sleep(delay)
+    return "article text"
+
+
+def simulated_inference(delay: float) -> str:
+    # Model forward passes release the GIL, so sleep is a fair stand-in
+    time.sleep(delay)
+    return "result"
+
+
+async def simulated_analyze(layer: ExecutionLayer, args) -> None:
+    fetch, infer = args.fetch_ms / 1000, args.inference_ms / 1000
+    if layer is None:
+        simulated_fetch(fetch)
+        simulated_inference(infer)  # claim extraction
+        simulated_inference(infer)  # evidence search
+        simulated_inference(infer)  # classification
+    else:
+        await layer.run_io(simulated_fetch, fetch)
+        await layer.run_cpu(simulated_inference, infer)
+        await layer.run_cpu(simulated_inference, infer)
+        await layer.run_cpu(simulated_inference, infer)
+
+
+async def run_simulated(layer: ExecutionLayer, args) -> List[Dict]:
+    analyze_latencies: List[float] = []
+    health_latencies: List[float] = []
+
+    # Open-loop load: latency is measured from the scheduled arrival time, so
+    # time spent waiting for a blocked event loop is counted.
+    async def timed(arrival: float, coro_factory, sink: List[float]):
+        await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+        await coro_factory()
+        sink.append(time.perf_counter() - arrival)
+
+    async def health():
+        await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    tasks = []
+    for i in range(args.requests):
+        arrival = start + i / args.rate
+        tasks.append(
+            timed(arrival, lambda: simulated_analyze(layer, args), analyze_latencies)
+        )
+        tasks.append(timed(arrival + 0.5 / args.rate, health, health_latencies))
+    await asyncio.gather(*tasks)
+
+    label = "inline" if layer is None else "execution layer"
+    return [
+        summarize(f"analyze ({label})", analyze_latencies),
+        summarize(f"health ({label})", health_latencies),
+    ]
+
+
+def run_http(args) -> List[Dict]:
+    import requests
+
+    session = requests.Session()
+    payload = {"source_text": args.text}
+
+    def one_request(_):
+        start = time.perf_counter()
+        session.post(f"{args.url}/analyze", json=payload, timeout=120)
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = list(pool.map(one_request, range(args.requests)))
+    return [summarize(f"POST {args.url}/analyze", latencies)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=50, help="Arrivals per second")
+    parser.add_argument("--fetch-ms", type=float, default=50)
+    parser.add_argument("--inference-ms", type=float, default=20)
+    parser.add_argument("--cpu-workers", type=int, default=8)
+    parser.add_argument("--url", help="Load-test a running server instead")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--text",
+        default="Climate change is a hoax created by scientists to get funding.",
+    )
+    args = parser.parse_args()
+
+    if args.url:
+        print_summary(run_http(args))
+        return
+
+    rows = asyncio.run(run_simulated(None, args))
+    layer = ExecutionLayer(cpu_workers=args.cpu_workers)
+    try:
+        rows += asyncio.run(run_simulated(layer, args))
+    finally:
+        layer.shutdown()
+    print_summary(rows)
+
+
+if __name__ == "__main__":
+    main()
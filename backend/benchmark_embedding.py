@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Embedding throughput benchmark for corpus chunks.
+
+Compares the old loop (fixed batches of 32 in corpus order, results collected
+in a list) against EmbeddingEngine with length-sorted, memory-sized batches,
+in-process and with the multi-process pool, and reports chunks/sec. Uses the
+chunk text of an existing corpus store with --store-dir, or synthetic chunks
+with Wikipedia-like length variation otherwise.
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from corpus_store import load_store
+from embedding_engine import EmbeddingEngine
+
+
+def synthetic_chunks(count: int) -> list:
+    """Chunks of 50-1000 characters, like articles split at ~1000 characters."""
+    rng = np.random.default_rng(0)
+    words = "the of and in to a was is for on as by with from at that his".split()
+    chunks = []
+    for length in rng.integers(50, 1000, count):
+        text = " ".join(rng.choice(words, int(length) // 4))
+        chunks.append(text[:length])
+    return chunks
+
+
+def baseline(model, texts: list) -> np.ndarray:
+    embeddings = []
+    for i in range(0, len(texts), 32):
+        embeddings.extend(model.encode(texts[i : i + 32], show_progress_bar=False))
+    return np.asarray(embeddings, dtype="float32")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--store-dir", help="Existing corpus store to read chunks from")
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    if args.store_dir:
+        table, _, _ = load_store(args.store_dir)
+        texts = [table.text(i) for i in range(min(args.chunks, len(table)))]
+    else:
+        texts = synthetic_chunks(args.chunks)
+
+    model = SentenceTransformer(args.model, device="cpu")
+    model.encode(texts[:64], show_progress_bar=False)  # warm up
+
+    runs = [("batch 32, unsorted", lambda: baseline(model, texts))]
+    engine = EmbeddingEngine(model, processes=0)
+    runs.append(("engine, in-process", lambda: engine.encode(texts)))
+    if args.processes > 1:
+        pool_engine = EmbeddingEngine(model, processes=args.processes)
+        pool_engine.encode(texts[:64])  # start the pool outside the timing
+        runs.append(
+            (f"engine, {args.processes} processes", lambda: pool_engine.encode(texts))
+        )
+
+    print(f"{len(texts)} chunks, {args.model}")
+    print(f"{'run':<28}{'seconds':>10}{'chunks/sec':>12}")
+    reference = None
+    for label, run in runs:
+        start = time.perf_counter()
+        embeddings = run()
+        elapsed = time.perf_counter() - start
+        if reference is None:
+            reference = embeddings
+        elif not np.allclose(embeddings, reference, atol=1e-4):
+            print(f"warning: {label} embeddings differ from the baseline")
+        print(f"{label:<28}{elapsed:>10.2f}{len(texts) / elapsed:>12.1f}")
+
+    if args.processes > 1:
+        pool_engine.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+HTML extraction benchmark over a fixture set of saved pages.
+
+Times every engine in html_extraction.EXTRACTORS on each page and reports
+milliseconds per page, the speedup over bs4, the length of the extracted
+text and how much of the bs4 output's vocabulary the faster engine kept.
+A low overlap is expected where bs4 picks up comments, widgets and other
+boilerplate; check those pages by eye with --show.
+"""
+
+import argparse
+import os
+import time
+
+from html_extraction import EXTRACTORS
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "html")
+
+
+def time_extractor(extractor, html: bytes, repeat: int) -> float:
+    """Best-of-3 seconds per call over `repeat` calls."""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            extractor(html)
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best
+
+
+def word_overlap(text: str, reference: str) -> float:
+    """Share of the reference's distinct words that also appear in text."""
+    reference_words = set(reference.lower().split())
+    if not reference_words:
+        return 1.0
+    return len(reference_words & set(text.lower().split())) / len(reference_words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument(
+        "--show", action="store_true", help="Print each engine's extracted text"
+    )
+    args = parser.parse_args()
+
+    pages = []
+    for name in sorted(os.listdir(args.fixtures)):
+        if name.endswith((".html", ".htm")):
+            with open(os.path.join(args.fixtures, name), "rb") as f:
+                pages.append((name, f.read()))
+    if not pages:
+        raise SystemExit(f"No .html files in {args.fixtures}")
+
+    engines = [name for name in EXTRACTORS if name != "bs4"]
+    print(f"{len(pages)} pages, {args.repeat} runs each")
+    print(
+        f"{'page':<24}{'engine':<8}{'ms/page':>10}{'speedup':>10}"
+        f"{'chars':>8}{'bs4 words kept':>16}"
+    )
+    totals = {name: 0.0 for name in EXTRACTORS}
+    for name, html in pages:
+        reference = EXTRACTORS["bs4"](html)
+        bs4_time = time_extractor(EXTRACTORS["bs4"], html, args.repeat)
+        totals["bs4"] += bs4_time
+        print(
+            f"{name:<24}{'bs4':<8}{bs4_time * 1000:>10.3f}{'':>10}{len(reference):>8}"
+        )
+        for engine in engines:
+            text = EXTRACTORS[engine](html)
+            elapsed = time_extractor(EXTRACTORS[engine], html, args.repeat)
+            totals[engine] += elapsed
+            print(
+                f"{'':<24}{engine:<8}{elapsed * 1000:>10.3f}"
+                f"{bs4_time / elapsed:>9.1f}x{len(text):>8}"
+                f"{word_overlap(text, reference):>15.0%}"
+            )
+            if args.show:
+                print(f"--- bs4 ---\n{reference}\n--- {engine} ---\n{text}\n")
+
+    for engine in engines:
+        print(
+            f"{engine}: {totals['bs4'] / totals[engine]:.1f}x faster than bs4 "
+            f"over the fixture set"
+        )
+
+
+if __name__ == "__main__":
+    main()
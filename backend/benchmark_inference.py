@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+CPU latency, throughput and parity benchmark for the claim models.
+
+Runs the claim classifier and the claim extractor on every requested backend
+(PyTorch fp32 pipelines, ONNX Runtime fp32, ONNX Runtime dynamic int8) over
+sentences and article text from the HTML fixtures. Reports items/sec for
+batched runs, the latency of a single request, and parity with the first
+backend: how often the predicted label or extracted answer is the same, and
+the largest difference in score. Exits non-zero when agreement falls below
+--min-agreement, so it can gate switching CLAIM_MODEL_BACKEND to onnx.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+from html_extraction import extract_text_from_html
+from result_cache import directory_fingerprint
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "html")
+CLAIM_QUESTION = "What is the main claim or headline of this article?"
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def load_texts(fixtures: str, count: int):
+    """Article texts and single sentences from the fixture pages."""
+    articles = []
+    for name in sorted(os.listdir(fixtures)):
+        with open(os.path.join(fixtures, name), "rb") as f:
+            articles.append(extract_text_from_html(f.read()))
+    sentences = [
+        s
+        for article in articles
+        for s in re.split(r"(?<=[.!?])\s+", article)
+        if len(s.split()) > 4
+    ]
+    return (
+        [articles[i % len(articles)] for i in range(count)],
+        [sentences[i % len(sentences)] for i in range(count)],
+    )
+
+
+def load_model(task: str, backend: str, model: str, threads: int):
+    if backend == "torch":
+        from transformers import pipeline
+
+        name = "text-classification" if task == "classifier" else "question-answering"
+        return pipeline(name, model=model)
+
+    from onnx_models import (
+        OnnxQuestionAnswerer,
+        OnnxSequenceClassifier,
+        export_question_answering,
+        export_sequence_classifier,
+    )
+
+    quantize = backend == "onnx-int8"
+    revision = directory_fingerprint(model) if os.path.isdir(model) else ""
+    if task == "classifier":
+        return OnnxSequenceClassifier(
+            export_sequence_classifier(model, quantize=quantize, revision=revision),
+            threads,
+        )
+    return OnnxQuestionAnswerer(
+        export_question_answering(model, quantize=quantize, revision=revision),
+        threads,
+    )
+
+
+def run(task: str, model, inputs: list, batch_size: int):
+    """Predictions (label or answer) and scores for a list of inputs."""
+    if task == "classifier":
+        results = model(inputs, batch_size=batch_size)
+        return [r["label"] for r in results], [r["score"] for r in results]
+    results = model(
+        [{"question": CLAIM_QUESTION, "context": c} for c in inputs],
+        batch_size=batch_size,
+    )
+    results = [results] if isinstance(results, dict) else results
+    return [r["answer"].strip() for r in results], [r["score"] for r in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--classifier-model", default="./my_misinformation_model")
+    parser.add_argument(
+        "--extractor-model", default="distilbert-base-cased-distilled-squad"
+    )
+    parser.add_argument("--tasks", default="classifier,extractor")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    parser.add_argument("--texts", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=0, help="0: library default")
+    parser.add_argument("--min-agreement", type=float, default=0.95)
+    args = parser.parse_args()
+
+    if args.threads:
+        try:
+            import torch
+
+            torch.set_num_threads(args.threads)
+        except ImportError:
+            pass
+
+    articles, sentences = load_texts(args.fixtures, args.texts)
+    models = {
+        "classifier": (args.classifier_model, sentences),
+        "extractor": (args.extractor_model, articles),
+    }
+    parity_ok = True
+    for task in args.tasks.split(","):
+        model_name, inputs = models[task]
+        print(f"\n{task}: {model_name}, {len(inputs)} inputs")
+        print(
+            f"{'backend':<12}{'items/sec':>11}{'p50 ms':>9}{'p99 ms':>9}"
+            f"{'agreement':>11}{'max score diff':>16}"
+        )
+        reference = None
+        for backend in args.backends.split(","):
+            try:
+                model = load_model(task, backend, model_name, args.threads)
+            except Exception as e:
+                print(f"{backend:<12}unavailable ({type(e).__name__}: {e})")
+                continue
+            run(task, model, inputs[:1], 1)  # warm up
+
+            start = time.perf_counter()
+            predictions, scores = run(task, model, inputs, args.batch_size)
+            throughput = len(inputs) / (time.perf_counter() - start)
+
+            latencies = []
+            for i in range(args.requests):
+                start = time.perf_counter()
+                run(task, model, [inputs[i % len(inputs)]], 1)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+            if reference is None:
+                reference = (predictions, np.array(scores))
+            agreement = float(
+                np.mean([p == r for p, r in zip(predictions, reference[0])])
+            )
+            score_diff = float(np.abs(np.array(scores) - reference[1]).max())
+            parity_ok &= agreement >= args.min_agreement
+            print(
+                f"{backend:<12}{throughput:>11.1f}"
+                f"{np.percentile(latencies, 50):>9.1f}"
+                f"{np.percentile(latencies, 99):>9.1f}"
+                f"{agreement:>11.1%}{score_diff:>16.4f}"
+            )
+
+    if not parity_ok:
+        print(f"\nAgreement below {args.min_agreement:.0%} for some backend")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Rate limiter throughput and cross-worker accuracy benchmark.
+
+Times RateLimiter.hit with the per-minute token bucket and per-day sliding
+window against each store, spread over --keys clients from --threads
+threads, and reports checks/sec. Then starts --workers processes that share
+one SQLite (or --redis-url) store and hammer a single key, and checks that
+together they were allowed exactly the key's quota, not one quota each.
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from rate_limiter import (
+    MemoryStore,
+    RateLimiter,
+    RedisStore,
+    SQLiteStore,
+    per_minute_and_day,
+)
+
+
+def make_store(name: str, path: str, redis_url: str):
+    if name == "memory":
+        return MemoryStore()
+    if name == "sqlite":
+        return SQLiteStore(path)
+    return RedisStore(redis_url)
+
+
+def throughput(store, checks: int, keys: int, threads: int) -> float:
+    limiter = RateLimiter(store)
+    # High limits, so every check does the full read-modify-write
+    rules = per_minute_and_day(10**9, 10**9)
+
+    def run(offset: int):
+        for i in range(offset, checks, threads):
+            limiter.hit(f"client-{i % keys}", rules)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(run, range(threads)))
+    return checks / (time.perf_counter() - start)
+
+
+def worker(args) -> int:
+    store_name, path, redis_url, quota, attempts = args
+    limiter = RateLimiter(make_store(store_name, path, redis_url))
+    rules = per_minute_and_day(quota, 10**9)
+    return sum(limiter.hit("shared", rules)["allowed"] for _ in range(attempts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--checks", type=int, default=20000)
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--quota", type=int, default=100)
+    parser.add_argument("--redis-url", help="Also benchmark a Redis store")
+    args = parser.parse_args()
+
+    stores = ["memory", "sqlite"] + (["redis"] if args.redis_url else [])
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{args.checks} checks over {args.keys} keys, {args.threads} threads")
+        print(f"{'store':<10}{'checks/sec':>12}")
+        for name in stores:
+            path = os.path.join(tmp, f"{name}.db")
+            rate = throughput(
+                make_store(name, path, args.redis_url),
+                args.checks,
+                args.keys,
+                args.threads,
+            )
+            print(f"{name:<10}{rate:>12.0f}")
+
+        print(f"\n{args.workers} workers sharing one key with a quota of {args.quota}")
+        for name in stores[1:]:
+            path = os.path.join(tmp, "shared.db")
+            job = (name, path, args.redis_url, args.quota, args.quota)
+            with multiprocessing.Pool(args.workers) as pool:
+                allowed = sum(pool.map(worker, [job] * args.workers))
+            print(
+                f"{name:<10}allowed {allowed} of {args.quota * args.workers} attempts"
+            )
+
+
+if __name__ == "__main__":
+    main()
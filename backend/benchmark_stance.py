@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+CPU throughput benchmark for the evidence stance stage.
+
+Scores (evidence, claim) pairs with the keyword stance and with the NLI model
+on every requested backend (PyTorch fp32, ONNX fp32, ONNX int8). Reports
+pairs/sec for large batched runs, the latency of one request's top-k pairs
+against STANCE_LATENCY_BUDGET_MS, and how often each backend's stance agrees
+with the first NLI backend. Pairs come from the chunk text of an existing
+corpus store with --store-dir, or are synthetic otherwise.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from corpus_store import load_store
+from evidence_stance import (
+    STANCE_LATENCY_BUDGET_MS,
+    STANCE_NLI_MODEL,
+    EvidenceStanceScorer,
+)
+
+BACKENDS = {
+    "torch": dict(backend="torch", quantize=False),
+    "onnx": dict(backend="onnx", quantize=False),
+    "onnx-int8": dict(backend="onnx", quantize=True),
+}
+
+
+def synthetic_passages(count: int) -> list:
+    rng = np.random.default_rng(0)
+    words = (
+        "the city council voted to approve a budget of million for transit "
+        "service was confirmed by officials reports say claim is false in "
+        "2019 study found no evidence that vaccines cause"
+    ).split()
+    return [" ".join(rng.choice(words, int(n))) for n in rng.integers(20, 150, count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--store-dir", help="Existing corpus store to read chunks from")
+    parser.add_argument("--pairs", type=int, default=512)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--model", default=STANCE_NLI_MODEL)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument(
+        "--backends", default="torch,onnx,onnx-int8", help="Comma-separated"
+    )
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.store_dir:
+        table, _, _ = load_store(args.store_dir)
+        passages = [table.text(i) for i in range(min(args.pairs, len(table)))]
+    else:
+        passages = synthetic_passages(args.pairs)
+    claim = "The city council approved the largest transit budget in its history."
+    request = passages[: args.top_k]
+
+    print(f"{len(passages)} pairs, top-k {args.top_k}, {args.model}")
+    print(
+        f"{'stance':<12}{'pairs/sec':>12}{'request p50 ms':>16}"
+        f"{'request p99 ms':>16}{'agreement':>11}"
+    )
+
+    keywords = EvidenceStanceScorer(nli_model="")
+    start = time.perf_counter()
+    keywords.keyword_stances(passages)
+    elapsed = time.perf_counter() - start
+    print(f"{'keywords':<12}{len(passages) / elapsed:>12.1f}")
+
+    reference = None
+    for name in args.backends.split(","):
+        scorer = EvidenceStanceScorer(
+            nli_model=args.model, batch_size=args.batch_size, **BACKENDS[name]
+        )
+        if not scorer.load():
+            print(f"{name:<12}unavailable")
+            continue
+        scorer.nli_probabilities(claim, request)  # warm up
+
+        start = time.perf_counter()
+        probabilities = scorer.nli_probabilities(claim, passages)
+        throughput = len(passages) / (time.perf_counter() - start)
+
+        latencies = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            scorer.nli_probabilities(claim, request)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        stances = scorer.stances(probabilities)
+        if reference is None:
+            reference = stances
+        agreement = float(np.mean(stances == reference))
+        print(
+            f"{name:<12}{throughput:>12.1f}{np.percentile(latencies, 50):>16.1f}"
+            f"{np.percentile(latencies, 99):>16.1f}{agreement:>11.1%}"
+        )
+    print(f"latency budget per request: {STANCE_LATENCY_BUDGET_MS:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
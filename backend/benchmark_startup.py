@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the FEVER corpus index.
+
+Compares rebuilding the FAISS index from the corpus store (what every worker
+did at startup before) against loading the persisted index with mmap. Uses an
+existing corpus store with --store-dir, or a synthetic one otherwise.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+from corpus_index import index_manifest, load_index, save_index
+from corpus_store import ChunkTable, load_store, save_store
+
+
+def rss_mb() -> float:
+    """Resident set size of this process in MB (Linux only)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def make_synthetic_store(store_dir: str, rows: int, dimension: int):
+    articles = {
+        f"Article {i // 4}_{i % 4}": {
+            "title": f"Article {i // 4}",
+            "content": f"Synthetic evidence chunk number {i}.",
+            "chunk_id": i % 4,
+            "full_url": f"https://en.wikipedia.org/wiki/Article_{i // 4}",
+        }
+        for i in range(rows)
+    }
+    embeddings = np.random.default_rng(0).random((rows, dimension), dtype=np.float32)
+    save_store(store_dir, ChunkTable.from_articles(articles), embeddings, "synthetic")
+
+
+def time_rebuild(store_dir: str):
+    before = rss_mb()
+    start = time.perf_counter()
+    _, embeddings, manifest = load_store(store_dir)
+    index = faiss.IndexFlatIP(embeddings.shape[1])
+    index.add(np.ascontiguousarray(embeddings))
+    elapsed = time.perf_counter() - start
+    return index, manifest, elapsed, rss_mb() - before
+
+
+def time_mmap_load(store_dir: str, manifest):
+    before = rss_mb()
+    start = time.perf_counter()
+    load_store(store_dir)
+    index = load_index(store_dir, index_manifest(manifest))
+    elapsed = time.perf_counter() - start
+    if index is None:
+        raise RuntimeError("Persisted index was not reused")
+    return elapsed, rss_mb() - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--store-dir", help="Existing corpus store to benchmark")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=384)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store_dir = args.store_dir
+        if store_dir is None:
+            store_dir = os.path.join(tmp, "corpus")
+            print(f"Creating synthetic store: {args.rows} x {args.dimension}")
+            make_synthetic_store(store_dir, args.rows, args.dimension)
+
+        index, manifest, rebuild_s, rebuild_mb = time_rebuild(store_dir)
+        save_index(index, store_dir, index_manifest(manifest))
+        del index
+        mmap_s, mmap_mb = time_mmap_load(store_dir, manifest)
+
+    print(f"{'startup path':<24}{'seconds':>10}{'RSS delta MB':>16}")
+    print(f"{'rebuild index':<24}{rebuild_s:>10.3f}{rebuild_mb:>16.1f}")
+    print(f"{'load persisted (mmap)':<24}{mmap_s:>10.3f}{mmap_mb:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Semantic cache of recent claim verdicts.
+
+Claims are embedded with the evidence corpus's sentence transformer and kept
+in a small in-memory FAISS index. A new claim whose cosine similarity to a
+cached one reaches the threshold reuses that claim's verdict, so paraphrases
+of a claim that was just analyzed skip evidence search, the Google Fact Check
+call and classification.
+
+Embedding similarity barely moves when a claim is negated or a number
+changes ("vaccines cause autism" and "vaccines do not cause autism" can
+clear the threshold), and those are exactly the edits that flip a verdict.
+So a cached verdict is only reused when the two claims also have the same
+negation count and the same numbers (claim_signature); otherwise the
+nearest claims that do match, if any, are tried.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CLAIM_CACHE_THRESHOLD = float(os.getenv("CLAIM_CACHE_THRESHOLD", "0.92"))
+CLAIM_CACHE_SIZE = int(os.getenv("CLAIM_CACHE_SIZE", "10000"))
+CLAIM_CACHE_TTL = float(os.getenv("CLAIM_CACHE_TTL", "3600"))
+# Nearest cached claims checked for a matching signature
+CLAIM_CACHE_CANDIDATES = 5
+
+NEGATIONS = frozenset(
+    {
+        "not",
+        "no",
+        "never",
+        "none",
+        "nobody",
+        "nothing",
+        "nowhere",
+        "neither",
+        "nor",
+        "without",
+        "cannot",
+    }
+)
+NUMBER_WORDS = frozenset(
+    {
+        "zero",
+        "one",
+        "two",
+        "three",
+        "four",
+        "five",
+        "six",
+        "seven",
+        "eight",
+        "nine",
+        "ten",
+        "eleven",
+        "twelve",
+        "hundred",
+        "thousand",
+        "million",
+        "billion",
+        "trillion",
+        "half",
+        "double",
+        "twice",
+    }
+)
+_TOKEN = re.compile(r"\d+(?:[.,]\d+)*|[^\W\d_]+(?:'[^\W\d_]+)*")
+
+
+def claim_signature(claim: str) -> Tuple[int, Tuple[str, ...]]:
+    """
+    The parts of a claim that flip its verdict but not its embedding.
+
+    Returns:
+        (number of negations, sorted numbers and number words); thousands
+        separators are dropped so "1,000" and "1000" match
+    """
+    negations = 0
+    numbers = []
+    for token in _TOKEN.findall(claim.lower().replace("’", "'")):
+        if token[0].isdigit():
+            numbers.append(token.replace(",", ""))
+        elif token in NUMBER_WORDS:
+            numbers.append(token)
+        elif token in NEGATIONS or token.endswith("n't"):
+            negations += 1
+    return negations, tuple(sorted(numbers))
+
+
+class SemanticClaimCache:
+    def __init__(
+        self,
+        dimension: int,
+        threshold: float = CLAIM_CACHE_THRESHOLD,
+        max_entries: int = CLAIM_CACHE_SIZE,
+        ttl: float = CLAIM_CACHE_TTL,
+        version_fn: Optional[Callable[[], Dict]] = None,
+    ):
+        """
+        Initialize an empty claim cache.
+
+        Args:
+            dimension: Claim embedding dimension
+            threshold: Minimum cosine similarity for a cached verdict to be reused
+            max_entries: Claims kept before the least recently used are evicted
+            ttl: Seconds a verdict stays reusable
+            version_fn: Returns the current model/corpus versions; the cache is
+                cleared when they change
+        """
+        self.dimension = dimension
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.version_fn = version_fn
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
+        # id -> (claim, cached value, expiry, claim signature), least
+        # recently used first
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._next_id = 0
+        self._versions = None
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expired": 0,
+            "invalidations": 0,
+            "signature_mismatches": 0,
+        }
+
+    @staticmethod
+    def _prepare(embedding: np.ndarray) -> np.ndarray:
+        vector = np.array(embedding, dtype="float32").reshape(1, -1)
+        faiss.normalize_L2(vector)
+        return vector
+
+    def _check_versions(self):
+        if self.version_fn is None:
+            return
+        versions = self.version_fn()
+        if versions != self._versions:
+            if self._versions is not None and self._entries:
+                self.index.reset()
+                self._entries.clear()
+                self.stats["invalidations"] += 1
+                logger.info("Claim cache cleared after a model or corpus change")
+            self._versions = versions
+
+    def _remove(self, ids):
+        self.index.remove_ids(np.asarray(ids, dtype="int64"))
+        for entry_id in ids:
+            self._entries.pop(entry_id, None)
+
+    def lookup(self, claim: str, embedding: np.ndarray) -> Optional[Dict]:
+        """
+        Find the verdict of the most similar cached claim with the same signature.
+
+        Args:
+            claim: Text of the new claim
+            embedding: Embedding of the new claim
+
+        Returns:
+            {"claim", "similarity", "value"} of the matched claim, or None
+        """
+        vector = self._prepare(embedding)
+        signature = claim_signature(claim)
+        with self._lock:
+            self._check_versions()
+            if self.index.ntotal:
+                scores, ids = self.index.search(
+                    vector, min(CLAIM_CACHE_CANDIDATES, self.index.ntotal)
+                )
+                now = time.monotonic()
+                expired = []
+                for score, entry_id in zip(scores[0].tolist(), ids[0].tolist()):
+                    entry = self._entries.get(entry_id)
+                    if score < self.threshold:
+                        break
+                    if entry is None:
+                        continue
+                    cached_claim, value, expires, cached_signature = entry
+                    if expires < now:
+                        expired.append(entry_id)
+                        continue
+                    if cached_signature != signature:
+                        self.stats["signature_mismatches"] += 1
+                        continue
+                    self._entries.move_to_end(entry_id)
+                    self.stats["hits"] += 1
+                    self._expire(expired)
+                    return {"claim": cached_claim, "similarity": score, "value": value}
+                self._expire(expired)
+            self.stats["misses"] += 1
+            return None
+
+    def _expire(self, ids):
+        if ids:
+            self._remove(ids)
+            self.stats["expired"] += len(ids)
+
+    def store(self, claim: str, embedding: np.ndarray, value: Any):
+        """
+        Cache the verdict of an analyzed claim.
+
+        Args:
+            claim: Claim text
+            embedding: Embedding of the claim
+            value: Verdict to reuse for similar claims
+        """
+        vector = self._prepare(embedding)
+        with self._lock:
+            self._check_versions()
+            entry_id = self._next_id
+            self._next_id += 1
+            self.index.add_with_ids(vector, np.array([entry_id], dtype="int64"))
+            self._entries[entry_id] = (
+                claim,
+                value,
+                time.monotonic() + self.ttl,
+                claim_signature(claim),
+            )
+            self.stats["stores"] += 1
+
+            if len(self._entries) > self.max_entries:
+                # Evict a tenth at a time; each removal rescans the flat index
+                count = max(1, self.max_entries // 10)
+                self._remove(list(self._entries)[:count])
+                self.stats["evictions"] += count
+
+    def get_metrics(self) -> Dict:
+        """Get hit/miss counters, hit rate and size."""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "threshold": self.threshold,
+        }
@@ -0,0 +1,328 @@
+"""
+FAISS index construction and persistence for the FEVER evidence corpus.
+
+Besides the exact flat index, approximate indexes can be selected for large
+corpora (`FEVER_INDEX_TYPE`):
+
+    flat       exact inner-product search (default)
+    ivf_flat   inverted lists over full vectors; tune with nprobe
+    ivf_pq     inverted lists over product-quantized vectors; tune with nprobe
+    hnsw       HNSW graph over full vectors; tune with efSearch
+    sq8        exact scan over 8-bit scalar-quantized vectors
+
+The built index is serialized next to the corpus store together with a
+manifest describing what it was built from. At startup the index is loaded
+with mmap when the manifest still matches the store, and rebuilt otherwise.
+"""
+
+import json
+import logging
+import math
+import os
+from typing import Dict, Optional
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.faiss"
+INDEX_MANIFEST_FILE = "index_manifest.json"
+
+# Flat codes can be memory-mapped directly on newer FAISS releases
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | (
+    faiss.IO_FLAG_READ_ONLY
+)
+
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw", "sq8")
+
+FEVER_INDEX_TYPE = os.getenv("FEVER_INDEX_TYPE", "flat")
+FEVER_INDEX_NLIST = int(os.getenv("FEVER_INDEX_NLIST", "0"))  # 0 = from corpus size
+FEVER_INDEX_PQ_M = int(os.getenv("FEVER_INDEX_PQ_M", "0"))  # 0 = dimension / 8
+FEVER_INDEX_HNSW_M = int(os.getenv("FEVER_INDEX_HNSW_M", "32"))
+FEVER_INDEX_NPROBE = int(os.getenv("FEVER_INDEX_NPROBE", "16"))
+FEVER_INDEX_EF_SEARCH = int(os.getenv("FEVER_INDEX_EF_SEARCH", "64"))
+
+# FAISS k-means wants at least this many training points per centroid
+MIN_POINTS_PER_CENTROID = 39
+# Training on more than this many points per centroid adds little
+MAX_POINTS_PER_CENTROID = 256
+
+
+def default_nlist(rows: int) -> int:
+    """Number of IVF lists for a corpus of `rows` vectors."""
+    return max(1, min(int(4 * math.sqrt(rows)), rows // MIN_POINTS_PER_CENTROID))
+
+
+def default_pq_m(dimension: int) -> int:
+    """Number of PQ sub-quantizers: about 8 dimensions each, dividing the dimension."""
+    m = max(1, dimension // 8)
+    while dimension % m:
+        m -= 1
+    return m
+
+
+def resolve_build_params(
+    index_type: str,
+    rows: int,
+    dimension: int,
+    nlist: int = FEVER_INDEX_NLIST,
+    pq_m: int = FEVER_INDEX_PQ_M,
+    hnsw_m: int = FEVER_INDEX_HNSW_M,
+) -> Dict:
+    """
+    Fill in corpus-size dependent defaults for an index type.
+
+    Args:
+        index_type: One of INDEX_TYPES
+        rows: Number of vectors that will be indexed
+        dimension: Vector dimension
+        nlist: IVF list count (0 picks one from `rows`)
+        pq_m: PQ sub-quantizer count (0 picks one from `dimension`)
+        hnsw_m: HNSW neighbours per node
+
+    Returns:
+        The build parameters that apply to `index_type`
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type!r}, expected {INDEX_TYPES}")
+
+    if index_type in ("ivf_flat", "ivf_pq"):
+        params = {"nlist": nlist or default_nlist(rows)}
+        if index_type == "ivf_pq":
+            params["pq_m"] = pq_m or default_pq_m(dimension)
+            params["pq_bits"] = 8
+        return params
+    if index_type == "hnsw":
+        return {"hnsw_m": hnsw_m}
+    return {}
+
+
+def build_index(
+    embeddings: np.ndarray,
+    index_type: str = "flat",
+    build_params: Optional[Dict] = None,
+    metric: int = faiss.METRIC_INNER_PRODUCT,
+) -> faiss.Index:
+    """
+    Build, train if needed, and fill a FAISS index.
+
+    Falls back to a flat index when the corpus is too small to train the
+    requested quantizer.
+
+    Args:
+        embeddings: (rows, dimension) float32 matrix
+        index_type: One of INDEX_TYPES
+        build_params: Parameters from `resolve_build_params`
+        metric: FAISS metric type
+
+    Returns:
+        The populated index
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    rows, dimension = embeddings.shape
+    if build_params is None:
+        build_params = resolve_build_params(index_type, rows, dimension)
+
+    if index_type in ("ivf_flat", "ivf_pq"):
+        centroids = build_params["nlist"]
+        if index_type == "ivf_pq":
+            centroids = max(centroids, 2 ** build_params["pq_bits"])
+        if rows < centroids * MIN_POINTS_PER_CENTROID:
+            logger.warning(
+                f"{rows} vectors are too few to train {index_type}, using flat index"
+            )
+            index_type = "flat"
+
+    if index_type == "flat":
+        index = (
+            faiss.IndexFlatIP(dimension)
+            if metric == faiss.METRIC_INNER_PRODUCT
+            else faiss.IndexFlatL2(dimension)
+        )
+    elif index_type == "ivf_flat":
+        quantizer = faiss.IndexFlat(dimension, metric)
+        index = faiss.IndexIVFFlat(quantizer, dimension, build_params["nlist"], metric)
+    elif index_type == "ivf_pq":
+        quantizer = faiss.IndexFlat(dimension, metric)
+        index = faiss.IndexIVFPQ(
+            quantizer,
+            dimension,
+            build_params["nlist"],
+            build_params["pq_m"],
+            build_params["pq_bits"],
+            metric,
+        )
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, build_params["hnsw_m"], metric)
+        index.hnsw.efConstruction = max(40, 2 * build_params["hnsw_m"])
+    else:
+        index = faiss.IndexScalarQuantizer(
+            dimension, faiss.ScalarQuantizer.QT_8bit, metric
+        )
+
+    if not index.is_trained:
+        logger.info(f"Training {index_type} index...")
+        index.train(training_sample(embeddings, build_params.get("nlist", 1)))
+    index.add(embeddings)
+    return index
+
+
+def training_sample(embeddings: np.ndarray, nlist: int) -> np.ndarray:
+    """Take a random sample of rows large enough to train `nlist` centroids."""
+    limit = max(nlist, 256) * MAX_POINTS_PER_CENTROID
+    if len(embeddings) <= limit:
+        return embeddings
+    rows = np.random.default_rng(0).choice(len(embeddings), limit, replace=False)
+    return embeddings[np.sort(rows)]
+
+
+def set_search_params(
+    index: faiss.Index, nprobe: Optional[int] = None, ef_search: Optional[int] = None
+):
+    """
+    Set query-time accuracy/speed knobs on an index.
+
+    Parameters that do not apply to the index type are ignored.
+
+    Args:
+        index: FAISS index
+        nprobe: IVF lists visited per query
+        ef_search: HNSW candidate list size per query
+    """
+    space = faiss.ParameterSpace()
+    for name, value in (("nprobe", nprobe), ("efSearch", ef_search)):
+        if value is None:
+            continue
+        try:
+            space.set_index_parameter(index, name, value)
+        except RuntimeError:
+            pass
+
+
+def id_selector_excluding(ids: np.ndarray) -> Optional[faiss.IDSelector]:
+    """
+    Build a selector that filters the given ids out of search results.
+
+    Args:
+        ids: int64 ids to exclude
+
+    Returns:
+        The selector, or None when there is nothing to exclude
+    """
+    if not len(ids):
+        return None
+    ids = np.ascontiguousarray(ids, dtype=np.int64)
+    batch = faiss.IDSelectorBatch(len(ids), faiss.swig_ptr(ids))
+    selector = faiss.IDSelectorNot(batch)
+    # The SWIG wrappers do not own their arguments; keep them alive
+    selector.referenced_objects = [batch, ids]
+    return selector
+
+
+def search_params_excluding(
+    index: faiss.Index, selector: faiss.IDSelector
+) -> faiss.SearchParameters:
+    """
+    Search parameters that apply `selector` while keeping the index's knobs.
+
+    Args:
+        index: FAISS index that will be searched
+        selector: Selector from `id_selector_excluding`
+
+    Returns:
+        Parameters for `index.search(..., params=...)`
+    """
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+    downcast = faiss.downcast_index(index)
+    if isinstance(downcast, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=downcast.hnsw.efSearch)
+    return faiss.SearchParameters(sel=selector)
+
+
+def index_manifest(
+    store_manifest: Dict, index_type: str = "flat", build_params: Optional[Dict] = None
+) -> Dict:
+    """
+    Describe the index that should be built for a corpus store.
+
+    Args:
+        store_manifest: Manifest of the corpus store the index is built from
+        index_type: Kind of FAISS index
+        build_params: Parameters the index is built with
+
+    Returns:
+        Manifest that a persisted index must match to be reused
+    """
+    return {
+        "model_name": store_manifest["model_name"],
+        "dimension": store_manifest["dimension"],
+        "rows": store_manifest["rows"],
+        "checksum": store_manifest.get("checksum"),
+        "index_type": index_type,
+        "build_params": build_params or {},
+    }
+
+
+def save_index(index: faiss.Index, directory: str, manifest: Dict):
+    """
+    Serialize an index and its manifest into a directory.
+
+    Args:
+        index: FAISS index to write
+        directory: Directory to write into (normally the corpus store)
+        manifest: Manifest from `index_manifest`
+    """
+    index_path = os.path.join(directory, INDEX_FILE)
+    manifest_path = os.path.join(directory, INDEX_MANIFEST_FILE)
+
+    # Drop the old manifest first so a crash never pairs it with a new index
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    faiss.write_index(index, f"{index_path}.tmp")
+    os.replace(f"{index_path}.tmp", index_path)
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def load_index(
+    directory: str, manifest: Dict, mmap: bool = True
+) -> Optional[faiss.Index]:
+    """
+    Load a persisted index if it was built from the expected corpus.
+
+    Args:
+        directory: Directory holding the index (normally the corpus store)
+        manifest: Expected manifest from `index_manifest`
+        mmap: Memory-map the index read-only instead of reading it into RAM
+
+    Returns:
+        The index, or None if it is missing or stale
+    """
+    index_path = os.path.join(directory, INDEX_FILE)
+    manifest_path = os.path.join(directory, INDEX_MANIFEST_FILE)
+    if not os.path.exists(index_path) or not os.path.exists(manifest_path):
+        return None
+
+    with open(manifest_path) as f:
+        saved_manifest = json.load(f)
+    if manifest.get("checksum") is None or saved_manifest != manifest:
+        logger.info("Persisted FAISS index is stale")
+        return None
+
+    try:
+        index = faiss.read_index(index_path, MMAP_FLAGS if mmap else 0)
+    except RuntimeError as e:
+        logger.warning(f"Could not read persisted FAISS index: {e}")
+        return None
+
+    if index.ntotal != manifest["rows"]:
+        logger.warning(
+            f"Persisted FAISS index has {index.ntotal} vectors, "
+            f"expected {manifest['rows']}"
+        )
+        return None
+    return index
@@ -0,0 +1,646 @@
+"""
+Storage layout for the FEVER evidence corpus.
+
+`ChunkTable` maps FAISS row numbers to article chunks with array-backed
+columns, so search results are assembled by position instead of by walking
+the articles dict.
+
+On disk a corpus store is a directory of flat files that are opened with mmap,
+so every worker on a host shares the same pages through the OS page cache:
+
+    manifest.json       format version, model name, row count, dimension,
+                        checksum, whether embeddings are L2-normalized
+    embeddings.npy      float32 (rows, dimension), row-aligned with the index
+    chunks.bin          UTF-8 chunk text, concatenated
+    chunk_offsets.npy   int64 (rows + 1) byte offsets into chunks.bin
+    article_index.npy   int32 (rows) index into the titles/urls lists
+    chunk_numbers.npy   int32 (rows) chunk number within its article
+    articles.json       per-article titles and URLs
+
+Incremental updates go to a delta segment in the `delta/` subdirectory, a
+small store of the same layout plus `row_ids.npy` (index ids of its rows) and
+`tombstones.npy` (base rows that were removed or replaced). Only the delta
+is rewritten on update; `FEVEREvidenceCorpus.compact` folds it into the base.
+`StoreWriter` streams a new store to disk as it is built.
+
+A store path is a symlink to a versioned sibling directory
+(`corpus -> corpus.v<ns>`). A new version is written next to the current one
+and the link is replaced with os.replace, which is atomic, so other
+processes see the old store or the new one and never a missing or partial
+store. The old version is deleted after the swap; processes that have it
+memory-mapped keep their pages until they reopen.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+STORE_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+DELTA_DIR = "delta"
+
+
+class ChunkTable:
+    def __init__(
+        self,
+        article_index: np.ndarray,
+        chunk_numbers: np.ndarray,
+        titles: List[str],
+        urls: List[str],
+        text_offsets: np.ndarray,
+        text_blob: Union[bytes, np.ndarray],
+    ):
+        """
+        Initialize a row-to-chunk mapping.
+
+        Args:
+            article_index: Index into `titles`/`urls` for each row
+            chunk_numbers: Chunk number within its article for each row
+            titles: Article titles, one entry per article
+            urls: Article URLs, aligned with `titles`
+            text_offsets: Byte offsets of each row's text in `text_blob`
+            text_blob: UTF-8 chunk text, as bytes or a uint8 (memory-mapped) array
+        """
+        self.article_index = article_index
+        self.chunk_numbers = chunk_numbers
+        self.titles = titles
+        self.urls = urls
+        self.text_offsets = text_offsets
+        self.text_blob = text_blob
+        self._row_by_id: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def from_articles(
+        cls, articles: Dict[str, Dict], chunk_ids: Optional[List[str]] = None
+    ) -> "ChunkTable":
+        """
+        Build the mapping from an articles dict.
+
+        Args:
+            articles: Chunk id -> chunk dict with title, content, chunk_id and full_url
+            chunk_ids: Row order to use; defaults to the order of `articles`
+
+        Returns:
+            ChunkTable whose row i describes chunk_ids[i]
+        """
+        if chunk_ids is None:
+            chunk_ids = list(articles.keys())
+
+        title_rows: Dict[str, int] = {}
+        titles: List[str] = []
+        urls: List[str] = []
+        article_index = np.empty(len(chunk_ids), dtype=np.int32)
+        chunk_numbers = np.empty(len(chunk_ids), dtype=np.int32)
+        text_offsets = np.zeros(len(chunk_ids) + 1, dtype=np.int64)
+        encoded = []
+
+        for row, chunk_id in enumerate(chunk_ids):
+            article = articles[chunk_id]
+            title = article["title"]
+            if title not in title_rows:
+                title_rows[title] = len(titles)
+                titles.append(title)
+                urls.append(article.get("full_url", ""))
+            article_index[row] = title_rows[title]
+            chunk_numbers[row] = article["chunk_id"]
+            text = article["content"].encode("utf-8")
+            encoded.append(text)
+            text_offsets[row + 1] = text_offsets[row] + len(text)
+
+        return cls(
+            article_index, chunk_numbers, titles, urls, text_offsets, b"".join(encoded)
+        )
+
+    def __len__(self) -> int:
+        return len(self.article_index)
+
+    @property
+    def num_articles(self) -> int:
+        return len(self.titles)
+
+    def chunk_id(self, idx: int) -> str:
+        """Get the chunk id (`<title>_<chunk number>`) of a row."""
+        return f"{self.titles[self.article_index[idx]]}_{self.chunk_numbers[idx]}"
+
+    def text(self, idx: int) -> str:
+        """Get the chunk text of a row."""
+        start, end = self.text_offsets[idx], self.text_offsets[idx + 1]
+        return bytes(self.text_blob[start:end]).decode("utf-8")
+
+    def row(self, idx: int) -> Dict:
+        """Get the chunk id, title, URL and chunk number stored at a FAISS row."""
+        article = self.article_index[idx]
+        return {
+            "article_id": self.chunk_id(idx),
+            "title": self.titles[article],
+            "url": self.urls[article],
+            "chunk_id": int(self.chunk_numbers[idx]),
+        }
+
+    def article(self, idx: int) -> Dict:
+        """Get a row as a chunk dict in the in-memory articles format."""
+        article = self.article_index[idx]
+        return {
+            "title": self.titles[article],
+            "content": self.text(idx),
+            "chunk_id": int(self.chunk_numbers[idx]),
+            "full_url": self.urls[article],
+        }
+
+    def find(self, chunk_id: str) -> Optional[int]:
+        """Get the row of a chunk id, building the lookup on first use."""
+        if self._row_by_id is None:
+            self._row_by_id = {self.chunk_id(i): i for i in range(len(self))}
+        return self._row_by_id.get(chunk_id)
+
+    def rows_for_titles(self, titles: Iterable[str]) -> np.ndarray:
+        """Get every row belonging to the given article titles."""
+        wanted = set(titles)
+        articles = [i for i, title in enumerate(self.titles) if title in wanted]
+        if not articles:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(np.isin(self.article_index, articles)).astype(np.int64)
+
+
+class DeltaSegment:
+    """Chunks added since the base store was written, plus removed base rows."""
+
+    def __init__(
+        self,
+        table: ChunkTable,
+        embeddings: np.ndarray,
+        row_ids: np.ndarray,
+        tombstones: np.ndarray,
+    ):
+        """
+        Initialize a delta segment.
+
+        Args:
+            table: Chunks added since the base store was written
+            embeddings: Embeddings row-aligned with `table`
+            row_ids: Index id of each row; ids continue after the base rows
+            tombstones: Base rows that must no longer be returned
+        """
+        self.table = table
+        self.embeddings = embeddings
+        self.row_ids = np.asarray(row_ids, dtype=np.int64)
+        self.tombstones = np.unique(np.asarray(tombstones, dtype=np.int64))
+        self._position = {int(row_id): i for i, row_id in enumerate(self.row_ids)}
+
+    @classmethod
+    def empty(cls, dimension: int) -> "DeltaSegment":
+        return cls(
+            ChunkTable.from_articles({}),
+            np.empty((0, dimension), dtype=np.float32),
+            np.empty(0, dtype=np.int64),
+            np.empty(0, dtype=np.int64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def position(self, row_id: int) -> Optional[int]:
+        """Get the row within this segment of an index id."""
+        return self._position.get(int(row_id))
+
+    def next_id(self, base_rows: int) -> int:
+        """First unused index id."""
+        return max(base_rows, int(self.row_ids.max()) + 1 if len(self.row_ids) else 0)
+
+    def replace(
+        self,
+        remove_titles: Iterable[str],
+        base_rows_removed: np.ndarray,
+        chunks: List[Dict],
+        embeddings: np.ndarray,
+        first_id: int,
+    ) -> "DeltaSegment":
+        """
+        Build the next segment: drop titles, tombstone base rows, append chunks.
+
+        Args:
+            remove_titles: Titles whose delta rows are dropped
+            base_rows_removed: Base rows to add to the tombstones
+            chunks: New chunk dicts (title, content, chunk_id, full_url)
+            embeddings: Embeddings of `chunks`
+            first_id: Index id of the first new chunk
+
+        Returns:
+            A new DeltaSegment; this one is left unchanged for concurrent readers
+        """
+        drop = set(self.table.rows_for_titles(remove_titles).tolist())
+        keep = [i for i in range(len(self)) if i not in drop]
+
+        articles = {}
+        for i in keep:
+            articles[str(len(articles))] = self.table.article(i)
+        for chunk in chunks:
+            articles[str(len(articles))] = chunk
+
+        dimension = self.embeddings.shape[1]
+        return DeltaSegment(
+            ChunkTable.from_articles(articles),
+            np.concatenate(
+                [
+                    self.embeddings[keep],
+                    np.asarray(embeddings, dtype=np.float32).reshape(-1, dimension),
+                ]
+            ),
+            np.concatenate(
+                [
+                    self.row_ids[keep],
+                    np.arange(first_id, first_id + len(chunks), dtype=np.int64),
+                ]
+            ),
+            np.concatenate([self.tombstones, base_rows_removed]),
+        )
+
+
+class ChunkMapping(Mapping):
+    """Read-only chunk id -> chunk dict view over a ChunkTable."""
+
+    def __init__(self, table: ChunkTable):
+        self.table = table
+
+    def __getitem__(self, chunk_id: str) -> Dict:
+        row = self.table.find(chunk_id)
+        if row is None:
+            raise KeyError(chunk_id)
+        return self.table.article(row)
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.table.chunk_id(i) for i in range(len(self.table)))
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+
+def store_exists(directory: str) -> bool:
+    """Check whether a complete corpus store exists in a directory."""
+    return os.path.exists(os.path.join(directory, MANIFEST_FILE))
+
+
+def store_checksum(table: ChunkTable, embeddings: np.ndarray) -> str:
+    """Hash the embeddings and row layout, identifying what an index was built from."""
+    digest = hashlib.sha256()
+    for column in (embeddings, table.article_index, table.chunk_numbers):
+        # Flattened first: memoryview can't cast an empty (0, dimension) matrix
+        digest.update(np.ascontiguousarray(column).reshape(-1).view(np.uint8))
+    digest.update(json.dumps(table.titles).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _new_version_dir(directory: str) -> str:
+    """Create an empty versioned directory for the next version of a store."""
+    version_dir = f"{directory}.v{time.time_ns()}"
+    os.makedirs(version_dir)
+    return version_dir
+
+
+def _swap_into_place(version_dir: str, directory: str):
+    """
+    Point a store path at a newly written version, then delete the old one.
+
+    A store that is still a plain directory (written before stores were
+    versioned) has to be renamed aside first, the one time it is replaced.
+    """
+    link_tmp = f"{directory}.link"
+    if os.path.lexists(link_tmp):
+        os.remove(link_tmp)
+    # Relative, so the cache directory can be moved or mounted elsewhere
+    os.symlink(os.path.basename(version_dir), link_tmp)
+
+    previous = None
+    if os.path.islink(directory):
+        previous = os.path.realpath(directory)
+    elif os.path.isdir(directory):
+        previous = f"{directory}.old"
+        shutil.rmtree(previous, ignore_errors=True)
+        os.replace(directory, previous)
+    os.replace(link_tmp, directory)
+
+    if previous is not None:
+        shutil.rmtree(previous, ignore_errors=True)
+    # Versions left behind by writes that were interrupted
+    parent = os.path.dirname(directory) or "."
+    prefix = os.path.basename(directory) + ".v"
+    current = os.path.basename(version_dir)
+    for name in os.listdir(parent):
+        if name.startswith(prefix) and name != current:
+            shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+
+
+def remove_store(directory: str):
+    """Delete a store: the link and the version it points to."""
+    if os.path.islink(directory):
+        target = os.path.realpath(directory)
+        os.remove(directory)
+        shutil.rmtree(target, ignore_errors=True)
+    else:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def save_store(
+    directory: str,
+    table: ChunkTable,
+    embeddings: np.ndarray,
+    model_name: str,
+    normalized: bool = False,
+    extra_arrays: Optional[Dict[str, np.ndarray]] = None,
+) -> Dict:
+    """
+    Write a corpus store, replacing any existing one.
+
+    The store is written to a new version directory and swapped into place
+    atomically, so readers never see a partially written or missing store.
+
+    Args:
+        directory: Store directory
+        table: Row-to-chunk table
+        embeddings: Embedding matrix, row-aligned with `table`
+        model_name: Sentence transformer the embeddings were made with
+        normalized: Whether the embeddings are L2-normalized
+        extra_arrays: Additional arrays saved as `<name>.npy`
+
+    Returns:
+        The manifest that was written
+    """
+    if len(embeddings) != len(table):
+        raise ValueError(
+            f"{len(embeddings)} embeddings for {len(table)} chunks in corpus store"
+        )
+
+    version_dir = _new_version_dir(directory)
+
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    np.save(os.path.join(version_dir, "embeddings.npy"), embeddings)
+    with open(os.path.join(version_dir, "chunks.bin"), "wb") as f:
+        f.write(bytes(table.text_blob))
+    np.save(os.path.join(version_dir, "chunk_offsets.npy"), table.text_offsets)
+    for name, array in (extra_arrays or {}).items():
+        np.save(os.path.join(version_dir, f"{name}.npy"), array)
+    return _finish_version(
+        version_dir, directory, table, embeddings, model_name, normalized
+    )
+
+
+def _finish_version(
+    version_dir: str,
+    directory: str,
+    table: ChunkTable,
+    embeddings: np.ndarray,
+    model_name: str,
+    normalized: bool,
+) -> Dict:
+    """Write the row columns and the manifest, then swap the version in."""
+    np.save(os.path.join(version_dir, "article_index.npy"), table.article_index)
+    np.save(os.path.join(version_dir, "chunk_numbers.npy"), table.chunk_numbers)
+    with open(os.path.join(version_dir, "articles.json"), "w", encoding="utf-8") as f:
+        json.dump({"titles": table.titles, "urls": table.urls}, f)
+
+    manifest = {
+        "format_version": STORE_FORMAT_VERSION,
+        "model_name": model_name,
+        "rows": len(table),
+        "dimension": int(embeddings.shape[1]) if embeddings.ndim == 2 else 0,
+        "checksum": store_checksum(table, embeddings),
+        "normalized": normalized,
+        "created_at": time.time(),
+    }
+    # The manifest goes last: its presence marks the store as complete
+    with open(os.path.join(version_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    _swap_into_place(version_dir, directory)
+    return manifest
+
+
+class StoreWriter:
+    """
+    Write a corpus store article by article, without holding it in memory.
+
+    Chunk text is appended to chunks.bin and vectors to a scratch file as
+    they arrive; only the per-row integer columns and the titles stay in
+    memory. finish() converts the vectors to embeddings.npy, writes the
+    manifest and swaps the store into place like save_store().
+    """
+
+    # Rows copied at a time from the scratch file into embeddings.npy
+    COPY_ROWS = 65536
+
+    def __init__(
+        self, directory: str, dimension: int, model_name: str, normalized: bool
+    ):
+        """
+        Start a new version of a store.
+
+        Args:
+            directory: Store directory
+            dimension: Embedding dimension
+            model_name: Sentence transformer the embeddings are made with
+            normalized: Whether the embeddings are L2-normalized
+        """
+        self.directory = directory
+        self.dimension = dimension
+        self.model_name = model_name
+        self.normalized = normalized
+        self.titles: List[str] = []
+        self.urls: List[str] = []
+        self.embedded_rows = 0
+        self._version_dir = _new_version_dir(directory)
+        self._offsets = array("q", [0])
+        self._article_index = array("i")
+        self._chunk_numbers = array("i")
+        self._text = open(os.path.join(self._version_dir, "chunks.bin"), "wb")
+        self._vectors = open(os.path.join(self._version_dir, "embeddings.f32"), "wb")
+
+    def __len__(self) -> int:
+        return len(self._article_index)
+
+    def add_article(self, title: str, url: str, chunks: List[str]):
+        """Append an article's chunks as new rows."""
+        article = len(self.titles)
+        self.titles.append(title)
+        self.urls.append(url)
+        for number, chunk in enumerate(chunks):
+            data = chunk.encode("utf-8")
+            self._text.write(data)
+            self._offsets.append(self._offsets[-1] + len(data))
+            self._article_index.append(article)
+            self._chunk_numbers.append(number)
+
+    def add_embeddings(self, vectors: np.ndarray):
+        """Append vectors for the next rows, in row order."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimension:
+            raise ValueError(
+                f"Expected (rows, {self.dimension}) embeddings, got {vectors.shape}"
+            )
+        if self.embedded_rows + len(vectors) > len(self):
+            raise ValueError("More embeddings than chunks in corpus store")
+        self._vectors.write(vectors.tobytes())
+        self.embedded_rows += len(vectors)
+
+    def finish(self) -> Dict:
+        """
+        Complete the store and swap it into place.
+
+        Returns:
+            The manifest that was written
+        """
+        if self.embedded_rows != len(self):
+            raise ValueError(
+                f"{self.embedded_rows} embeddings for {len(self)} chunks in corpus store"
+            )
+        self._text.close()
+        self._vectors.close()
+
+        scratch_path = self._vectors.name
+        embeddings = np.lib.format.open_memmap(
+            os.path.join(self._version_dir, "embeddings.npy"),
+            mode="w+",
+            dtype=np.float32,
+            shape=(len(self), self.dimension),
+        )
+        if len(self):
+            scratch = np.memmap(
+                scratch_path, dtype=np.float32, mode="r", shape=embeddings.shape
+            )
+            for start in range(0, len(self), self.COPY_ROWS):
+                embeddings[start : start + self.COPY_ROWS] = scratch[
+                    start : start + self.COPY_ROWS
+                ]
+            del scratch
+        embeddings.flush()
+        os.remove(scratch_path)
+
+        table = ChunkTable(
+            np.frombuffer(self._article_index, dtype=np.int32),
+            np.frombuffer(self._chunk_numbers, dtype=np.int32),
+            self.titles,
+            self.urls,
+            np.frombuffer(self._offsets, dtype=np.int64),
+            b"",
+        )
+        np.save(
+            os.path.join(self._version_dir, "chunk_offsets.npy"), table.text_offsets
+        )
+        return _finish_version(
+            self._version_dir,
+            self.directory,
+            table,
+            embeddings,
+            self.model_name,
+            self.normalized,
+        )
+
+    def abort(self):
+        """Discard the version being written; the current store is untouched."""
+        self._text.close()
+        self._vectors.close()
+        shutil.rmtree(self._version_dir, ignore_errors=True)
+
+
+def load_store(
+    directory: str, mmap: bool = True
+) -> Tuple[ChunkTable, np.ndarray, Dict]:
+    """
+    Open a corpus store with every large file memory-mapped read-only.
+
+    Args:
+        directory: Store directory
+        mmap: Memory-map the files instead of reading them into RAM
+
+    Returns:
+        (chunk table, embedding matrix, manifest)
+    """
+    # Resolve the link once so every file comes from the same version
+    directory = os.path.realpath(directory)
+    with open(os.path.join(directory, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != STORE_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported corpus store format {manifest.get('format_version')}"
+        )
+
+    def load_array(name: str) -> np.ndarray:
+        return np.load(os.path.join(directory, name), mmap_mode="r" if mmap else None)
+
+    with open(os.path.join(directory, "articles.json"), encoding="utf-8") as f:
+        article_columns = json.load(f)
+
+    blob_path = os.path.join(directory, "chunks.bin")
+    if not mmap:
+        with open(blob_path, "rb") as f:
+            text_blob = f.read()
+    elif os.path.getsize(blob_path) > 0:
+        text_blob = np.memmap(blob_path, dtype=np.uint8, mode="r")
+    else:
+        text_blob = b""
+
+    table = ChunkTable(
+        load_array("article_index.npy"),
+        load_array("chunk_numbers.npy"),
+        article_columns["titles"],
+        article_columns["urls"],
+        load_array("chunk_offsets.npy"),
+        text_blob,
+    )
+    return table, load_array("embeddings.npy"), manifest
+
+
+def save_delta(
+    store_dir: str, delta: DeltaSegment, model_name: str, normalized: bool = False
+):
+    """
+    Write the delta segment of a store, or remove it when it is empty.
+
+    Args:
+        store_dir: Base store directory
+        delta: Delta segment to write
+        model_name: Sentence transformer the embeddings were made with
+        normalized: Whether the embeddings are L2-normalized
+    """
+    delta_dir = os.path.join(store_dir, DELTA_DIR)
+    if not len(delta) and not len(delta.tombstones):
+        remove_store(delta_dir)
+        return
+    save_store(
+        delta_dir,
+        delta.table,
+        delta.embeddings,
+        model_name,
+        normalized=normalized,
+        extra_arrays={"row_ids": delta.row_ids, "tombstones": delta.tombstones},
+    )
+
+
+def load_delta(store_dir: str) -> Optional[Tuple[DeltaSegment, Dict]]:
+    """
+    Read the delta segment of a store into memory.
+
+    Args:
+        store_dir: Base store directory
+
+    Returns:
+        (delta segment, delta manifest), or None if the store has no delta
+    """
+    delta_dir = os.path.join(store_dir, DELTA_DIR)
+    if not store_exists(delta_dir):
+        return None
+    delta_dir = os.path.realpath(delta_dir)
+    table, embeddings, manifest = load_store(delta_dir, mmap=False)
+    delta = DeltaSegment(
+        table,
+        embeddings,
+        np.load(os.path.join(delta_dir, "row_ids.npy")),
+        np.load(os.path.join(delta_dir, "tombstones.npy")),
+    )
+    return delta, manifest
@@ -0,0 +1,215 @@
+"""
+Batch embedding engine for corpus chunks.
+
+Chunks are sorted by length so each batch pads to similar lengths, batch
+sizes are sized from the memory that is actually available (short chunks get
+larger batches than long ones), and results are written straight into a
+preallocated float32 matrix, optionally an .npy file opened with mmap.
+Encoding can be spread over several CPU processes with the sentence-transformers
+multi-process pool.
+"""
+
+import logging
+import os
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Fixed batch size (0 = size batches from available memory)
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "0"))
+# Worker processes for encoding (0 or 1 = encode in this process)
+EMBED_PROCESSES = int(os.getenv("EMBED_PROCESSES", "0"))
+# Share of available memory one batch may use for activations
+EMBED_MEMORY_FRACTION = float(os.getenv("EMBED_MEMORY_FRACTION", "0.25"))
+
+MIN_BATCH_SIZE = 8
+MAX_BATCH_SIZE = 1024
+# Rough characters per word-piece token for English text
+CHARS_PER_TOKEN = 4
+# Attention heads assumed when estimating activation memory
+ATTENTION_HEADS = 12
+
+
+def available_memory() -> int:
+    """Bytes of memory available to this process (Linux, else a safe guess)."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 2 * 1024**3
+
+
+def activation_bytes(seq_len: int, hidden: int) -> int:
+    """Estimated peak activation memory of one sequence in a BERT-style layer."""
+    attention = ATTENTION_HEADS * seq_len * seq_len * 4
+    hidden_states = 16 * seq_len * hidden * 4
+    return attention + hidden_states
+
+
+class EmbeddingEngine:
+    def __init__(
+        self,
+        model,
+        batch_size: int = EMBED_BATCH_SIZE,
+        processes: int = EMBED_PROCESSES,
+        memory_fraction: float = EMBED_MEMORY_FRACTION,
+    ):
+        """
+        Initialize the engine around a loaded SentenceTransformer.
+
+        Args:
+            model: SentenceTransformer used for encoding
+            batch_size: Fixed batch size, or 0 to size batches from memory
+            processes: CPU worker processes; 0 or 1 encodes in this process
+            memory_fraction: Share of available memory a batch may use
+        """
+        self.model = model
+        self.batch_size = batch_size
+        self.processes = processes
+        self.memory_fraction = memory_fraction
+        self.dimension = model.get_sentence_embedding_dimension()
+        self.max_seq_length = getattr(model, "max_seq_length", None) or 512
+        self._pool = None
+
+    def _memory_budget(self) -> int:
+        device = str(getattr(self.model, "device", "cpu"))
+        if device.startswith("cuda"):
+            import torch
+
+            free, _ = torch.cuda.mem_get_info(torch.device(device))
+            return int(free * self.memory_fraction)
+        # Worker processes each hold a batch in memory at the same time
+        return int(available_memory() * self.memory_fraction / max(1, self.processes))
+
+    def plan_batches(self, lengths: np.ndarray) -> List[np.ndarray]:
+        """
+        Group texts into batches of similar length.
+
+        Args:
+            lengths: Character length of each text
+
+        Returns:
+            Arrays of text positions, longest texts first
+        """
+        order = np.argsort(-lengths, kind="stable")
+        if self.batch_size:
+            return [
+                order[i : i + self.batch_size]
+                for i in range(0, len(order), self.batch_size)
+            ]
+
+        budget = self._memory_budget()
+        batches = []
+        start = 0
+        while start < len(order):
+            # Sorted longest first, so the first text bounds the padded length
+            tokens = int(lengths[order[start]]) // CHARS_PER_TOKEN + 2
+            seq_len = min(self.max_seq_length, max(tokens, 8))
+            size = budget // activation_bytes(seq_len, self.dimension)
+            size = int(min(MAX_BATCH_SIZE, max(MIN_BATCH_SIZE, size)))
+            batches.append(order[start : start + size])
+            start += size
+        return batches
+
+    def encode_into(
+        self,
+        texts: List[str],
+        out: np.ndarray,
+        offset: int = 0,
+        normalize: bool = False,
+    ):
+        """
+        Embed texts and write the vectors to `out[offset : offset + len(texts)]`.
+
+        Args:
+            texts: Texts to embed
+            out: Preallocated (rows, dimension) float32 matrix or memmap
+            offset: Row of `out` that receives the first text
+            normalize: L2-normalize the vectors
+        """
+        if not texts:
+            return
+        lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+        batches = self.plan_batches(lengths)
+
+        if self.processes > 1:
+            self._encode_multi_process(texts, batches, out, offset, normalize)
+            return
+
+        for batch in batches:
+            vectors = self.model.encode(
+                [texts[i] for i in batch],
+                batch_size=len(batch),
+                show_progress_bar=False,
+                convert_to_numpy=True,
+                normalize_embeddings=normalize,
+            )
+            out[offset + batch] = vectors
+
+    def _encode_multi_process(
+        self,
+        texts: List[str],
+        batches: List[np.ndarray],
+        out: np.ndarray,
+        offset: int,
+        normalize: bool,
+    ):
+        if self._pool is None:
+            logger.info(f"Starting {self.processes} embedding worker processes")
+            self._pool = self.model.start_multi_process_pool(
+                target_devices=["cpu"] * self.processes
+            )
+
+        # Hand the pool several batches at a time so every worker stays busy
+        group = self.processes * 4
+        for i in range(0, len(batches), group):
+            positions = np.concatenate(batches[i : i + group])
+            batch_size = max(len(b) for b in batches[i : i + group])
+            vectors = self.model.encode_multi_process(
+                [texts[p] for p in positions],
+                self._pool,
+                batch_size=batch_size,
+                chunk_size=batch_size,
+            )
+            if normalize:
+                # Older releases have no normalize_embeddings for the pool
+                norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+                vectors = vectors / np.maximum(norms, 1e-12)
+            out[offset + positions] = vectors
+
+    def encode(
+        self, texts: List[str], normalize: bool = False, path: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Embed texts into a new float32 matrix.
+
+        Args:
+            texts: Texts to embed
+            normalize: L2-normalize the vectors
+            path: Write the matrix to this .npy file through mmap instead of RAM
+
+        Returns:
+            (len(texts), dimension) float32 matrix, row-aligned with `texts`
+        """
+        shape = (len(texts), self.dimension)
+        if path:
+            out = np.lib.format.open_memmap(
+                path, mode="w+", dtype=np.float32, shape=shape
+            )
+        else:
+            out = np.empty(shape, dtype=np.float32)
+        self.encode_into(texts, out, normalize=normalize)
+        if path:
+            out.flush()
+        return out
+
+    def close(self):
+        """Stop the worker processes, if any were started."""
+        if self._pool is not None:
+            self.model.stop_multi_process_pool(self._pool)
+            self._pool = None
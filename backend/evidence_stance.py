@@ -0,0 +1,269 @@
+"""
+Stance of retrieved evidence towards a claim.
+
+A small NLI cross-encoder (STANCE_NLI_MODEL) scores every (evidence, claim)
+pair. Pairs from several claims are flattened, sorted by length to keep
+padding low and run in batches of STANCE_BATCH_SIZE. The default ONNX
+backend exports the checkpoint once, quantizes it to int8 and runs it with
+ONNX Runtime on CPU; STANCE_BACKEND=torch runs the PyTorch model instead.
+
+Each pair gets SUPPORTS, NOT ENOUGH INFO and REFUTES probabilities, and
+`aggregate` combines a claim's pairs weighted by retrieval relevance. The
+keyword stance (one compiled matcher for the supporting and contradicting
+lexicons) is kept for when the model is disabled, cannot be loaded or does
+not answer within the request's latency budget.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from language_patterns import LanguagePatternMatcher
+
+logger = logging.getLogger(__name__)
+
+# Empty disables the model and leaves keyword stance only
+STANCE_NLI_MODEL = os.getenv("STANCE_NLI_MODEL", "cross-encoder/nli-deberta-v3-xsmall")
+STANCE_BACKEND = os.getenv("STANCE_BACKEND", "onnx")  # onnx or torch
+STANCE_QUANTIZE = os.getenv("STANCE_QUANTIZE", "true").lower() == "true"
+STANCE_MAX_LENGTH = int(os.getenv("STANCE_MAX_LENGTH", "256"))
+STANCE_BATCH_SIZE = int(os.getenv("STANCE_BATCH_SIZE", "32"))
+# Time a request waits for NLI stance before using keyword stance
+STANCE_LATENCY_BUDGET_MS = float(os.getenv("STANCE_LATENCY_BUDGET_MS", "400"))
+
+SUPPORTS, NEUTRAL, REFUTES = 1, 0, -1
+STANCE_NAMES = {SUPPORTS: "supports", NEUTRAL: "neutral", REFUTES: "refutes"}
+# Probability columns returned by the scorer
+STANCE_COLUMNS = ("supports", "not_enough_info", "refutes")
+
+STANCE_LEXICONS = {
+    "supporting": ["true", "correct", "accurate", "confirmed", "verified", "fact"],
+    "contradicting": [
+        "false",
+        "incorrect",
+        "inaccurate",
+        "debunked",
+        "misleading",
+        "myth",
+    ],
+}
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return shifted / shifted.sum(axis=1, keepdims=True)
+
+
+class EvidenceStanceScorer:
+    def __init__(
+        self,
+        nli_model: str = STANCE_NLI_MODEL,
+        backend: str = STANCE_BACKEND,
+        quantize: bool = STANCE_QUANTIZE,
+        max_length: int = STANCE_MAX_LENGTH,
+        batch_size: int = STANCE_BATCH_SIZE,
+    ):
+        """
+        Initialize the scorer. The NLI model is loaded on first use.
+
+        Args:
+            nli_model: Hugging Face NLI cross-encoder name or path; empty for
+                keyword stance only
+            backend: "onnx" (ONNX Runtime) or "torch"
+            quantize: Use dynamic int8 weights with the onnx backend
+            max_length: Token limit per (evidence, claim) pair
+            batch_size: Pairs per forward pass
+        """
+        self.nli_model = nli_model
+        self.backend = backend
+        self.quantize = quantize and backend == "onnx"
+        self.max_length = max_length
+        self.batch_size = max(1, batch_size)
+        self.matcher = LanguagePatternMatcher(STANCE_LEXICONS)
+        self._logits_fn = None
+        self._columns: Optional[List[int]] = None
+        self._load_failed = False
+        self._lock = threading.Lock()
+        self.stats = {"pairs": 0, "forward_passes": 0, "over_budget": 0}
+        self._seconds = 0.0
+
+    @property
+    def uses_nli(self) -> bool:
+        return bool(self.nli_model) and not self._load_failed
+
+    @property
+    def version(self) -> str:
+        if not self.nli_model:
+            return "keywords"
+        return f"{self.nli_model}:{self.backend}{':int8' if self.quantize else ''}"
+
+    def load(self) -> bool:
+        """Load the NLI model if it isn't loaded yet; False if unavailable."""
+        with self._lock:
+            if self._logits_fn is not None or not self.uses_nli:
+                return self._logits_fn is not None
+            try:
+                if self.backend == "onnx":
+                    id2label = self._load_onnx()
+                else:
+                    id2label = self._load_torch()
+                labels = {int(i): name.lower() for i, name in id2label.items()}
+                # Column order differs between NLI checkpoints
+                self._columns = [
+                    next(i for i, name in labels.items() if key in name)
+                    for key in ("entail", "neutral", "contradict")
+                ]
+            except Exception as e:
+                logger.error(f"Could not load NLI model {self.nli_model}: {e}")
+                self._logits_fn = None
+                self._load_failed = True
+                return False
+            logger.info(f"Loaded NLI stance model {self.version}")
+            return True
+
+    def _load_onnx(self):
+        from onnx_models import OnnxSequenceClassifier, export_sequence_classifier
+
+        model = OnnxSequenceClassifier(
+            export_sequence_classifier(self.nli_model, quantize=self.quantize)
+        )
+        self._logits_fn = lambda premises, hypotheses: model.logits(
+            premises, hypotheses, max_length=self.max_length
+        )
+        return model.id2label
+
+    def _load_torch(self):
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(self.nli_model)
+        model = AutoModelForSequenceClassification.from_pretrained(self.nli_model)
+        model.eval()
+
+        def logits_fn(premises, hypotheses):
+            inputs = tokenizer(
+                premises,
+                hypotheses,
+                padding=True,
+                truncation="only_first",
+                max_length=self.max_length,
+                return_tensors="pt",
+            )
+            with torch.inference_mode():
+                return model(**inputs).logits.float().numpy()
+
+        self._logits_fn = logits_fn
+        return model.config.id2label
+
+    def nli_probabilities_batch(
+        self, items: Sequence[Tuple[str, Sequence[str]]]
+    ) -> List[np.ndarray]:
+        """
+        Score the evidence of several claims together.
+
+        Args:
+            items: (claim, evidence passages) per claim
+
+        Returns:
+            Per claim, a float array of shape (passages, 3) with the
+            probabilities in STANCE_COLUMNS order
+
+        Raises:
+            RuntimeError: If the NLI model is disabled or failed to load
+        """
+        if not self.load():
+            raise RuntimeError("NLI stance model is not available")
+
+        # Evidence is the premise, the claim the hypothesis
+        pairs = [
+            (evidence, claim) for claim, passages in items for evidence in passages
+        ]
+        probabilities = np.zeros((len(pairs), 3), dtype=np.float32)
+        # Similar lengths in a batch keep padding (and wasted compute) low
+        order = sorted(range(len(pairs)), key=lambda i: len(pairs[i][0]))
+        started = time.perf_counter()
+        for start in range(0, len(order), self.batch_size):
+            rows = order[start : start + self.batch_size]
+            logits = self._logits_fn(
+                [pairs[i][0] for i in rows], [pairs[i][1] for i in rows]
+            )
+            probabilities[rows] = _softmax(np.asarray(logits, dtype=np.float32))[
+                :, self._columns
+            ]
+            self.stats["forward_passes"] += 1
+        self.stats["pairs"] += len(pairs)
+        self._seconds += time.perf_counter() - started
+
+        results = []
+        offset = 0
+        for _, passages in items:
+            results.append(probabilities[offset : offset + len(passages)])
+            offset += len(passages)
+        return results
+
+    def nli_probabilities(self, claim: str, evidence_texts: Sequence[str]):
+        """Score one claim's evidence; see nli_probabilities_batch."""
+        return self.nli_probabilities_batch([(claim, evidence_texts)])[0]
+
+    @staticmethod
+    def stances(probabilities: np.ndarray) -> np.ndarray:
+        """Most likely SUPPORTS, NEUTRAL or REFUTES per pair."""
+        return (1 - probabilities.argmax(axis=1)).astype(np.int32)
+
+    @staticmethod
+    def aggregate(probabilities: np.ndarray, weights: Sequence[float]) -> np.ndarray:
+        """
+        Combine a claim's pair probabilities into one distribution.
+
+        Args:
+            probabilities: (passages, 3) array in STANCE_COLUMNS order
+            weights: Retrieval relevance per passage; negatives count as zero
+
+        Returns:
+            float array of 3 probabilities in STANCE_COLUMNS order
+        """
+        weights = np.clip(np.asarray(weights, dtype=np.float32), 0, None)
+        if not weights.sum():
+            weights = np.ones(len(probabilities), dtype=np.float32)
+        return weights @ probabilities / weights.sum()
+
+    def keyword_stances(self, evidence_texts: Sequence[str]) -> np.ndarray:
+        """
+        Keyword stance per passage from the supporting/contradicting lexicons.
+
+        Returns:
+            int array of SUPPORTS, NEUTRAL or REFUTES per passage
+        """
+        counts = np.zeros((len(evidence_texts), 2), dtype=np.int32)
+        for row, text in enumerate(evidence_texts):
+            found = self.matcher.match(text)["counts"]
+            counts[row] = found["supporting"], found["contradicting"]
+        return np.sign(counts[:, 0] - counts[:, 1]).astype(np.int32)
+
+    def get_metrics(self) -> dict:
+        """Get the model in use and pair throughput counters."""
+        return {
+            **self.stats,
+            "model": self.version,
+            "loaded": self._logits_fn is not None,
+            "load_failed": self._load_failed,
+            "pairs_per_second": (
+                self.stats["pairs"] / self._seconds if self._seconds else 0.0
+            ),
+        }
+
+
+# Global instance
+stance_scorer: Optional[EvidenceStanceScorer] = None
+
+
+def get_stance_scorer() -> EvidenceStanceScorer:
+    """Get or create global evidence stance scorer instance."""
+    global stance_scorer
+    if stance_scorer is None:
+        stance_scorer = EvidenceStanceScorer()
+    return stance_scorer
@@ -0,0 +1,138 @@
+"""
+Bounded execution layer for running blocking work off the asyncio event loop.
+
+Network calls (URL scraping, Google Fact Check) go to the I/O pool, model
+inference and FAISS search go to the CPU pool, and pure-Python CPU work can
+optionally be sent to a process pool.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+IO_POOL_WORKERS = int(os.getenv("IO_POOL_WORKERS", "32"))
+CPU_POOL_WORKERS = int(os.getenv("CPU_POOL_WORKERS", str(os.cpu_count() or 4)))
+# Process workers are forked from the serving process, so only module-level,
+# picklable functions that don't touch the loaded models belong there.
+PROCESS_POOL_WORKERS = int(os.getenv("PROCESS_POOL_WORKERS", "0"))
+
+
+class ExecutionLayer:
+    def __init__(
+        self,
+        io_workers: int = IO_POOL_WORKERS,
+        cpu_workers: int = CPU_POOL_WORKERS,
+        process_workers: int = PROCESS_POOL_WORKERS,
+    ):
+        """
+        Initialize the execution layer. Pools are created lazily on first use.
+
+        Args:
+            io_workers: Maximum threads for blocking network calls
+            cpu_workers: Maximum threads for model inference and index search
+            process_workers: Maximum processes for pure-Python CPU work
+                (0 runs that work on the CPU thread pool instead)
+        """
+        self.io_workers = max(1, io_workers)
+        self.cpu_workers = max(1, cpu_workers)
+        self.process_workers = max(0, process_workers)
+        self._pools: Dict[str, Executor] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            pool: {"submitted": 0, "active": 0, "completed": 0, "failed": 0}
+            for pool in ("io", "cpu", "process")
+        }
+
+    def _get_pool(self, kind: str) -> Executor:
+        """Return the pool for `kind`, creating it on first use."""
+        pool = self._pools.get(kind)
+        if pool is not None:
+            return pool
+
+        with self._lock:
+            pool = self._pools.get(kind)
+            if pool is None:
+                if kind == "io":
+                    pool = ThreadPoolExecutor(
+                        max_workers=self.io_workers, thread_name_prefix="io"
+                    )
+                elif kind == "cpu":
+                    pool = ThreadPoolExecutor(
+                        max_workers=self.cpu_workers, thread_name_prefix="cpu"
+                    )
+                else:
+                    pool = ProcessPoolExecutor(max_workers=self.process_workers)
+                self._pools[kind] = pool
+                logger.info(f"Started {kind} pool")
+        return pool
+
+    async def _run(self, kind: str, func: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs) if kwargs else func
+        stats = self._stats[kind]
+        stats["submitted"] += 1
+        stats["active"] += 1
+        try:
+            if kwargs:
+                result = await loop.run_in_executor(self._get_pool(kind), call)
+            else:
+                result = await loop.run_in_executor(self._get_pool(kind), call, *args)
+        except Exception:
+            stats["failed"] += 1
+            raise
+        finally:
+            stats["active"] -= 1
+        stats["completed"] += 1
+        return result
+
+    async def run_io(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking network call on the I/O thread pool."""
+        return await self._run("io", func, *args, **kwargs)
+
+    async def run_cpu(self, func: Callable, *args, **kwargs) -> Any:
+        """Run model inference or other native CPU work on the CPU thread pool."""
+        return await self._run("cpu", func, *args, **kwargs)
+
+    async def run_process(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run pure-Python CPU work in the process pool.
+
+        Falls back to the CPU thread pool when no process workers are configured.
+        """
+        if not self.process_workers:
+            return await self.run_cpu(func, *args, **kwargs)
+        return await self._run("process", func, *args, **kwargs)
+
+    def get_stats(self) -> Dict:
+        """Get pool sizes and task counters."""
+        return {
+            "io": {"max_workers": self.io_workers, **self._stats["io"]},
+            "cpu": {"max_workers": self.cpu_workers, **self._stats["cpu"]},
+            "process": {"max_workers": self.process_workers, **self._stats["process"]},
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Shut down every pool that has been started."""
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for kind, pool in pools.items():
+            pool.shutdown(wait=wait)
+            logger.info(f"Stopped {kind} pool")
+
+
+# Global instance
+execution_layer: Optional[ExecutionLayer] = None
+
+
+def get_execution_layer() -> ExecutionLayer:
+    """Get or create global execution layer instance."""
+    global execution_layer
+    if execution_layer is None:
+        execution_layer = ExecutionLayer()
+    return execution_layer
@@ -1,22 +1,272 @@
-import requests
+"""
+Google Fact Check Tools client.
+
+`FactCheckClient` is the async client used in the /analyze path. It has:
+- one pooled HTTP connection set;
+- strict connect/read timeouts;
+- a circuit breaker that fails fast while the API is down;
+- a TTL cache of answers;
+- deduplication of identical queries that are in flight at the same time.
+
+A rejected API key (HTTP 401/403, or 400 API_KEY_INVALID) is a configuration
+error, not an outage: it is logged once and the client stops sending
+requests until the process restarts.
+
+FACT_CHECK_API_URL points it at a local mock server for testing.
+"""
+
+import asyncio
+import logging
 import os
+import time
+from typing import Dict, Optional
+
+import httpx
+import requests
 from dotenv import load_dotenv
 
+from result_cache import LocalCache, normalize_text
+
 load_dotenv()
+logger = logging.getLogger(__name__)
+
 API_KEY = os.environ.get("GOOGLE_API_KEY")
-API_URL = "https://factchecktools.googleapis.com/v1alpha1/claims:search"
+API_URL = os.environ.get(
+    "FACT_CHECK_API_URL",
+    "https://factchecktools.googleapis.com/v1alpha1/claims:search",
+)
+FACT_CHECK_TIMEOUT = float(os.getenv("FACT_CHECK_TIMEOUT", "3"))
+FACT_CHECK_MAX_CONNECTIONS = int(os.getenv("FACT_CHECK_MAX_CONNECTIONS", "20"))
+FACT_CHECK_CACHE_TTL = float(os.getenv("FACT_CHECK_CACHE_TTL", "3600"))
+FACT_CHECK_CACHE_SIZE = int(os.getenv("FACT_CHECK_CACHE_SIZE", "4096"))
+# Consecutive failures that open the circuit, and how long it stays open
+FACT_CHECK_FAILURE_THRESHOLD = int(os.getenv("FACT_CHECK_FAILURE_THRESHOLD", "5"))
+FACT_CHECK_RESET_TIMEOUT = float(os.getenv("FACT_CHECK_RESET_TIMEOUT", "30"))
+
+
+def parse_fact_check_response(data: Dict) -> Optional[Dict]:
+    """Take the first review out of a claims:search response."""
+    if "claims" in data and len(data["claims"]) > 0:
+        review = data["claims"][0]["claimReview"][0]
+        return {
+            "verdict": review.get("textualRating", "No rating found"),
+            "original_claim": data["claims"][0].get("text", "N/A"),
+            "source_url": review.get("url", "N/A"),
+        }
+    return None
 
 
 def check_claim_with_google(claim_text):
     params = {"query": claim_text, "key": API_KEY}
-    response = requests.get(API_URL, params=params)
+    response = requests.get(API_URL, params=params, timeout=FACT_CHECK_TIMEOUT)
     if response.status_code == 200:
-        data = response.json()
-        if "claims" in data and len(data["claims"]) > 0:
-            review = data["claims"][0]["claimReview"][0]
-            return {
-                "verdict": review.get("textualRating", "No rating found"),
-                "original_claim": data["claims"][0].get("text", "N/A"),
-                "source_url": review.get("url", "N/A"),
-            }
+        return parse_fact_check_response(response.json())
     return None
+
+
+class CircuitBreaker:
+    """Closed, open or half-open, from consecutive failures."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a request may go out now; half-open lets one probe through."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning("Google Fact Check circuit opened")
+            self.opened_at = time.monotonic()
+
+
+class FactCheckClient:
+    def __init__(
+        self,
+        api_key: Optional[str] = API_KEY,
+        api_url: str = API_URL,
+        timeout: float = FACT_CHECK_TIMEOUT,
+        max_connections: int = FACT_CHECK_MAX_CONNECTIONS,
+        cache_ttl: float = FACT_CHECK_CACHE_TTL,
+        cache_size: int = FACT_CHECK_CACHE_SIZE,
+        failure_threshold: int = FACT_CHECK_FAILURE_THRESHOLD,
+        reset_timeout: float = FACT_CHECK_RESET_TIMEOUT,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """
+        Initialize the client. The HTTP pool is created on first use.
+
+        Args:
+            api_key: Google API key; without one every lookup returns None
+            api_url: claims:search endpoint (a mock server URL in tests)
+            timeout: Total seconds allowed per request
+            max_connections: Size of the shared connection pool
+            cache_ttl: Seconds an answer (including "no review") is reused
+            cache_size: Queries kept in the answer cache
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a probe
+            transport: Optional httpx transport, e.g. httpx.MockTransport
+        """
+        self.api_key = api_key
+        self.api_url = api_url
+        self.timeout = httpx.Timeout(timeout, connect=min(timeout, 1.0))
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self.transport = transport
+        self.cache = LocalCache(max_entries=cache_size, ttl=cache_ttl)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        # Why the API key was rejected; lookups stop once it is set
+        self.disabled: Optional[str] = None
+        self.stats = {
+            "requests": 0,
+            "cache_hits": 0,
+            "deduplicated": 0,
+            "failures": 0,
+            "short_circuited": 0,
+        }
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout, limits=self.limits, transport=self.transport
+            )
+        return self._client
+
+    async def check_claim(self, claim_text: str) -> Optional[Dict]:
+        """
+        Look up the first published fact check for a claim.
+
+        Args:
+            claim_text: The claim to look up
+
+        Returns:
+            Dict with verdict, original_claim and source_url, or None when no
+            review exists or the API is unavailable
+        """
+        if not self.api_key or self.disabled:
+            return None
+
+        key = normalize_text(claim_text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            return cached["result"]
+
+        # Identical concurrent queries share one request; the request runs as
+        # its own task so one caller going away doesn't cancel it for the rest
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.stats["deduplicated"] += 1
+        else:
+            task = asyncio.ensure_future(self._fetch(claim_text, key))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, claim_text: str, key: str) -> Optional[Dict]:
+        if not self.breaker.allow():
+            self.stats["short_circuited"] += 1
+            return None
+
+        self.stats["requests"] += 1
+        try:
+            response = await self._get_client().get(
+                self.api_url, params={"query": claim_text, "key": self.api_key}
+            )
+        except httpx.HTTPError as e:
+            self._record_failure(f"{type(e).__name__}: {e}")
+            return None
+
+        if response.status_code == 429 or response.status_code >= 500:
+            self._record_failure(f"HTTP {response.status_code}")
+            return None
+        if response.status_code in (401, 403) or (
+            response.status_code == 400 and "API_KEY_INVALID" in response.text
+        ):
+            self._disable(f"HTTP {response.status_code}")
+            return None
+        if response.status_code != 200:
+            # The request was refused, but the service is up
+            self.breaker.record_success()
+            logger.warning(f"Google Fact Check returned HTTP {response.status_code}")
+            return None
+
+        try:
+            result = parse_fact_check_response(response.json())
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            self._record_failure(f"unexpected response body: {type(e).__name__}: {e}")
+            return None
+        self.breaker.record_success()
+        self.cache.set(key, {"result": result})
+        return result
+
+    def _disable(self, reason: str):
+        if self.disabled is None:
+            logger.error(
+                f"Google Fact Check rejected the API key ({reason}); fact checks "
+                f"are disabled until GOOGLE_API_KEY is fixed and the app restarts"
+            )
+        self.disabled = reason
+
+    def _record_failure(self, reason: str):
+        self.stats["failures"] += 1
+        self.breaker.record_failure()
+        logger.warning(f"Google Fact Check request failed: {reason}")
+
+    def get_metrics(self) -> Dict:
+        """Get request, cache and circuit breaker counters."""
+        return {
+            **self.stats,
+            "circuit": self.breaker.state,
+            "disabled": self.disabled,
+            "cached_queries": len(self.cache),
+            "in_flight": len(self._in_flight),
+        }
+
+    async def aclose(self):
+        """Close the connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Global instance
+fact_check_client: Optional[FactCheckClient] = None
+
+
+def get_fact_check_client() -> FactCheckClient:
+    """Get or create global fact check client instance."""
+    global fact_check_client
+    if fact_check_client is None:
+        fact_check_client = FactCheckClient()
+    return fact_check_client
@@ -1,23 +1,72 @@
 import os
+import itertools
 import json
 import pickle
 import numpy as np
-from typing import List, Dict, Tuple, Optional
+from typing import Iterable, List, Dict, Set, Tuple, Optional
 from sentence_transformers import SentenceTransformer
 import faiss
-import wikipediaapi
 from datasets import load_dataset
 import requests
 from tqdm import tqdm
 import logging
+import threading
+
+from corpus_index import (
+    FEVER_INDEX_EF_SEARCH,
+    FEVER_INDEX_NPROBE,
+    FEVER_INDEX_TYPE,
+    build_index,
+    id_selector_excluding,
+    index_manifest,
+    load_index,
+    resolve_build_params,
+    save_index,
+    search_params_excluding,
+    set_search_params,
+)
+from embedding_engine import EmbeddingEngine
+from fever_titles import stream_fever_titles
+from wiki_fetcher import WikiFetcher
+from corpus_store import (
+    ChunkMapping,
+    ChunkTable,
+    DeltaSegment,
+    StoreWriter,
+    load_delta,
+    load_store,
+    save_delta,
+    save_store,
+    store_exists,
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Unit-length vectors make inner-product scores true cosine similarities in [-1, 1]
+FEVER_NORMALIZE_EMBEDDINGS = os.getenv("FEVER_NORMALIZE_EMBEDDINGS", "true") == "true"
+# Cap on articles fetched when building the corpus (0 = no cap)
+FEVER_MAX_ARTICLES = int(os.getenv("FEVER_MAX_ARTICLES", "1000"))
+# Chunks embedded together while fetching continues in the background
+EMBED_WINDOW = int(os.getenv("FEVER_EMBED_WINDOW", "4096"))
+# Drop evidence scoring below this similarity (unset keeps every top_k result)
+FEVER_MIN_SCORE = (
+    float(os.environ["FEVER_MIN_SCORE"]) if os.getenv("FEVER_MIN_SCORE") else None
+)
+FEVER_CACHE_DIR = "./fever_cache"
+
 
 class FEVEREvidenceCorpus:
     def __init__(
-        self, cache_dir: str = "./fever_cache", model_name: str = "all-MiniLM-L6-v2"
+        self,
+        cache_dir: str = FEVER_CACHE_DIR,
+        model_name: str = "all-MiniLM-L6-v2",
+        index_type: str = FEVER_INDEX_TYPE,
+        nprobe: int = FEVER_INDEX_NPROBE,
+        ef_search: int = FEVER_INDEX_EF_SEARCH,
+        normalize_embeddings: bool = FEVER_NORMALIZE_EMBEDDINGS,
+        min_score: Optional[float] = FEVER_MIN_SCORE,
+        load_model: bool = True,
     ):
         """
         Initialize FEVER evidence corpus with Wikipedia articles and semantic search.
@@ -25,59 +74,242 @@ class FEVEREvidenceCorpus:
         Args:
             cache_dir: Directory to cache Wikipedia articles and embeddings
             model_name: Sentence transformer model for semantic search
+            index_type: FAISS index type (flat, ivf_flat, ivf_pq, hnsw or sq8)
+            nprobe: IVF lists visited per query (IVF index types)
+            ef_search: HNSW candidate list size per query (hnsw index type)
+            normalize_embeddings: L2-normalize corpus and query vectors, so
+                relevance scores are cosine similarities; existing stores are
+                migrated on load
+            min_score: Default relevance cutoff for search results
+            load_model: Load the embedding model with an existing store;
+                otherwise it is left to load_embedding_model(), so the store
+                and index can be loaded before a server forks its workers
         """
         self.cache_dir = cache_dir
         self.model_name = model_name
+        self.index_type = index_type
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.normalize_embeddings = normalize_embeddings
+        self.min_score = min_score
+        self.load_model = load_model
         self.embedding_model = None
         self.index = None
         self.articles = {}
-        self.article_embeddings = {}
+        self.embeddings: Optional[np.ndarray] = None
+        self.chunk_table: Optional[ChunkTable] = None
+        self.store_dir = os.path.join(cache_dir, "corpus")
+        self.store_manifest: Dict = {}
+        # (base chunk table, base index, (delta segment, its ID-mapped index,
+        # selector hiding tombstoned base rows)), swapped as one tuple so
+        # searches never see a half-applied update or compaction
+        self._searchable: Optional[
+            Tuple[ChunkTable, faiss.Index, Tuple[DeltaSegment, faiss.Index, object]]
+        ] = None
+        self._update_lock = threading.Lock()
 
         # Create cache directory
         os.makedirs(cache_dir, exist_ok=True)
         os.makedirs(os.path.join(cache_dir, "articles"), exist_ok=True)
         os.makedirs(os.path.join(cache_dir, "embeddings"), exist_ok=True)
 
-        # Initialize Wikipedia API
-        self.wiki = wikipediaapi.Wikipedia(
-            language="en",
-            extract_format=wikipediaapi.ExtractFormat.WIKI,
-            user_agent="MisinfoDetector/1.0",
-        )
+        # Wikipedia (or WIKI_LOCAL_SOURCE) fetcher, resumable via a checkpoint
+        self.fetch_checkpoint = os.path.join(cache_dir, "fetch_checkpoint.jsonl")
+        self.fetcher = WikiFetcher(checkpoint_path=self.fetch_checkpoint)
 
         self._load_or_create_corpus()
 
     def _load_or_create_corpus(self):
         """Load existing corpus or create new one from FEVER dataset."""
-        cache_file = os.path.join(self.cache_dir, "corpus_cache.pkl")
+        store_dir = self.store_dir
+        legacy_cache_file = os.path.join(self.cache_dir, "corpus_cache.pkl")
+
+        if not store_exists(store_dir):
+            if os.path.exists(legacy_cache_file):
+                logger.info("Converting pickled FEVER corpus cache to corpus store...")
+                self._migrate_legacy_cache(legacy_cache_file, store_dir)
+            else:
+                logger.info("Creating new FEVER evidence corpus...")
+                self._create_corpus_from_fever()
+                # The store now holds everything the checkpoint was protecting
+                if os.path.exists(self.fetch_checkpoint):
+                    os.remove(self.fetch_checkpoint)
+
+        logger.info("Loading FEVER corpus store...")
+        self._load_corpus_store(store_dir)
+
+    def _load_corpus_store(self, store_dir: str):
+        """Load corpus from the memory-mapped corpus store."""
+        self.chunk_table, self.embeddings, manifest = load_store(store_dir)
+        self.articles = ChunkMapping(self.chunk_table)
+        self.store_manifest = manifest
+
+        if self.normalize_embeddings and not manifest.get("normalized", False):
+            self._normalize_store(store_dir)
+            return self._load_corpus_store(store_dir)
+
+        if manifest["model_name"] != self.model_name:
+            logger.warning(
+                f"Corpus store was embedded with {manifest['model_name']}, "
+                f"but {self.model_name} is configured"
+            )
+
+        if self.load_model:
+            self.load_embedding_model()
+        self._load_or_build_index()
+        self._load_delta()
+
+    def load_embedding_model(self) -> SentenceTransformer:
+        """Load the sentence transformer that embeds claims and new articles."""
+        if self.embedding_model is None:
+            self.embedding_model = SentenceTransformer(self.model_name)
+        return self.embedding_model
+
+    def _load_delta(self):
+        """Load the incremental-update segment kept next to the base store."""
+        loaded = load_delta(self.store_dir)
+        if loaded is None:
+            segment = DeltaSegment.empty(self.embeddings.shape[1])
+        else:
+            segment, manifest = loaded
+            if manifest.get("normalized", False) != self.normalized:
+                # Written before a normalization migration was interrupted
+                embeddings = np.array(segment.embeddings, dtype="float32")
+                faiss.normalize_L2(embeddings)
+                segment.embeddings = embeddings
+            logger.info(
+                f"Loaded corpus delta: {len(segment)} chunks added, "
+                f"{len(segment.tombstones)} base chunks removed"
+            )
+        self._set_delta(segment)
+
+    def _set_delta(self, segment: DeltaSegment):
+        """Index a delta segment and publish it to searches."""
+        self._publish(self.chunk_table, self.index, segment)
+
+    def _publish(
+        self, chunk_table: ChunkTable, index: faiss.Index, segment: DeltaSegment
+    ):
+        """Make a base table, its index and a delta segment searchable at once."""
+        delta_index = faiss.IndexIDMap2(faiss.IndexFlatIP(segment.embeddings.shape[1]))
+        if len(segment):
+            delta_index.add_with_ids(
+                np.ascontiguousarray(segment.embeddings, dtype="float32"),
+                segment.row_ids,
+            )
+        self._searchable = (
+            chunk_table,
+            index,
+            (segment, delta_index, id_selector_excluding(segment.tombstones)),
+        )
+
+    @property
+    def _delta(self) -> Optional[Tuple[DeltaSegment, faiss.Index, object]]:
+        return self._searchable[2] if self._searchable else None
+
+    def _load_or_build_index(self):
+        """Load the persisted FAISS index, rebuilding it only when stale."""
+        if self.embeddings is None or len(self.embeddings) == 0:
+            return
+
+        rows, dimension = self.embeddings.shape
+        build_params = resolve_build_params(self.index_type, rows, dimension)
+        expected_manifest = index_manifest(
+            self.store_manifest, self.index_type, build_params
+        )
+        self.index = load_index(self.store_dir, expected_manifest)
 
-        if os.path.exists(cache_file):
-            logger.info("Loading existing FEVER corpus cache...")
-            self._load_cached_corpus(cache_file)
+        if self.index is not None:
+            logger.info(
+                f"Loaded persisted FAISS index with {self.index.ntotal} vectors"
+            )
         else:
-            logger.info("Creating new FEVER evidence corpus...")
-            self._create_corpus_from_fever()
-            self._save_corpus_cache(cache_file)
+            self._build_faiss_index(build_params)
+            save_index(self.index, self.store_dir, expected_manifest)
 
-    def _load_cached_corpus(self, cache_file: str):
-        """Load corpus from cache."""
+        self.set_search_params(self.nprobe, self.ef_search)
+
+    def set_search_params(
+        self, nprobe: Optional[int] = None, ef_search: Optional[int] = None
+    ):
+        """
+        Tune recall against latency for approximate indexes at query time.
+
+        Args:
+            nprobe: IVF lists visited per query
+            ef_search: HNSW candidate list size per query
+        """
+        if nprobe is not None:
+            self.nprobe = nprobe
+        if ef_search is not None:
+            self.ef_search = ef_search
+        if self.index is not None:
+            set_search_params(self.index, nprobe=nprobe, ef_search=ef_search)
+
+    @property
+    def version(self) -> str:
+        """Identify the searchable contents; changes with every update or rebuild."""
+        checksum = self.store_manifest.get("checksum") or ""
+        if not self._searchable:
+            return checksum
+        chunk_table, _, (segment, _, _) = self._searchable
+        # Ids only grow, tombstones only accumulate and removals shrink the delta
+        next_id = segment.next_id(len(chunk_table))
+        return f"{checksum}+{next_id}.{len(segment)}.{len(segment.tombstones)}"
+
+    @property
+    def normalized(self) -> bool:
+        """Whether the loaded store holds unit-length vectors."""
+        return bool(self.store_manifest.get("normalized", False))
+
+    def _normalize_store(self, store_dir: str):
+        """Rewrite a store made before embeddings were normalized."""
+        logger.info("Normalizing corpus store embeddings for cosine similarity...")
+        # save_store replaces the whole directory, so keep the delta in memory
+        loaded = load_delta(store_dir)
+        embeddings = np.array(self.embeddings, dtype="float32")
+        faiss.normalize_L2(embeddings)
+        # The store checksum changes, so the persisted index is rebuilt too
+        save_store(
+            store_dir,
+            self.chunk_table,
+            embeddings,
+            self.store_manifest["model_name"],
+            normalized=True,
+        )
+        if loaded is not None:
+            delta = loaded[0]
+            delta.embeddings = np.array(delta.embeddings, dtype="float32")
+            faiss.normalize_L2(delta.embeddings)
+            save_delta(
+                store_dir, delta, self.store_manifest["model_name"], normalized=True
+            )
+
+    def _migrate_legacy_cache(self, cache_file: str, store_dir: str):
+        """Convert a corpus_cache.pkl from older versions into a corpus store."""
         with open(cache_file, "rb") as f:
             cached_data = pickle.load(f)
-            self.articles = cached_data["articles"]
-            self.article_embeddings = cached_data["embeddings"]
-
-        # Load embedding model and index
-        self.embedding_model = SentenceTransformer(self.model_name)
-        self._rebuild_index()
+        articles = cached_data["articles"]
+        article_embeddings = cached_data["embeddings"]
 
-    def _save_corpus_cache(self, cache_file: str):
-        """Save corpus to cache."""
-        cached_data = {"articles": self.articles, "embeddings": self.article_embeddings}
-        with open(cache_file, "wb") as f:
-            pickle.dump(cached_data, f)
+        row_ids = [aid for aid in articles if aid in article_embeddings]
+        table = ChunkTable.from_articles(articles, row_ids)
+        embeddings = np.array(
+            [article_embeddings[aid] for aid in row_ids], dtype="float32"
+        )
+        if self.normalize_embeddings:
+            faiss.normalize_L2(embeddings)
+        save_store(
+            store_dir,
+            table,
+            embeddings,
+            self.model_name,
+            normalized=self.normalize_embeddings,
+        )
+        logger.info(f"Converted {len(row_ids)} chunks; {cache_file} can be removed")
 
     def _create_corpus_from_fever(self):
-        """Create evidence corpus from FEVER dataset."""
+        """Create the evidence corpus store from the FEVER dataset."""
         logger.info("Loading FEVER dataset...")
 
         # Load FEVER dataset (streaming to handle large size)
@@ -88,47 +320,14 @@ class FEVEREvidenceCorpus:
         # Initialize embedding model
         self.embedding_model = SentenceTransformer(self.model_name)
 
-        # Extract unique Wikipedia articles from FEVER
-        unique_articles = set()
-
+        # Titles stream out of the splits while earlier ones are being fetched
         logger.info("Extracting unique Wikipedia articles from FEVER...")
-        # For streaming datasets, we need to iterate through the data differently
-        try:
-            # Try to get train split first
-            train_dataset = fever_dataset["train"]
-            for example in tqdm(train_dataset, desc="Processing train"):
-                if "evidence" in example and example["evidence"]:
-                    for evidence_item in example["evidence"]:
-                        if isinstance(evidence_item, list) and len(evidence_item) > 0:
-                            for evidence in evidence_item:
-                                if isinstance(evidence, dict) and "title" in evidence:
-                                    unique_articles.add(evidence["title"])
-        except Exception as e:
-            logger.warning(f"Could not process train split: {e}")
-
-        # Try other splits if available
-        for split_name in ["validation", "test", "dev"]:
-            try:
-                split_dataset = fever_dataset[split_name]
-                for example in tqdm(split_dataset, desc=f"Processing {split_name}"):
-                    if "evidence" in example and example["evidence"]:
-                        for evidence_item in example["evidence"]:
-                            if (
-                                isinstance(evidence_item, list)
-                                and len(evidence_item) > 0
-                            ):
-                                for evidence in evidence_item:
-                                    if (
-                                        isinstance(evidence, dict)
-                                        and "title" in evidence
-                                    ):
-                                        unique_articles.add(evidence["title"])
-            except Exception as e:
-                logger.warning(f"Could not process {split_name} split: {e}")
-
-        logger.info(f"Found {len(unique_articles)} unique Wikipedia articles")
-
-        if len(unique_articles) == 0:
+        titles = stream_fever_titles(
+            fever_dataset, max_titles=FEVER_MAX_ARTICLES or None
+        )
+        first_title = next(titles, None)
+
+        if first_title is None:
             logger.warning("No articles found, using sample articles for demo")
             # Use some sample articles for demo purposes
             sample_articles = [
@@ -143,44 +342,69 @@ class FEVEREvidenceCorpus:
             ]
             self._fetch_wikipedia_articles(sample_articles)
         else:
-            # Fetch Wikipedia articles
-            self._fetch_wikipedia_articles(
-                list(unique_articles)[:1000]
-            )  # Limit to first 1000 for demo
-
-        # Create embeddings
-        self._create_embeddings()
-
-    def _fetch_wikipedia_articles(self, article_titles: List[str]):
-        """Fetch Wikipedia articles by title."""
-        logger.info(f"Fetching {len(article_titles)} Wikipedia articles...")
+            self._fetch_wikipedia_articles(itertools.chain([first_title], titles))
 
-        for title in tqdm(article_titles, desc="Fetching articles"):
-            try:
-                # Try to get the page
-                page = self.wiki.page(title)
-
-                if page.exists():
-                    # Extract text content
-                    content = page.text
+    def _fetch_wikipedia_articles(self, article_titles: Iterable[str]):
+        """
+        Fetch Wikipedia articles by title, embed their chunks and write the store.
 
-                    # Split into chunks (Wikipedia articles can be very long)
-                    chunks = self._split_article_into_chunks(content, title)
+        Articles are fetched by a background producer into a bounded queue,
+        so downloading continues while a window of chunks is being embedded.
+        Chunk text and vectors are streamed into the store as they are
+        produced; only the current window is held in memory.
 
-                    for i, chunk in enumerate(chunks):
-                        chunk_id = f"{title}_{i}"
-                        self.articles[chunk_id] = {
-                            "title": title,
-                            "content": chunk,
-                            "chunk_id": i,
-                            "full_url": page.fullurl,
-                        }
+        Args:
+            article_titles: Titles to fetch; may be a lazy iterator
+        """
+        logger.info("Fetching Wikipedia articles...")
+        engine = EmbeddingEngine(self.embedding_model)
+        writer = StoreWriter(
+            self.store_dir,
+            engine.dimension,
+            self.model_name,
+            normalized=self.normalize_embeddings,
+        )
+        pending: List[str] = []
+        titles_written: Set[str] = set()
 
-            except Exception as e:
-                logger.warning(f"Error fetching article '{title}': {e}")
-                continue
+        def embed_pending():
+            vectors = np.empty((len(pending), engine.dimension), dtype="float32")
+            engine.encode_into(pending, vectors, normalize=self.normalize_embeddings)
+            writer.add_embeddings(vectors)
+            pending.clear()
 
-        logger.info(f"Successfully fetched {len(self.articles)} article chunks")
+        try:
+            for page in tqdm(
+                self.fetcher.fetch_in_background(article_titles),
+                desc="Fetching articles",
+            ):
+                title = page["title"]
+                # Different requested titles can resolve to the same page
+                if title in titles_written:
+                    continue
+                titles_written.add(title)
+
+                # Split into chunks (Wikipedia articles can be very long)
+                chunks = self._split_article_into_chunks(page["text"], title)
+                writer.add_article(title, page["url"], chunks)
+                pending.extend(chunks)
+
+                if len(pending) >= EMBED_WINDOW:
+                    embed_pending()
+
+            if pending:
+                embed_pending()
+            writer.finish()
+        except BaseException:
+            writer.abort()
+            raise
+        finally:
+            engine.close()
+
+        logger.info(
+            f"Successfully fetched {len(writer)} article chunks "
+            f"({self.fetcher.stats})"
+        )
 
     def _split_article_into_chunks(
         self, content: str, title: str, max_chunk_size: int = 1000
@@ -203,114 +427,339 @@ class FEVEREvidenceCorpus:
 
         return chunks if chunks else [content]
 
-    def _create_embeddings(self):
-        """Create embeddings for all article chunks."""
-        logger.info("Creating embeddings for article chunks...")
+    def add_articles(self, articles: List[Dict]) -> Dict:
+        """
+        Add or replace articles without rebuilding the corpus.
 
-        article_texts = list(self.articles.keys())
-        article_contents = [self.articles[aid]["content"] for aid in article_texts]
+        Only the chunks of the given articles are embedded. Chunks of an
+        article that is already in the corpus are hidden from search and the
+        new ones are added to the delta index; only the delta is written to
+        disk. `articles` keeps describing the base store until `compact()`.
 
-        # Create embeddings in batches
-        batch_size = 32
-        all_embeddings = []
+        Args:
+            articles: Dicts with title, text and url (as returned by the fetcher)
 
-        for i in tqdm(
-            range(0, len(article_contents), batch_size), desc="Creating embeddings"
-        ):
-            batch = article_contents[i : i + batch_size]
-            embeddings = self.embedding_model.encode(batch, show_progress_bar=False)
-            all_embeddings.extend(embeddings)
+        Returns:
+            Counts of added and replaced articles and of new chunks
+        """
+        chunks = []
+        for article in articles:
+            for i, chunk in enumerate(
+                self._split_article_into_chunks(article["text"], article["title"])
+            ):
+                chunks.append(
+                    {
+                        "title": article["title"],
+                        "content": chunk,
+                        "chunk_id": i,
+                        "full_url": article.get("url", ""),
+                    }
+                )
 
-        # Store embeddings
-        for aid, embedding in zip(article_texts, all_embeddings):
-            self.article_embeddings[aid] = embedding
+        # Updates are small, so encode in this process
+        embeddings = EmbeddingEngine(self.embedding_model, processes=0).encode(
+            [chunk["content"] for chunk in chunks], normalize=self.normalized
+        )
 
-        # Build FAISS index
-        self._build_faiss_index()
+        titles = [article["title"] for article in articles]
+        with self._update_lock:
+            replaced = self._apply_update(titles, chunks, embeddings)
+        logger.info(
+            f"Added {len(articles) - replaced} and replaced {replaced} articles "
+            f"({len(chunks)} chunks)"
+        )
+        return {
+            "added": len(articles) - replaced,
+            "replaced": replaced,
+            "chunks": len(chunks),
+        }
 
-    def _build_faiss_index(self):
-        """Build FAISS index for fast similarity search."""
-        logger.info("Building FAISS index...")
+    def remove_articles(self, titles: List[str]) -> Dict:
+        """
+        Remove articles from search results without rebuilding the corpus.
 
-        embeddings = np.array(list(self.article_embeddings.values())).astype("float32")
-        dimension = embeddings.shape[1]
+        Args:
+            titles: Titles of the articles to remove
 
-        # Create FAISS index
-        self.index = faiss.IndexFlatIP(dimension)  # Inner product for cosine similarity
-        self.index.add(embeddings)
+        Returns:
+            Count of articles that were in the corpus and are now removed
+        """
+        with self._update_lock:
+            removed = self._apply_update(titles, [], None)
+        logger.info(f"Removed {removed} articles")
+        return {"removed": removed}
 
-        logger.info(f"FAISS index built with {self.index.ntotal} vectors")
+    def refresh_article(self, title: str) -> Dict:
+        """
+        Refetch one article and re-embed it, or remove it if it no longer exists.
 
-    def _rebuild_index(self):
-        """Rebuild FAISS index from cached embeddings."""
-        if not self.article_embeddings:
-            return
+        Args:
+            title: Article title
 
-        embeddings = np.array(list(self.article_embeddings.values())).astype("float32")
-        dimension = embeddings.shape[1]
+        Returns:
+            The result of `add_articles` or `remove_articles`
+        """
+        article = self.fetcher.fetch_one(title)
+        if article is None:
+            return self.remove_articles([title])
+        return self.add_articles([article])
+
+    def _apply_update(
+        self, titles: List[str], chunks: List[Dict], embeddings: Optional[np.ndarray]
+    ) -> int:
+        """
+        Replace the chunks of `titles` with `chunks` and persist the delta.
 
-        self.index = faiss.IndexFlatIP(dimension)
-        self.index.add(embeddings)
+        Must be called with the update lock held.
 
-    def search_evidence(self, claim: str, top_k: int = 5) -> List[Dict]:
+        Returns:
+            How many of `titles` had live chunks before the update
+        """
+        segment = self._delta[0]
+        base_rows = self.chunk_table.rows_for_titles(titles)
+        live_base = np.setdiff1d(base_rows, segment.tombstones)
+        existing = {self.chunk_table.row(i)["title"] for i in live_base}
+        existing.update(
+            segment.table.row(i)["title"] for i in segment.table.rows_for_titles(titles)
+        )
+
+        if embeddings is None:
+            embeddings = np.empty((0, self.embeddings.shape[1]), dtype="float32")
+        updated = segment.replace(
+            titles,
+            base_rows,
+            chunks,
+            embeddings,
+            segment.next_id(len(self.chunk_table)),
+        )
+        save_delta(
+            self.store_dir,
+            updated,
+            self.store_manifest["model_name"],
+            normalized=self.normalized,
+        )
+        self._set_delta(updated)
+        return len(existing)
+
+    def compact(self):
+        """Fold the delta into the base store and rebuild the index."""
+        with self._update_lock:
+            segment = self._delta[0]
+            if not len(segment) and not len(segment.tombstones):
+                return
+
+            logger.info("Compacting corpus delta into the base store...")
+            live = np.setdiff1d(
+                np.arange(len(self.chunk_table), dtype=np.int64), segment.tombstones
+            )
+            articles = {}
+            for i in live:
+                articles[self.chunk_table.chunk_id(i)] = self.chunk_table.article(i)
+            for i in range(len(segment)):
+                articles[segment.table.chunk_id(i)] = segment.table.article(i)
+            embeddings = np.concatenate(
+                [self.embeddings[live], np.asarray(segment.embeddings)]
+            ).astype("float32")
+            empty_delta = DeltaSegment.empty(embeddings.shape[1])
+            del segment
+
+            # Build the compacted base and its index aside, then switch
+            # searches over to them (and an empty delta) in one step
+            chunk_table = ChunkTable.from_articles(articles)
+            build_params = resolve_build_params(self.index_type, *embeddings.shape)
+            index = build_index(embeddings, self.index_type, build_params)
+            set_search_params(index, nprobe=self.nprobe, ef_search=self.ef_search)
+            self._publish(chunk_table, index, empty_delta)
+
+            # Drop the last references to the old memory-mapped files, so the
+            # store directory can be replaced (Windows won't delete mapped files)
+            self.chunk_table, self.embeddings, self.index = (
+                chunk_table,
+                embeddings,
+                index,
+            )
+            self.articles = ChunkMapping(chunk_table)
+
+            # Replaces the directory, delta included
+            self.store_manifest = save_store(
+                self.store_dir,
+                chunk_table,
+                embeddings,
+                self.store_manifest["model_name"],
+                normalized=self.normalized,
+            )
+            save_index(
+                index,
+                self.store_dir,
+                index_manifest(self.store_manifest, self.index_type, build_params),
+            )
+
+            # Serve from the new memory-mapped files instead of the copy in RAM
+            self.chunk_table, self.embeddings, _ = load_store(self.store_dir)
+            self.articles = ChunkMapping(self.chunk_table)
+            self._publish(self.chunk_table, index, empty_delta)
+            logger.info(f"Compacted corpus to {len(self.chunk_table)} chunks")
+
+    def _build_faiss_index(self, build_params: Optional[Dict] = None):
+        """Build FAISS index for fast similarity search."""
+        logger.info(f"Building {self.index_type} FAISS index...")
+
+        # Inner product for cosine similarity
+        self.index = build_index(self.embeddings, self.index_type, build_params)
+
+        logger.info(f"FAISS index built with {self.index.ntotal} vectors")
+
+    def search_evidence(
+        self, claim: str, top_k: int = 5, min_score: Optional[float] = None
+    ) -> List[Dict]:
         """
         Search for evidence related to a claim.
 
         Args:
             claim: The claim to find evidence for
             top_k: Number of top results to return
+            min_score: Drop results scoring below this (defaults to the corpus setting)
 
         Returns:
             List of evidence documents with relevance scores
         """
-        if not self.index or not self.embedding_model:
-            logger.error("Corpus not properly initialized")
-            return []
+        return self.search_evidence_batch([claim], top_k=top_k, min_score=min_score)[0]
+
+    def encode_claims(self, claims: List[str]) -> np.ndarray:
+        """
+        Embed claims the way the corpus was embedded, in one pass.
+
+        Args:
+            claims: Claim texts
+
+        Returns:
+            (len(claims), dimension) float32 matrix
+        """
+        claim_embeddings = self.embedding_model.encode(
+            claims,
+            batch_size=max(1, len(claims)),
+            show_progress_bar=False,
+            normalize_embeddings=self.normalized,
+        )
+        return np.asarray(claim_embeddings, dtype="float32")
+
+    def search_evidence_batch(
+        self,
+        claims: List[str],
+        top_k: int = 5,
+        min_score: Optional[float] = None,
+        claim_embeddings: Optional[np.ndarray] = None,
+    ) -> List[List[Dict]]:
+        """
+        Search for evidence for several claims with one encode and one index search.
 
-        # Encode the claim
-        claim_embedding = self.embedding_model.encode([claim])
+        Args:
+            claims: The claims to find evidence for
+            top_k: Number of top results to return per claim
+            min_score: Drop results scoring below this (defaults to the corpus setting)
+            claim_embeddings: Embeddings from `encode_claims`, if already computed
 
-        # Search the index
-        scores, indices = self.index.search(claim_embedding, top_k)
+        Returns:
+            One list of evidence documents per claim, in the order of `claims`
+        """
+        searchable = self._searchable
+        if not searchable or not searchable[1] or not self.embedding_model:
+            logger.error("Corpus not properly initialized")
+            return [[] for _ in claims]
+        # One consistent view even if an update or compaction lands meanwhile
+        chunk_table, index, (segment, delta_index, tombstones) = searchable
 
-        # Get article IDs
-        article_ids = list(self.articles.keys())
+        if not claims:
+            return []
 
-        results = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx < len(article_ids):
-                article_id = article_ids[idx]
-                article = self.articles[article_id]
+        # Encode all claims in one pass
+        if claim_embeddings is None:
+            claim_embeddings = self.encode_claims(claims)
+        claim_embeddings = np.ascontiguousarray(claim_embeddings, dtype="float32")
+
+        if min_score is None:
+            min_score = self.min_score
+
+        # Search the base index for every claim at once, hiding removed rows
+        if tombstones is not None:
+            scores, indices = index.search(
+                claim_embeddings,
+                top_k,
+                params=search_params_excluding(index, tombstones),
+            )
+        else:
+            scores, indices = index.search(claim_embeddings, top_k)
+
+        # Merge in chunks added since the base store was written
+        if delta_index.ntotal:
+            delta_scores, delta_indices = delta_index.search(claim_embeddings, top_k)
+            scores = np.concatenate([scores, delta_scores], axis=1)
+            indices = np.concatenate([indices, delta_indices], axis=1)
+            # FAISS pads missing results with -1 ids and -inf/-max scores
+            order = np.argsort(-scores, axis=1, kind="stable")[:, :top_k]
+            scores = np.take_along_axis(scores, order, axis=1)
+            indices = np.take_along_axis(indices, order, axis=1)
+
+        num_rows = len(chunk_table)
+        batch_results = []
+        for claim_scores, claim_indices in zip(scores, indices):
+            results = []
+            for score, idx in zip(claim_scores, claim_indices):
+                # Scores come back in descending order
+                if min_score is not None and score < min_score:
+                    break
+                if 0 <= idx < num_rows:
+                    table, position = chunk_table, idx
+                elif idx >= num_rows:
+                    table, position = segment.table, segment.position(idx)
+                else:
+                    continue  # -1 padding when fewer than top_k vectors exist
+                row = table.row(position)
 
                 results.append(
                     {
-                        "article_id": article_id,
-                        "title": article["title"],
-                        "content": article["content"],
+                        "article_id": row["article_id"],
+                        "title": row["title"],
+                        "content": table.text(position),
                         "relevance_score": float(score),
-                        "url": article.get("full_url", ""),
-                        "chunk_id": article["chunk_id"],
+                        "url": row["url"],
+                        "chunk_id": row["chunk_id"],
                     }
                 )
+            batch_results.append(results)
 
-        return results
+        return batch_results
 
     def get_article_by_title(self, title: str) -> Optional[Dict]:
         """Get a specific article by title."""
-        for article_id, article in self.articles.items():
-            if article["title"] == title:
-                return article
-        return None
+        # Chunk ids are "<title>_<chunk number>", so this is the first chunk
+        chunk_id = f"{title}_0"
+        if self._searchable is None:
+            return None
+        chunk_table, _, (segment, _, _) = self._searchable
+        row = segment.table.find(chunk_id)
+        if row is not None:
+            return segment.table.article(row)
+        base_row = chunk_table.find(chunk_id)
+        if base_row is None or base_row in segment.tombstones:
+            return None
+        return chunk_table.article(base_row)
 
     def get_corpus_stats(self) -> Dict:
         """Get statistics about the corpus."""
+        if self._searchable is None:
+            chunk_table, index, segment = None, None, None
+        else:
+            chunk_table, index, (segment, _, _) = self._searchable
         return {
-            "total_articles": len(
-                set(article["title"] for article in self.articles.values())
-            ),
-            "total_chunks": len(self.articles),
-            "total_embeddings": len(self.article_embeddings),
-            "index_size": self.index.ntotal if self.index else 0,
+            "total_articles": chunk_table.num_articles if chunk_table else 0,
+            "total_chunks": len(chunk_table) if chunk_table else 0,
+            # Row-aligned with the chunk table
+            "total_embeddings": len(chunk_table) if chunk_table else 0,
+            "index_size": index.ntotal if index else 0,
+            "normalized": self.normalized,
+            "delta_chunks": len(segment) if segment else 0,
+            "removed_chunks": len(segment.tombstones) if segment else 0,
         }
 
 
@@ -318,9 +767,9 @@ class FEVEREvidenceCorpus:
 fever_corpus = None
 
 
-def get_fever_corpus() -> FEVEREvidenceCorpus:
+def get_fever_corpus(load_model: bool = True) -> FEVEREvidenceCorpus:
     """Get or create global FEVER corpus instance."""
     global fever_corpus
     if fever_corpus is None:
-        fever_corpus = FEVEREvidenceCorpus()
+        fever_corpus = FEVEREvidenceCorpus(load_model=load_model)
     return fever_corpus
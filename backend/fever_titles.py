@@ -0,0 +1,143 @@
+"""
+Streaming extraction of evidence article titles from the FEVER dataset.
+
+Each split is read by its own worker thread and titles flow through a bounded
+queue, deduplicated as they arrive. Fetching can start on the first title
+instead of after a full pass over every split, and memory stays bounded by
+the queue size and the number of distinct titles kept.
+"""
+
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+FEVER_TITLE_WORKERS = int(os.getenv("FEVER_TITLE_WORKERS", "4"))
+FEVER_TITLE_QUEUE_SIZE = int(os.getenv("FEVER_TITLE_QUEUE_SIZE", "10000"))
+
+# FEVER page ids escape brackets and colons the way the Penn Treebank does
+_PAGE_ID_ESCAPES = {
+    "-LRB-": "(",
+    "-RRB-": ")",
+    "-LSB-": "[",
+    "-RSB-": "]",
+    "-LCB-": "{",
+    "-RCB-": "}",
+    "-COLON-": ":",
+}
+
+_SPLIT_DONE = object()
+
+
+def page_id_to_title(page_id: str) -> str:
+    """Turn a FEVER page id such as `Nikolaj_Coster-Waldau` into a title."""
+    for escaped, char in _PAGE_ID_ESCAPES.items():
+        page_id = page_id.replace(escaped, char)
+    return page_id.replace("_", " ")
+
+
+def evidence_titles(example: Dict) -> Iterator[str]:
+    """
+    Yield the evidence article titles referenced by one FEVER example.
+
+    Handles the flat Hugging Face layout (one row per evidence sentence with
+    `evidence_wiki_url`) as well as nested `evidence` lists of dicts.
+    """
+    page_id = example.get("evidence_wiki_url")
+    if page_id:
+        yield page_id_to_title(page_id)
+
+    for evidence_set in example.get("evidence") or []:
+        if not isinstance(evidence_set, list):
+            continue
+        for evidence in evidence_set:
+            if isinstance(evidence, dict) and evidence.get("title"):
+                yield evidence["title"]
+
+
+def stream_fever_titles(
+    dataset,
+    splits: Optional[Iterable[str]] = None,
+    workers: int = FEVER_TITLE_WORKERS,
+    max_titles: Optional[int] = None,
+    queue_size: int = FEVER_TITLE_QUEUE_SIZE,
+) -> Iterator[str]:
+    """
+    Yield unique evidence titles from FEVER splits as they are found.
+
+    Splits are read concurrently. Stopping early (by reaching `max_titles` or
+    by closing the generator) stops the readers too.
+
+    Args:
+        dataset: Dataset dict of (streaming) splits, as returned by load_dataset
+        splits: Split names to read; defaults to every split in `dataset`
+        workers: Splits read at the same time
+        max_titles: Stop after this many unique titles (None = no cap)
+        queue_size: Titles buffered between the readers and the consumer
+
+    Yields:
+        Article titles, each one once
+    """
+    splits = list(splits if splits is not None else dataset.keys())
+    if not splits:
+        return
+
+    titles: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        # Give up once the consumer is gone instead of blocking forever
+        while not stop.is_set():
+            try:
+                titles.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read_split(name: str):
+        examples = 0
+        try:
+            previous = None
+            for example in dataset[name]:
+                examples += 1
+                for title in evidence_titles(example):
+                    # Consecutive rows usually cite the same page
+                    if title != previous and not put(title):
+                        return
+                    previous = title
+            logger.info(f"Processed {examples} examples from {name} split")
+        except Exception as e:
+            logger.warning(f"Could not process {name} split: {e}")
+        finally:
+            put(_SPLIT_DONE)
+
+    pool = ThreadPoolExecutor(
+        max_workers=max(1, min(workers, len(splits))),
+        thread_name_prefix="fever-titles",
+    )
+    seen = set()
+    try:
+        for name in splits:
+            pool.submit(read_split, name)
+
+        remaining = len(splits)
+        while remaining:
+            title = titles.get()
+            if title is _SPLIT_DONE:
+                remaining -= 1
+                continue
+            if title in seen:
+                continue
+            seen.add(title)
+            yield title
+            if max_titles and len(seen) >= max_titles:
+                break
+    finally:
+        stop.set()
+        pool.shutdown(wait=False)
+        logger.info(f"Found {len(seen)} unique evidence titles")
@@ -10,6 +10,13 @@ from transformers import (
     TrainingArguments,
 )
 from fever_evidence_corpus import FEVEREvidenceCorpus
+from corpus_index import (
+    FEVER_INDEX_EF_SEARCH,
+    FEVER_INDEX_NPROBE,
+    FEVER_INDEX_TYPE,
+    build_index,
+    set_search_params,
+)
 
 # Advanced: Load FEVER evidence corpus
 fever_corpus = FEVEREvidenceCorpus()
@@ -19,9 +26,9 @@ corpus = [v["content"] for v in fever_corpus.articles.values()]
 embedder = SentenceTransformer("all-MiniLM-L6-v2")
 corpus_embeddings = embedder.encode(corpus, convert_to_numpy=True)
 
-# Create FAISS index
-index = faiss.IndexFlatL2(corpus_embeddings.shape[1])
-index.add(corpus_embeddings)
+# Create FAISS index (exact unless FEVER_INDEX_TYPE selects an approximate one)
+index = build_index(corpus_embeddings, FEVER_INDEX_TYPE, metric=faiss.METRIC_L2)
+set_search_params(index, nprobe=FEVER_INDEX_NPROBE, ef_search=FEVER_INDEX_EF_SEARCH)
 
 # 1. Load and prepare the LIAR dataset
 # Download the train.tsv, test.tsv, valid.tsv from the LIAR dataset website
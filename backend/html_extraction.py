@@ -0,0 +1,160 @@
+"""
+Article text extraction from HTML pages.
+
+Two engines produce the same output shape (headline, newline, paragraph text):
+
+    lxml    libxml2 parser with compiled XPath; drops scripts, navigation,
+            comments, share widgets and similar boilerplate, and prefers the
+            <article>/<main> container when the page has one (default)
+    bs4     BeautifulSoup with html.parser, every <p> on the page (the
+            original behavior)
+
+The engine is chosen with HTML_EXTRACTOR. When lxml is not installed, fails
+on a page or finds no paragraphs, the bs4 engine is used instead.
+"""
+
+import logging
+import os
+import re
+import threading
+from typing import Callable, Dict
+
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:  # optional fast path
+    etree = None
+    lxml_html = None
+
+logger = logging.getLogger(__name__)
+
+HTML_EXTRACTOR = os.getenv("HTML_EXTRACTOR", "lxml")
+
+# Elements that never hold article text
+BOILERPLATE_TAGS = (
+    "script",
+    "style",
+    "noscript",
+    "template",
+    "nav",
+    "aside",
+    "footer",
+    "form",
+    "iframe",
+    "svg",
+    "button",
+)
+# class/id fragments of widgets that sit inside article containers
+BOILERPLATE_PATTERN = (
+    r"comment|share|social|related|recommend|promo|newsletter|subscribe"
+    r"|advert|\bads?\b|sponsor|cookie|consent|sidebar|breadcrumb|byline-share"
+    r"|paywall|popup|modal|outbrain|taboola"
+)
+
+# Declared charset; libxml2 would otherwise read undeclared UTF-8 as Latin-1
+_CHARSET = re.compile(
+    rb"""<meta[^>]+charset=["']?([\w-]+)|<\?xml[^>]+encoding=["']([\w-]+)""",
+    re.IGNORECASE,
+)
+
+if etree is not None:
+    _REGEX_NS = {"re": "http://exslt.org/regular-expressions"}
+    _FIRST_H1 = etree.XPath("(//h1)[1]")
+    _BOILERPLATE = etree.XPath(
+        " | ".join(f"//{tag}" for tag in BOILERPLATE_TAGS)
+        # Never the page or article itself, whatever its class says
+        + " | //*[not(self::html or self::body or self::article or self::main)]"
+        + "[re:test(@class, $pattern, 'i') or re:test(@id, $pattern, 'i')]"
+        + " | //*[@role='navigation' or @role='complementary' or @aria-hidden='true']",
+        namespaces=_REGEX_NS,
+    )
+    _CONTAINERS = etree.XPath("//article | //main | //*[@role='main']")
+    _PARAGRAPHS = etree.XPath(".//p")
+
+
+def extract_bs4(html: bytes) -> str:
+    """Get the headline and every paragraph with BeautifulSoup's html.parser."""
+    soup = BeautifulSoup(html, "html.parser")
+    # Try to get the headline
+    headline = soup.find("h1")
+    headline_text = headline.get_text() if headline else ""
+    # Get all paragraph texts and join them
+    paragraphs = soup.find_all("p")
+    body_text = " ".join([p.get_text() for p in paragraphs])
+    return headline_text + "\n" + body_text
+
+
+# lxml parsers hold per-parse state, so each thread keeps its own
+_parsers = threading.local()
+
+
+def _html_parser(encoding: str):
+    """This thread's lxml parser for an encoding."""
+    by_encoding = getattr(_parsers, "by_encoding", None)
+    if by_encoding is None:
+        by_encoding = _parsers.by_encoding = {}
+    parser = by_encoding.get(encoding)
+    if parser is None:
+        parser = by_encoding[encoding] = lxml_html.HTMLParser(encoding=encoding)
+    return parser
+
+
+def extract_lxml(html: bytes) -> str:
+    """Get the headline and article paragraphs with lxml, skipping boilerplate."""
+    if not html or not html.strip():
+        return "\n"
+    declared = _CHARSET.search(html[:4096])
+    encoding = (
+        (declared.group(1) or declared.group(2)).decode() if declared else "utf-8"
+    )
+    tree = lxml_html.document_fromstring(html, parser=_html_parser(encoding.lower()))
+
+    # Headlines often sit in <header>, so take it before anything is dropped
+    headline = _FIRST_H1(tree)
+    headline_text = headline[0].text_content() if headline else ""
+
+    for element in _BOILERPLATE(tree, pattern=BOILERPLATE_PATTERN):
+        # Skip elements already removed with an ancestor
+        if element.getparent() is not None:
+            element.drop_tree()
+
+    # Prefer the container holding the most paragraphs, if there is one
+    root = tree
+    best = 0
+    for container in _CONTAINERS(tree):
+        count = len(_PARAGRAPHS(container))
+        if count > best:
+            root, best = container, count
+
+    body_text = " ".join(p.text_content() for p in _PARAGRAPHS(root))
+    return headline_text + "\n" + body_text
+
+
+EXTRACTORS: Dict[str, Callable[[bytes], str]] = {"bs4": extract_bs4}
+if lxml_html is not None:
+    EXTRACTORS["lxml"] = extract_lxml
+
+
+def extract_text_from_html(html: bytes, engine: str = HTML_EXTRACTOR) -> str:
+    """
+    Get the headline and paragraph text of an HTML page.
+
+    Args:
+        html: Raw page bytes
+        engine: Extractor name from EXTRACTORS; falls back to bs4
+
+    Returns:
+        Headline, a newline, then the paragraph text joined by spaces
+    """
+    extractor = EXTRACTORS.get(engine, extract_bs4)
+    if extractor is not extract_bs4:
+        try:
+            text = extractor(html)
+            # No paragraphs usually means the page layout fooled the fast path
+            if text.partition("\n")[2].strip():
+                return text
+        except (ValueError, LookupError, etree.ParserError) as e:
+            logger.debug(f"{engine} extraction failed, using bs4: {e}")
+    return extract_bs4(html)
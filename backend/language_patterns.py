@@ -0,0 +1,242 @@
+"""
+Precompiled lexicon matcher for language pattern analysis.
+
+Every phrase of every category is compiled into one case-insensitive regex
+with word boundaries, so a text is scanned once however many phrases there
+are, and "elite" no longer matches inside "delete". A phrase still matches
+with one of the common inflectional endings in INFLECTIONS on its last word
+("elites", "corruption", "shockingly"), as the substring check it replaced
+did, but no longer in the middle of an unrelated word. Whitespace inside a
+phrase matches any run of whitespace and straight and curly apostrophes
+match each other. Each phrase has its own named group, so a hit maps back to
+its lexicon entry whatever case folding the regex applied to match it.
+
+The lexicons default to DEFAULT_LEXICONS. LANGUAGE_LEXICONS_PATH may point to
+a JSON file of {"category": ["phrase", ...]}; it is reloaded whenever its
+mtime changes, in each process that uses the matcher. A file that isn't in
+that shape is rejected and the previous lexicons stay in use.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+LANGUAGE_LEXICONS_PATH = os.getenv("LANGUAGE_LEXICONS_PATH", "")
+
+DEFAULT_LEXICONS: Dict[str, List[str]] = {
+    "emotional_language": [
+        "shocking",
+        "outrageous",
+        "terrifying",
+        "amazing",
+        "incredible",
+        "unbelievable",
+        "scandalous",
+        "corrupt",
+        "evil",
+        "heroic",
+    ],
+    "certainty_indicators": [
+        "definitely",
+        "absolutely",
+        "certainly",
+        "without doubt",
+        "proven",
+        "scientific fact",
+        "undeniable",
+        "irrefutable",
+    ],
+    "urgency_indicators": [
+        "urgent",
+        "breaking",
+        "just in",
+        "exclusive",
+        "you won't believe",
+        "act now",
+        "limited time",
+        "don't miss",
+    ],
+    "conspiracy_indicators": [
+        "they don't want you to know",
+        "mainstream media",
+        "establishment",
+        "cover up",
+        "hidden truth",
+        "secret agenda",
+        "elite",
+        "deep state",
+    ],
+}
+
+_APOSTROPHES = "'’"
+# Endings allowed after a phrase's last word; a match counts as its phrase
+INFLECTIONS = ("s", "es", "d", "ed", "ing", "ly", "ion", "ions", "ness")
+
+
+def _canonical(phrase: str) -> str:
+    """Lowercase, single-spaced, straight-apostrophe form of a phrase."""
+    return " ".join(phrase.lower().replace("’", "'").split())
+
+
+def _phrase_pattern(phrase: str) -> str:
+    words = []
+    for word in phrase.split(" "):
+        words.append(
+            f"[{_APOSTROPHES}]".join(re.escape(part) for part in word.split("'"))
+        )
+    return r"\s+".join(words)
+
+
+def _validate(lexicons: Dict[str, List[str]]):
+    """Raise ValueError unless lexicons map category names to lists of phrases."""
+    if not isinstance(lexicons, dict):
+        raise ValueError("Lexicons must map category names to lists of phrases")
+    for category, phrases in lexicons.items():
+        # A bare string would be taken apart into one-letter phrases
+        if not isinstance(phrases, list) or not all(
+            isinstance(phrase, str) for phrase in phrases
+        ):
+            raise ValueError(f"Lexicon {category!r} must be a list of strings")
+
+
+class LanguagePatternMatcher:
+    def __init__(self, lexicons: Optional[Dict[str, List[str]]] = None):
+        """
+        Compile the lexicons.
+
+        Args:
+            lexicons: Category name -> phrases; defaults to DEFAULT_LEXICONS
+        """
+        self._path_mtime: Optional[float] = None
+        self._lock = threading.Lock()
+        self.load(lexicons or DEFAULT_LEXICONS)
+
+    def load(self, lexicons: Dict[str, List[str]]):
+        """
+        Replace the lexicons. Matching threads see the old or the new set.
+
+        Args:
+            lexicons: Category name -> phrases
+
+        Raises:
+            ValueError: If the lexicons are not category -> list of strings
+        """
+        _validate(lexicons)
+        owners: Dict[str, List[str]] = {}
+        for category, phrases in lexicons.items():
+            for phrase in phrases:
+                canonical = _canonical(phrase)
+                if canonical and category not in owners.setdefault(canonical, []):
+                    owners[canonical].append(category)
+
+        # Longest first so "cover up" wins over a shorter phrase at the same spot
+        alternatives = sorted(owners, key=len, reverse=True)
+        # Group name -> phrase; lowercasing the matched text again would not
+        # always give the phrase back ("İ" lowercases to two characters)
+        groups = {f"p{i}": phrase for i, phrase in enumerate(alternatives)}
+        if alternatives:
+            pattern = re.compile(
+                r"(?<!\w)(?:"
+                + "|".join(
+                    f"(?P<{name}>{_phrase_pattern(phrase)})"
+                    for name, phrase in groups.items()
+                )
+                + r")(?:"
+                + "|".join(INFLECTIONS)
+                + r")?(?!\w)",
+                re.IGNORECASE,
+            )
+        else:
+            pattern = None
+        # One attribute swap, so concurrent match() calls never see a mix
+        self._compiled = (pattern, groups, owners, tuple(lexicons))
+
+    @property
+    def categories(self) -> tuple:
+        return self._compiled[3]
+
+    def reload_if_changed(self, path: str = LANGUAGE_LEXICONS_PATH) -> bool:
+        """
+        Reload the lexicons from a JSON file if it changed since the last load.
+
+        Args:
+            path: Lexicon file; nothing happens when empty
+
+        Returns:
+            Whether new lexicons were loaded
+        """
+        if not path:
+            return False
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError as e:
+            logger.warning(f"Cannot read lexicons from {path}: {e}")
+            return False
+        if mtime == self._path_mtime:
+            return False
+
+        with self._lock:
+            if mtime == self._path_mtime:
+                return False
+            try:
+                with open(path, encoding="utf-8") as f:
+                    lexicons = json.load(f)
+                self.load(lexicons)
+            except (OSError, ValueError) as e:
+                # Keep matching with the previous lexicons
+                logger.error(f"Invalid lexicon file {path}: {e}")
+                return False
+            finally:
+                self._path_mtime = mtime
+        logger.info(f"Loaded language lexicons from {path}")
+        return True
+
+    def match(self, text: str) -> Dict:
+        """
+        Find every lexicon phrase in a text in one pass.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            {"counts": category -> number of distinct phrases found,
+             "matches": [{"category", "phrase", "start", "end"}, ...]}
+        """
+        pattern, groups, owners, categories = self._compiled
+        found = {category: set() for category in categories}
+        matches = []
+        if pattern is not None:
+            for m in pattern.finditer(text):
+                phrase = groups[m.lastgroup]
+                for category in owners[phrase]:
+                    found[category].add(phrase)
+                    matches.append(
+                        {
+                            "category": category,
+                            "phrase": phrase,
+                            "start": m.start(),
+                            "end": m.end(),
+                        }
+                    )
+        return {
+            "counts": {category: len(found[category]) for category in categories},
+            "matches": matches,
+        }
+
+
+# Global instance
+language_matcher: Optional[LanguagePatternMatcher] = None
+
+
+def get_language_matcher() -> LanguagePatternMatcher:
+    """Get or create the global matcher, picking up lexicon file changes."""
+    global language_matcher
+    if language_matcher is None:
+        language_matcher = LanguagePatternMatcher()
+    language_matcher.reload_if_changed()
+    return language_matcher
@@ -1,20 +1,45 @@
-from fastapi import FastAPI, HTTPException, Depends, Header, Request
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-import requests
-from bs4 import BeautifulSoup
 from transformers.pipelines import pipeline
 import os
 from dotenv import load_dotenv
-from fact_check_api import check_claim_with_google
-from fever_evidence_corpus import get_fever_corpus
+from fact_check_api import get_fact_check_client
+from url_ingest import get_url_ingester
+from language_patterns import get_language_matcher
+from evidence_stance import (
+    REFUTES,
+    STANCE_COLUMNS,
+    STANCE_LATENCY_BUDGET_MS,
+    STANCE_NAMES,
+    SUPPORTS,
+    get_stance_scorer,
+)
+from fever_evidence_corpus import FEVER_CACHE_DIR, get_fever_corpus
+from corpus_store import store_exists
+from executor import get_execution_layer
+from batching import MicroBatcher
+from claim_cache import SemanticClaimCache
+from result_cache import ResultCache, create_shared_backend, directory_fingerprint
+from rate_limiter import get_rate_limiter, per_minute_and_day
+from admission import Overloaded, get_tier_scheduler
+from model_registry import ModelRegistry, NotReady
+from prefork import (
+    PRELOAD_MODELS,
+    freeze_for_fork,
+    process_memory,
+    single_threaded_loading,
+)
 import logging
+import math
 import re
-from typing import List, Dict, Any, Optional
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta, timezone
+import asyncio
+import contextlib
 import time
-from collections import defaultdict
 import secrets
 # from db import AsyncSessionLocal  # Removed for demo mode
 
@@ -42,15 +67,39 @@ API_KEYS = {
     "enterprise_key": {"tier": "enterprise", "rate_limit": 1000, "daily_limit": 100000},
 }
 
-# Rate limiting storage
-request_counts = defaultdict(
-    lambda: {
-        "count": 0,
-        "last_reset": time.time(),
-        "daily_count": 0,
-        "daily_reset": time.time(),
-    }
-)
+# Per-tier limits for /analyze - generous for demo mode
+TIER_LIMITS = {
+    "demo": {"per_minute": 100, "per_day": 10000},
+    "free": {"per_minute": 10, "per_day": 100},
+    "basic": {"per_minute": 50, "per_day": 1000},
+    "pro": {"per_minute": 200, "per_day": 10000},
+    "enterprise": {"per_minute": 1000, "per_day": 100000},
+}
+
+# Rate limiting shared across workers through RATE_LIMIT_URL
+rate_limiter = get_rate_limiter()
+API_KEY_RULES = {
+    api_key: per_minute_and_day(info["rate_limit"], info["daily_limit"])
+    for api_key, info in API_KEYS.items()
+}
+TIER_RULES = {
+    tier: per_minute_and_day(limits["per_minute"], limits["per_day"])
+    for tier, limits in TIER_LIMITS.items()
+}
+
+
+def raise_if_limited(decision: Dict[str, Any], detail: str):
+    """Turn a denied rate limit decision into a 429 with Retry-After."""
+    if decision["allowed"]:
+        return
+    if decision["limited_by"] == "day":
+        detail = "Daily limit exceeded"
+    raise HTTPException(
+        status_code=429,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(decision["retry_after"])))},
+    )
+
 
 # Security
 security = HTTPBearer()
@@ -66,45 +115,237 @@ def verify_api_key(credentials: HTTPAuthorizationCredentials = Depends(security)
 
     # Check rate limits
     key_info = API_KEYS[api_key]
-    current_time = time.time()
+    decision = rate_limiter.hit(api_key, API_KEY_RULES[api_key])
+    raise_if_limited(decision, "Rate limit exceeded")
 
-    # Reset counters if needed
-    if current_time - request_counts[api_key]["last_reset"] > 60:  # 1 minute window
-        request_counts[api_key]["count"] = 0
-        request_counts[api_key]["last_reset"] = current_time
+    return {"api_key": api_key, "tier": key_info["tier"]}
 
-    if current_time - request_counts[api_key]["daily_reset"] > 86400:  # 24 hours
-        request_counts[api_key]["daily_count"] = 0
-        request_counts[api_key]["daily_reset"] = current_time
 
-    # Check rate limits
-    if request_counts[api_key]["count"] >= key_info["rate_limit"]:
-        raise HTTPException(status_code=429, detail="Rate limit exceeded")
+# --- Load your models and tools ONCE, in the background after startup ---
+# Option A: Your fine-tuned model (uncomment after training)
+model_dir = os.path.abspath("./my_misinformation_model")
+# Option B: An off-the-shelf claim extraction model
+CLAIM_EXTRACTOR_MODEL = "distilbert-base-cased-distilled-squad"
+# "onnx" serves both models through ONNX Runtime (see onnx_models.py)
+CLAIM_MODEL_BACKEND = os.getenv("CLAIM_MODEL_BACKEND", "torch")
+CLAIM_MODEL_QUANTIZE = os.getenv("CLAIM_MODEL_QUANTIZE", "true").lower() == "true"
+CLAIM_MODEL_VERSION = CLAIM_MODEL_BACKEND + (
+    ":int8" if CLAIM_MODEL_BACKEND == "onnx" and CLAIM_MODEL_QUANTIZE else ""
+)
 
-    if request_counts[api_key]["daily_count"] >= key_info["daily_limit"]:
-        raise HTTPException(status_code=429, detail="Daily limit exceeded")
+# NLI (or keyword) stance of retrieved evidence towards a claim
+stance_scorer = get_stance_scorer()
 
-    # Increment counters
-    request_counts[api_key]["count"] += 1
-    request_counts[api_key]["daily_count"] += 1
+# Thread/process pools that keep blocking work off the event loop
+execution = get_execution_layer()
 
-    return {"api_key": api_key, "tier": key_info["tier"]}
 
+def load_fever_corpus():
+    """Initialize FEVER evidence corpus (the store and its index)."""
+    corpus = get_fever_corpus(load_model=False)
+    logger.info(f"FEVER corpus stats: {corpus.get_corpus_stats()}")
+    return corpus
 
-# --- Load your models and tools ONCE on startup ---
-# Option A: Your fine-tuned model (uncomment after training)
-model_dir = os.path.abspath("./my_misinformation_model")
-claim_classifier = pipeline("text-classification", model=model_dir)
 
-# Option B: An off-the-shelf claim extraction model
-claim_extractor = pipeline(
-    "question-answering", model="distilbert-base-cased-distilled-squad"
+def load_corpus_encoder():
+    """Load the sentence transformer that embeds claims for the corpus."""
+    return model_registry.get("fever_corpus").load_embedding_model()
+
+
+def load_claim_classifier():
+    if CLAIM_MODEL_BACKEND == "onnx":
+        from onnx_models import OnnxSequenceClassifier, export_sequence_classifier
+
+        return OnnxSequenceClassifier(
+            export_sequence_classifier(
+                model_dir,
+                quantize=CLAIM_MODEL_QUANTIZE,
+                revision=directory_fingerprint(model_dir),
+            )
+        )
+    return pipeline("text-classification", model=model_dir)
+
+
+def load_claim_extractor():
+    if CLAIM_MODEL_BACKEND == "onnx":
+        from onnx_models import OnnxQuestionAnswerer, export_question_answering
+
+        return OnnxQuestionAnswerer(
+            export_question_answering(
+                CLAIM_EXTRACTOR_MODEL, quantize=CLAIM_MODEL_QUANTIZE
+            )
+        )
+    return pipeline("question-answering", model=CLAIM_EXTRACTOR_MODEL)
+
+
+def load_stance_model():
+    if not stance_scorer.load():
+        raise RuntimeError("NLI stance model unavailable, using keyword stance")
+    return stance_scorer
+
+
+# Components load concurrently once the app starts (see lifespan below); with
+# PRELOAD_MODELS the fork-safe ones load in the parent first (see prefork.py).
+# Torch weights load without inference; ONNX Runtime sessions start threads.
+model_registry = ModelRegistry()
+model_registry.register(
+    "claim_classifier",
+    load_claim_classifier,
+    fork_safe=CLAIM_MODEL_BACKEND == "torch",
+)
+model_registry.register(
+    "claim_extractor",
+    load_claim_extractor,
+    fork_safe=CLAIM_MODEL_BACKEND == "torch",
+)
+model_registry.register(
+    "fever_corpus",
+    load_fever_corpus,
+    # Memory-mapped store and FAISS index, unless it has to be built first
+    fork_safe=store_exists(os.path.join(FEVER_CACHE_DIR, "corpus")),
+)
+model_registry.register(
+    "corpus_encoder",
+    load_corpus_encoder,
+    depends_on=["fever_corpus"],
+    fork_safe=True,
+)
+if stance_scorer.uses_nli:
+    # Optional: keyword stance covers for it until it's loaded
+    model_registry.register(
+        "stance_model",
+        load_stance_model,
+        required=False,
+        fork_safe=stance_scorer.backend == "torch",
+    )
+
+# Pooled, cached Google Fact Check client with a circuit breaker
+fact_check_client = get_fact_check_client()
+
+# Pooled page fetcher with a byte cap and a cache of extracted text per URL
+url_ingester = get_url_ingester()
+
+# Per-tier queues, weighted fair sharing and load shedding for /analyze
+tier_scheduler = get_tier_scheduler()
+
+CLAIM_QUESTION = "What is the main claim or headline of this article?"
+
+
+def extract_claims_batch(contexts: List[str]) -> List[Any]:
+    """Run the claim extractor once over a batch of article contexts."""
+    claim_extractor = model_registry.get("claim_extractor")
+    results = claim_extractor(
+        [{"question": CLAIM_QUESTION, "context": context} for context in contexts],
+        batch_size=len(contexts),
+    )
+    # The QA pipeline returns a bare dict for a single input
+    return [results] if isinstance(results, dict) else list(results)
+
+
+def classify_claims_batch(claims: List[str]) -> List[Any]:
+    """Run the claim classifier once over a batch of claims."""
+    claim_classifier = model_registry.get("claim_classifier")
+    results = claim_classifier(claims, batch_size=len(claims))
+    # Keep the per-claim output shape of a single classifier call
+    return [[result] for result in results]
+
+
+def embed_claims_batch(claims: List[str]) -> List[np.ndarray]:
+    """Embed a batch of claims with the evidence corpus model."""
+    return list(model_registry.get("fever_corpus").encode_claims(claims))
+
+
+# Largest top_k a caller can ask for; every query in a batch searches this deep
+MAX_EVIDENCE_TOP_K = 50
+
+
+def search_evidence_batch(queries: List[Tuple]) -> List[List[Dict]]:
+    """Search the FEVER corpus once for (claim, top_k[, embedding]) queries."""
+    fever_corpus = model_registry.get("fever_corpus")
+    claims = [query[0] for query in queries]
+    top_ks = [min(max(query[1], 1), MAX_EVIDENCE_TOP_K) for query in queries]
+
+    # Reuse embeddings computed for the claim cache; encode the rest together
+    embeddings = [query[2] if len(query) > 2 else None for query in queries]
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if missing:
+        encoded = fever_corpus.encode_claims([claims[i] for i in missing])
+        for i, embedding in zip(missing, encoded):
+            embeddings[i] = embedding
+
+    results = fever_corpus.search_evidence_batch(
+        claims, top_k=max(top_ks), claim_embeddings=np.stack(embeddings)
+    )
+    return [evidence[:top_k] for evidence, top_k in zip(results, top_ks)]
+
+
+# Model versions that cached /analyze results are tied to
+MODEL_VERSION = (
+    f"{directory_fingerprint(model_dir)}:{CLAIM_EXTRACTOR_MODEL}"
+    f":{CLAIM_MODEL_VERSION}"
+    f":{stance_scorer.version}"
 )
 
-# Initialize FEVER evidence corpus
-logger.info("Initializing FEVER evidence corpus...")
-fever_corpus = get_fever_corpus()
-logger.info(f"FEVER corpus stats: {fever_corpus.get_corpus_stats()}")
+
+def analysis_versions() -> Dict[str, str]:
+    """Versions that invalidate cached /analyze results when they change."""
+    return {
+        "app": app.version,
+        "models": MODEL_VERSION,
+        "corpus": model_registry.get("fever_corpus").version,
+    }
+
+
+# Repeated submissions are answered from here instead of rerunning the pipeline
+result_cache = ResultCache(analysis_versions, shared=create_shared_backend())
+
+# Recently analyzed claims, matched by embedding similarity
+model_registry.register(
+    "claim_cache",
+    lambda: SemanticClaimCache(
+        model_registry.get("corpus_encoder").get_sentence_embedding_dimension(),
+        version_fn=analysis_versions,
+    ),
+    depends_on=["corpus_encoder"],
+    fork_safe=True,
+)
+# Needed before /analyze is served
+ANALYZE_COMPONENTS = (
+    "claim_extractor",
+    "claim_classifier",
+    "fever_corpus",
+    "corpus_encoder",
+    "claim_cache",
+)
+
+if PRELOAD_MODELS:
+    # Load the corpus and the torch model weights in the parent so forked
+    # workers share them copy-on-write. Nothing runs inference here, and torch
+    # stays single-threaded so no OpenMP pool is started before the fork.
+    with single_threaded_loading():
+        model_registry.load_now(fork_safe_only=True)
+    freeze_for_fork()
+
+# Gather concurrent requests into batched forward passes
+claim_extractor_batcher = MicroBatcher("claim_extractor", extract_claims_batch)
+claim_classifier_batcher = MicroBatcher("claim_classifier", classify_claims_batch)
+claim_embedding_batcher = MicroBatcher("claim_embedding", embed_claims_batch)
+# Shared by /analyze and /corpus/search so concurrent claims hit the index together
+evidence_search_batcher = MicroBatcher("evidence_search", search_evidence_batch)
+# (claim, evidence texts) of concurrent requests share NLI forward passes
+stance_batcher = MicroBatcher("evidence_stance", stance_scorer.nli_probabilities_batch)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load models in the background while serving; clean up on shutdown."""
+    model_registry.start()
+    yield
+    await model_registry.stop()
+    await fact_check_client.aclose()
+    await url_ingester.aclose()
+    execution.shutdown(wait=False)
+
 
 app = FastAPI(
     title="Misinformation Detector API",
@@ -112,9 +353,24 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 
+def ensure_ready(components):
+    """Answer 503 with Retry-After while needed components are loading."""
+    try:
+        model_registry.require(components)
+    except NotReady as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "5"}
+        )
+
+
+async def analysis_ready():
+    ensure_ready(ANALYZE_COMPONENTS)
+
+
 class AnalyzeRequest(BaseModel):
     source_text: str
     source_url: str | None = None
@@ -129,25 +385,6 @@ class AnalyzeRequest(BaseModel):
 #         yield session
 
 
-def extract_text_from_url(url):
-    try:
-        response = requests.get(url, timeout=10)
-        soup = BeautifulSoup(response.content, "html.parser")
-        # Try to get the headline
-        headline = soup.find("h1")
-        if headline:
-            headline_text = headline.get_text()
-        else:
-            headline_text = ""
-        # Get all paragraph texts and join them
-        paragraphs = soup.find_all("p")
-        body_text = " ".join([p.get_text() for p in paragraphs])
-        return headline_text + "\n" + body_text
-    except Exception as e:
-        print(f"Error scraping URL: {e}")
-        return None
-
-
 def analyze_language_patterns(text: str) -> Dict[str, Any]:
     """
     Analyze text for language patterns that might indicate bias or misinformation.
@@ -160,69 +397,10 @@ def analyze_language_patterns(text: str) -> Dict[str, Any]:
         "red_flags": [],
     }
 
-    text_lower = text.lower()
-
-    # Emotional language patterns
-    emotional_words = [
-        "shocking",
-        "outrageous",
-        "terrifying",
-        "amazing",
-        "incredible",
-        "unbelievable",
-        "scandalous",
-        "corrupt",
-        "evil",
-        "heroic",
-    ]
-    analysis["emotional_language"] = sum(
-        1 for word in emotional_words if word in text_lower
-    )
-
-    # Certainty indicators
-    certainty_words = [
-        "definitely",
-        "absolutely",
-        "certainly",
-        "without doubt",
-        "proven",
-        "scientific fact",
-        "undeniable",
-        "irrefutable",
-    ]
-    analysis["certainty_indicators"] = sum(
-        1 for word in certainty_words if word in text_lower
-    )
-
-    # Urgency indicators
-    urgency_words = [
-        "urgent",
-        "breaking",
-        "just in",
-        "exclusive",
-        "you won't believe",
-        "act now",
-        "limited time",
-        "don't miss",
-    ]
-    analysis["urgency_indicators"] = sum(
-        1 for word in urgency_words if word in text_lower
-    )
-
-    # Conspiracy indicators
-    conspiracy_words = [
-        "they don't want you to know",
-        "mainstream media",
-        "establishment",
-        "cover up",
-        "hidden truth",
-        "secret agenda",
-        "elite",
-        "deep state",
-    ]
-    analysis["conspiracy_indicators"] = sum(
-        1 for word in conspiracy_words if word in text_lower
-    )
+    # One pass over the text for every category; counts are distinct phrases
+    result = get_language_matcher().match(text)
+    analysis.update(result["counts"])
+    analysis["matches"] = result["matches"]
 
     # Red flags
     if analysis["emotional_language"] > 3:
@@ -352,19 +530,30 @@ def analyze_source_credibility(url: str) -> Dict[str, Any]:
     return credibility
 
 
-def analyze_claim_with_fever_evidence(claim: str) -> dict:
+def analyze_claim_with_fever_evidence(
+    claim: str,
+    evidence_results: Optional[List[Dict]] = None,
+    stance_probabilities: Optional[np.ndarray] = None,
+) -> dict:
     """
     Analyze a claim using FEVER evidence corpus.
 
     Args:
         claim: The claim to analyze
+        evidence_results: Evidence already retrieved for the claim; searched
+            for when not given
+        stance_probabilities: NLI probabilities per evidence piece in
+            STANCE_COLUMNS order; keyword stance is used when not given
 
     Returns:
         Dictionary with evidence analysis results
     """
     try:
         # Search for relevant evidence
-        evidence_results = fever_corpus.search_evidence(claim, top_k=5)
+        if evidence_results is None:
+            evidence_results = model_registry.get("fever_corpus").search_evidence(
+                claim, top_k=5
+            )
 
         if not evidence_results:
             return {
@@ -376,61 +565,52 @@ def analyze_claim_with_fever_evidence(claim: str) -> dict:
         total_score = sum(result["relevance_score"] for result in evidence_results)
         avg_score = total_score / len(evidence_results)
 
-        # Determine if evidence supports, contradicts, or is neutral to the claim
-        supporting_evidence = []
-        contradicting_evidence = []
-        neutral_evidence = []
-
-        for evidence in evidence_results:
-            # Simple keyword-based analysis (can be enhanced with more sophisticated NLP)
-            claim_lower = claim.lower()
-            evidence_lower = evidence["content"].lower()
-
-            # Check for supporting keywords
-            supporting_keywords = [
-                "true",
-                "correct",
-                "accurate",
-                "confirmed",
-                "verified",
-                "fact",
-            ]
-            contradicting_keywords = [
-                "false",
-                "incorrect",
-                "inaccurate",
-                "debunked",
-                "misleading",
-                "myth",
-            ]
-
-            support_count = sum(
-                1 for keyword in supporting_keywords if keyword in evidence_lower
+        # Stance of every piece of evidence at once
+        if stance_probabilities is not None:
+            stances = stance_scorer.stances(stance_probabilities)
+        else:
+            stances = stance_scorer.keyword_stances(
+                [evidence["content"] for evidence in evidence_results]
             )
-            contradict_count = sum(
-                1 for keyword in contradicting_keywords if keyword in evidence_lower
+        supporting_count = int(np.count_nonzero(stances == SUPPORTS))
+        contradicting_count = int(np.count_nonzero(stances == REFUTES))
+        neutral_count = len(evidence_results) - supporting_count - contradicting_count
+
+        stance_summary = None
+        if stance_probabilities is not None:
+            # Relevance-weighted SUPPORTS/NEI/REFUTES distribution
+            aggregated = stance_scorer.aggregate(
+                stance_probabilities,
+                [result["relevance_score"] for result in evidence_results],
             )
-
-            if support_count > contradict_count:
-                supporting_evidence.append(evidence)
-            elif contradict_count > support_count:
-                contradicting_evidence.append(evidence)
+            supports, _, refutes = (float(p) for p in aggregated)
+            stance_summary = dict(
+                zip(STANCE_COLUMNS, (round(float(p), 4) for p in aggregated))
+            )
+            confidence = min(float(aggregated.max()) * 100, 95)
+            if aggregated.argmax() == 0:
+                verdict = "SUPPORTED"
+                credibility_score = min(50 + supports * 45, 95)
+            elif aggregated.argmax() == 2:
+                verdict = "REFUTED"
+                credibility_score = max(5, 50 - refutes * 45)
             else:
-                neutral_evidence.append(evidence)
-
-        # Calculate confidence based on evidence
-        confidence = min(avg_score * 100, 95)  # Cap at 95%
-
-        # Determine verdict based on evidence
-        if len(supporting_evidence) > len(contradicting_evidence):
-            verdict = "SUPPORTED"
-            credibility_score = min(70 + confidence, 95)
-        elif len(contradicting_evidence) > len(supporting_evidence):
-            verdict = "REFUTED"
-            credibility_score = max(5, 30 - confidence)
+                verdict = "NEUTRAL"
+                credibility_score = 50
         else:
-            verdict = "NEUTRAL"
-            credibility_score = 50
+            # Calculate confidence based on evidence (scores are cosine similarities)
+            confidence = min(max(avg_score, 0) * 100, 95)  # Cap at 95%
+
+            # Determine verdict based on evidence
+            if supporting_count > contradicting_count:
+                verdict = "SUPPORTED"
+                credibility_score = min(70 + confidence, 95)
+            elif contradicting_count > supporting_count:
+                verdict = "REFUTED"
+                credibility_score = max(5, 30 - confidence)
+            else:
+                verdict = "NEUTRAL"
+                credibility_score = 50
 
         return {
             "evidence_found": True,
@@ -438,10 +618,16 @@ def analyze_claim_with_fever_evidence(claim: str) -> dict:
             "credibility_score": credibility_score,
             "confidence": confidence,
             "total_evidence": len(evidence_results),
-            "supporting_evidence": len(supporting_evidence),
-            "contradicting_evidence": len(contradicting_evidence),
-            "neutral_evidence": len(neutral_evidence),
-            "top_evidence": evidence_results[:3],  # Top 3 most relevant pieces
+            "supporting_evidence": supporting_count,
+            "contradicting_evidence": contradicting_count,
+            "neutral_evidence": neutral_count,
+            # Top 3 most relevant pieces
+            "top_evidence": [
+                {**evidence, "stance": STANCE_NAMES[int(stance)]}
+                for evidence, stance in zip(evidence_results[:3], stances)
+            ],
+            "stance_method": "nli" if stance_probabilities is not None else "keywords",
+            "stance_probabilities": stance_summary,
             "analysis_method": "FEVER_evidence_corpus",
         }
 
@@ -468,58 +654,132 @@ async def get_api_key_user(request: Request):
 
     api_key = auth.split(" ", 1)[1]
 
-    # For demo mode, accept any key and return demo user
+    # For demo mode, accept any key; known keys get their own tier, which
+    # decides the features, rate limits and scheduling priority they get
+    key_info = API_KEYS.get(api_key, {"tier": "demo"})
     return {
         "user_id": 1,
         "email": "demo@example.com",
         "api_key": api_key,
-        "tier": "demo",
+        "tier": key_info["tier"],
     }
 
 
 async def check_rate_limit(api_user: dict = Depends(get_api_key_user)):
     """Check rate limits - simplified for demo mode."""
-    # For demo mode, use generous limits
-    tier_limits = {
-        "demo": {"per_minute": 100, "per_day": 10000},
-        "free": {"per_minute": 10, "per_day": 100},
-        "basic": {"per_minute": 50, "per_day": 1000},
-        "pro": {"per_minute": 200, "per_day": 10000},
-        "enterprise": {"per_minute": 1000, "per_day": 100000},
-    }
     tier = api_user.get("tier", "demo")
-    limits = tier_limits.get(tier, tier_limits["demo"])
+    rules = TIER_RULES.get(tier, TIER_RULES["demo"])
 
-    # For demo mode, we'll use the existing request_counts system
     api_key = api_user.get("api_key", "demo_key")
-    current_time = time.time()
+    decision = await rate_limiter.ahit(api_key, rules)
+    raise_if_limited(decision, "Rate limit exceeded (per minute)")
 
-    # Reset counters if needed
-    if current_time - request_counts[api_key]["last_reset"] > 60:  # 1 minute window
-        request_counts[api_key]["count"] = 0
-        request_counts[api_key]["last_reset"] = current_time
+    return
 
-    if current_time - request_counts[api_key]["daily_reset"] > 86400:  # 24 hours
-        request_counts[api_key]["daily_count"] = 0
-        request_counts[api_key]["daily_reset"] = current_time
 
-    # Check rate limits
-    if request_counts[api_key]["count"] >= limits["per_minute"]:
-        raise HTTPException(status_code=429, detail="Rate limit exceeded (per minute)")
+async def determine_verdict(
+    main_claim: str, claim_embedding: Optional[np.ndarray] = None
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Decide a claim's verdict from FEVER evidence, Google Fact Check or the model.
 
-    if request_counts[api_key]["daily_count"] >= limits["per_day"]:
-        raise HTTPException(status_code=429, detail="Daily limit exceeded")
+    Args:
+        main_claim: The extracted claim
+        claim_embedding: The claim's corpus embedding, if already computed
 
-    # Increment counters
-    request_counts[api_key]["count"] += 1
-    request_counts[api_key]["daily_count"] += 1
+    Returns:
+        (verdict fields for the response, FEVER evidence analysis)
+    """
+    verdict_fields: Dict[str, Any] = {}
+    try:
+        evidence_results = await evidence_search_batcher.submit(
+            (main_claim, 5, claim_embedding)
+        )
+    except Exception as e:
+        logger.error(f"Error searching FEVER evidence: {e}")
+        evidence_results = []
+
+    # NLI stance within the latency budget; keyword stance otherwise
+    stance_probabilities = None
+    if evidence_results and model_registry.is_ready("stance_model"):
+        try:
+            stance_probabilities = await asyncio.wait_for(
+                stance_batcher.submit(
+                    (main_claim, [evidence["content"] for evidence in evidence_results])
+                ),
+                STANCE_LATENCY_BUDGET_MS / 1000,
+            )
+        except asyncio.TimeoutError:
+            stance_scorer.stats["over_budget"] += 1
+            logger.warning("NLI stance exceeded its latency budget, using keywords")
+        except Exception as e:
+            logger.error(f"Error scoring evidence stance: {e}")
+    fever_analysis = analyze_claim_with_fever_evidence(
+        main_claim, evidence_results, stance_probabilities
+    )
 
-    return
+    if fever_analysis.get("evidence_found", False):
+        verdict_fields.update(
+            {
+                "credibility_score": fever_analysis["credibility_score"],
+                "verdict": fever_analysis["verdict"],
+                "confidence": fever_analysis["confidence"],
+                "analysis_method": fever_analysis["analysis_method"],
+            }
+        )
+    else:
+        # Fallback to Google Fact Check API
+        verdict = await fact_check_client.check_claim(main_claim)
+        if verdict:
+            credibility_score = 50  # Neutral
+            if "False" in verdict["verdict"] or "Misleading" in verdict["verdict"]:
+                credibility_score = 10
+            elif "True" in verdict["verdict"] or "Accurate" in verdict["verdict"]:
+                credibility_score = 90
+
+            verdict_fields.update(
+                {
+                    "credibility_score": credibility_score,
+                    "verdict": verdict["verdict"],
+                    "confidence": 75,
+                    "analysis_method": "Google_Fact_Check_API",
+                }
+            )
+        else:
+            # Use fine-tuned model as final fallback
+            try:
+                model_result = await claim_classifier_batcher.submit(main_claim)
+                if (
+                    model_result
+                    and isinstance(model_result, list)
+                    and len(model_result) > 0
+                ):
+                    model_verdict = model_result[0]
+                    label_map = {0: "False", 1: "Half-True", 2: "True"}
+                    label = int(str(model_verdict.get("label", "0")).split("_")[-1])
+                    verdict_text = label_map.get(label, "Unknown")
+                    score = float(model_verdict.get("score", 0.5))
+
+                    verdict_fields.update(
+                        {
+                            "credibility_score": int(score * 100),
+                            "verdict": verdict_text,
+                            "confidence": int(score * 100),
+                            "analysis_method": "Fine_tuned_model",
+                        }
+                    )
+            except Exception as e:
+                logger.error(f"Error in model analysis: {e}")
+                verdict_fields["error"] = f"Model analysis error: {str(e)}"
+
+    return verdict_fields, fever_analysis
 
 
 @app.post("/analyze")
 async def analyze_content(
     request: AnalyzeRequest,
+    http_request: Request,
+    ready=Depends(analysis_ready),
     api_user: dict = Depends(get_api_key_user),
     rate_limit=Depends(check_rate_limit),
 ):
@@ -533,17 +793,47 @@ async def analyze_content(
     """
     tier = api_user["tier"]
 
+    cache_key = result_cache.key(request.source_text, request.source_url, tier)
+    cached_response = await result_cache.get(cache_key)
+    if cached_response is not None:
+        # The verdict is reused, but the response is served now; keep the
+        # time the analysis actually ran in cached_at
+        return {
+            **cached_response,
+            "analysis_timestamp": datetime.now().isoformat(),
+            "cached": True,
+            "cached_at": cached_response["analysis_timestamp"],
+        }
+
+    # Higher tiers get more of the analysis slots; overloaded tiers are shed,
+    # and requests whose client left while queued give their place up
+    try:
+        async with tier_scheduler.slot(tier, disconnected=http_request.is_disconnected):
+            return await run_analysis(request, tier, cache_key)
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+async def run_analysis(
+    request: AnalyzeRequest, tier: str, cache_key: str
+) -> Dict[str, Any]:
+    """Run the /analyze pipeline for a request that holds a scheduler slot."""
+    claim_cache = model_registry.get("claim_cache")
     text_to_analyze = request.source_text
     source_url = request.source_url
 
     # Handle if input is a URL
     if text_to_analyze and text_to_analyze.strip().startswith(("http://", "https://")):
         source_url = text_to_analyze.strip()
-        text_to_analyze = extract_text_from_url(source_url)
+        text_to_analyze = await url_ingester.fetch_text(source_url)
         if not text_to_analyze:
             return {"error": "Could not fetch or parse content from URL."}
     elif source_url and not text_to_analyze:
-        text_to_analyze = extract_text_from_url(source_url)
+        text_to_analyze = await url_ingester.fetch_text(source_url)
         if not text_to_analyze:
             return {"error": "Could not fetch or parse content from URL."}
 
@@ -553,12 +843,7 @@ async def analyze_content(
     # 1. Extract potential claims (improved)
     context = text_to_analyze[:4000]  # Limit context size for the model
     try:
-        extracted_claim_result = claim_extractor(
-            inputs={
-                "question": "What is the main claim or headline of this article?",
-                "context": context,
-            }
-        )
+        extracted_claim_result = await claim_extractor_batcher.submit(context)
         # Handle the result as a dictionary
         if isinstance(extracted_claim_result, dict):
             main_claim = str(extracted_claim_result.get("answer", ""))
@@ -596,65 +881,43 @@ async def analyze_content(
     }
 
     # 2. Basic analysis (all tiers)
-    fever_analysis = analyze_claim_with_fever_evidence(main_claim)
-
-    if fever_analysis.get("evidence_found", False):
-        response.update(
-            {
-                "credibility_score": fever_analysis["credibility_score"],
-                "verdict": fever_analysis["verdict"],
-                "confidence": fever_analysis["confidence"],
-                "analysis_method": fever_analysis["analysis_method"],
-            }
-        )
+    try:
+        claim_embedding = await claim_embedding_batcher.submit(main_claim)
+    except Exception as e:
+        logger.error(f"Error embedding claim: {e}")
+        claim_embedding = None
+
+    # Paraphrases of a recently analyzed claim reuse its verdict
+    similar_claim = (
+        claim_cache.lookup(main_claim, claim_embedding)
+        if claim_embedding is not None
+        else None
+    )
+    if similar_claim is not None:
+        verdict_fields, fever_analysis = similar_claim["value"]
+        response["similar_claim"] = {
+            "claim": similar_claim["claim"],
+            "similarity": round(similar_claim["similarity"], 4),
+        }
     else:
-        # Fallback to Google Fact Check API
-        verdict = check_claim_with_google(main_claim)
-        if verdict:
-            credibility_score = 50  # Neutral
-            if "False" in verdict["verdict"] or "Misleading" in verdict["verdict"]:
-                credibility_score = 10
-            elif "True" in verdict["verdict"] or "Accurate" in verdict["verdict"]:
-                credibility_score = 90
-
-            response.update(
-                {
-                    "credibility_score": credibility_score,
-                    "verdict": verdict["verdict"],
-                    "confidence": 75,
-                    "analysis_method": "Google_Fact_Check_API",
-                }
+        verdict_fields, fever_analysis = await determine_verdict(
+            main_claim, claim_embedding
+        )
+        if (
+            claim_embedding is not None
+            and verdict_fields
+            and "error" not in verdict_fields
+        ):
+            claim_cache.store(
+                main_claim, claim_embedding, (verdict_fields, fever_analysis)
             )
-        else:
-            # Use fine-tuned model as final fallback
-            try:
-                model_result = claim_classifier(main_claim)
-                if (
-                    model_result
-                    and isinstance(model_result, list)
-                    and len(model_result) > 0
-                ):
-                    model_verdict = model_result[0]
-                    label_map = {0: "False", 1: "Half-True", 2: "True"}
-                    label = int(str(model_verdict.get("label", "0")).split("_")[-1])
-                    verdict_text = label_map.get(label, "Unknown")
-                    score = float(model_verdict.get("score", 0.5))
-
-                    response.update(
-                        {
-                            "credibility_score": int(score * 100),
-                            "verdict": verdict_text,
-                            "confidence": int(score * 100),
-                            "analysis_method": "Fine_tuned_model",
-                        }
-                    )
-            except Exception as e:
-                logger.error(f"Error in model analysis: {e}")
-                response["error"] = f"Model analysis error: {str(e)}"
+    response.update(verdict_fields)
 
     # 3. Language analysis (Basic tier and above)
     if tier in ["basic", "pro", "enterprise"]:
-        language_analysis = analyze_language_patterns(text_to_analyze)
+        language_analysis = await execution.run_process(
+            analyze_language_patterns, text_to_analyze
+        )
         response["language_analysis"] = language_analysis
 
     # 4. Source credibility analysis (Pro tier and above)
@@ -682,19 +945,25 @@ async def analyze_content(
         }
         response["top_evidence"] = fever_analysis["top_evidence"]
 
-    return response
+    # Errors may be transient, so only complete analyses are reused
+    if "error" not in response:
+        await result_cache.set(cache_key, response)
+
+    return {**response, "cached": False, "cached_at": None}
 
 
 @app.get("/corpus/stats")
 async def get_corpus_stats():
     """Get statistics about the FEVER evidence corpus."""
-    return fever_corpus.get_corpus_stats()
+    ensure_ready(["fever_corpus"])
+    return model_registry.get("fever_corpus").get_corpus_stats()
 
 
 @app.get("/corpus/search")
-async def search_corpus(query: str, top_k: int = 5):
+async def search_corpus(query: str, top_k: int = Query(5, ge=1, le=MAX_EVIDENCE_TOP_K)):
     """Search the FEVER evidence corpus for a query."""
-    results = fever_corpus.search_evidence(query, top_k=top_k)
+    ensure_ready(["fever_corpus", "corpus_encoder"])
+    results = await evidence_search_batcher.submit((query, top_k))
     return {"query": query, "results": results, "total_results": len(results)}
 
 
@@ -797,34 +1066,75 @@ async def get_usage_stats(auth: dict = Depends(verify_api_key)):
     """Get current API usage statistics."""
     api_key = auth["api_key"]
     key_info = API_KEYS[api_key]
-    current_usage = request_counts[api_key]
+    current_usage = await rate_limiter.apeek(api_key, API_KEY_RULES[api_key])
 
     return {
         "tier": key_info["tier"],
         "rate_limit": key_info["rate_limit"],
         "daily_limit": key_info["daily_limit"],
         "current_usage": {
-            "requests_this_minute": current_usage["count"],
-            "requests_today": current_usage["daily_count"],
-            "remaining_today": max(
-                0, key_info["daily_limit"] - current_usage["daily_count"]
-            ),
+            "requests_this_minute": current_usage["minute"]["used"],
+            "requests_today": current_usage["day"]["used"],
+            "remaining_today": current_usage["day"]["remaining"],
+        },
+    }
+
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """Get execution pool, micro-batching and cache metrics."""
+    return {
+        "executor": execution.get_stats(),
+        "result_cache": result_cache.get_metrics(),
+        "claim_cache": (
+            model_registry.get("claim_cache").get_metrics()
+            if model_registry.is_ready("claim_cache")
+            else None
+        ),
+        "fact_check": fact_check_client.get_metrics(),
+        "url_ingest": url_ingester.get_metrics(),
+        "batching": {
+            batcher.name: batcher.get_metrics()
+            for batcher in (
+                claim_extractor_batcher,
+                claim_classifier_batcher,
+                claim_embedding_batcher,
+                evidence_search_batcher,
+                stance_batcher,
+            )
         },
+        "evidence_stance": stance_scorer.get_metrics(),
+        "rate_limiter": rate_limiter.get_metrics(),
+        "scheduler": tier_scheduler.get_metrics(),
+        # Of the worker that served this request
+        "memory": process_memory(),
     }
 
 
 @app.get("/api/health")
 async def health_check():
-    """Health check endpoint."""
+    """Health check endpoint: liveness plus the loading state of each component."""
+    if model_registry.ready:
+        status = "healthy"
+    elif model_registry.failed:
+        status = "unhealthy"
+    else:
+        status = "loading"
     return {
-        "status": "healthy",
+        "status": status,
         "timestamp": datetime.now().isoformat(),
-        "services": {
-            "fever_corpus": "operational",
-            "claim_classifier": "operational",
-            "claim_extractor": "operational",
-        },
+        "uptime_seconds": round(time.time() - model_registry.started_at, 1),
+        "services": model_registry.status(),
     }
 
 
+@app.get("/api/ready")
+async def readiness_check():
+    """Readiness endpoint: 200 once every required component is loaded, else 503."""
+    body = {"ready": model_registry.ready, "services": model_registry.status()}
+    if not model_registry.ready:
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+
 # Authentication endpoints removed - using demo mode with simplified API key system
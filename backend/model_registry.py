@@ -0,0 +1,211 @@
+"""
+Managed loading of models and other slow-to-build components.
+
+Components are registered with a loader and loaded in the background once
+the app starts, so the worker answers cheap endpoints (health, readiness,
+educational content) right away instead of after every model is in memory.
+Each component reports its own state (pending, loading, ready or failed),
+load time and error. Components that depend on others wait for them; the
+rest load concurrently. Components registered as fork-safe can instead be
+loaded before a pre-forking server forks its workers, and shared by them
+(see prefork.py).
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence
+
+from executor import ExecutionLayer, get_execution_layer
+
+logger = logging.getLogger(__name__)
+
+PENDING, LOADING, READY, FAILED = "pending", "loading", "ready", "failed"
+
+
+class NotReady(Exception):
+    """A component a request needs has not finished loading (or failed)."""
+
+    def __init__(self, components: Sequence[str]):
+        super().__init__(f"Not ready: {', '.join(components)}")
+        self.components = list(components)
+
+
+class Component:
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[], Any],
+        depends_on: Sequence[str] = (),
+        required: bool = True,
+        fork_safe: bool = False,
+    ):
+        self.name = name
+        self.loader = loader
+        self.depends_on = tuple(depends_on)
+        self.required = required
+        self.fork_safe = fork_safe
+        self.state = PENDING
+        self.value: Any = None
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+
+    def status(self) -> Dict:
+        return {
+            "state": self.state,
+            "required": self.required,
+            "load_seconds": (
+                round(self.load_seconds, 3) if self.load_seconds is not None else None
+            ),
+            "error": self.error,
+        }
+
+
+class ModelRegistry:
+    def __init__(self, execution: Optional[ExecutionLayer] = None):
+        """
+        Initialize an empty registry.
+
+        Args:
+            execution: Execution layer whose I/O pool runs the loaders
+        """
+        self.execution = execution or get_execution_layer()
+        self.components: Dict[str, Component] = {}
+        self._events: Dict[str, asyncio.Event] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.started_at = time.time()
+
+    def register(
+        self,
+        name: str,
+        loader: Callable[[], Any],
+        depends_on: Sequence[str] = (),
+        required: bool = True,
+        fork_safe: bool = False,
+    ):
+        """
+        Add a component.
+
+        Args:
+            name: Component name used by get() and in status reports
+            loader: Blocking function that builds and returns the component
+            depends_on: Components that must be ready before this one loads
+            required: Whether the service is unready without it
+            fork_safe: Whether it may be loaded in a process that later
+                forks: data and model weights that load without running
+                inference or creating inference sessions
+        """
+        self.components[name] = Component(name, loader, depends_on, required, fork_safe)
+
+    def _load_one(self, component: Component):
+        component.state = LOADING
+        started = time.perf_counter()
+        logger.info(f"Loading {component.name}...")
+        try:
+            component.value = component.loader()
+        except Exception as e:
+            component.state = FAILED
+            component.error = f"{type(e).__name__}: {e}"
+            logger.error(f"Failed to load {component.name}: {e}")
+        else:
+            component.state = READY
+            logger.info(
+                f"Loaded {component.name} in {time.perf_counter() - started:.1f}s"
+            )
+        finally:
+            component.load_seconds = time.perf_counter() - started
+
+    async def _load_async(self, component: Component):
+        try:
+            for dependency in component.depends_on:
+                await self._events[dependency].wait()
+            failed = [
+                d for d in component.depends_on if self.components[d].state != READY
+            ]
+            if failed:
+                component.state = FAILED
+                component.error = f"Dependencies not loaded: {', '.join(failed)}"
+                return
+            await self.execution.run_io(self._load_one, component)
+        finally:
+            self._events[component.name].set()
+
+    def start(self) -> asyncio.Task:
+        """Start loading every pending component in the background."""
+        if self._task is None:
+            self._events = {name: asyncio.Event() for name in self.components}
+            for name, component in self.components.items():
+                if component.state != PENDING:
+                    self._events[name].set()
+            self._task = asyncio.ensure_future(
+                asyncio.gather(
+                    *(
+                        self._load_async(component)
+                        for component in self.components.values()
+                        if component.state == PENDING
+                    )
+                )
+            )
+        return self._task
+
+    def load_now(self, fork_safe_only: bool = False):
+        """
+        Load pending components in this thread, in registration order.
+
+        Args:
+            fork_safe_only: Load only fork-safe components, leaving the rest
+                to start() in each forked worker
+        """
+        for component in self.components.values():
+            if component.state != PENDING or (
+                fork_safe_only and not component.fork_safe
+            ):
+                continue
+            if any(self.components[d].state != READY for d in component.depends_on):
+                # Left to start(), which waits for the dependencies
+                continue
+            self._load_one(component)
+
+    async def stop(self):
+        """Cancel loading that is still waiting (loaders already running finish)."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def get(self, name: str) -> Any:
+        """
+        Get a loaded component.
+
+        Raises:
+            NotReady: If it isn't loaded
+        """
+        component = self.components[name]
+        if component.state != READY:
+            raise NotReady([name])
+        return component.value
+
+    def require(self, names: Iterable[str]):
+        """Raise NotReady unless every named component is loaded."""
+        missing = [name for name in names if self.components[name].state != READY]
+        if missing:
+            raise NotReady(missing)
+
+    def is_ready(self, name: str) -> bool:
+        return name in self.components and self.components[name].state == READY
+
+    @property
+    def ready(self) -> bool:
+        """Whether every required component is loaded."""
+        return all(c.state == READY for c in self.components.values() if c.required)
+
+    @property
+    def failed(self) -> bool:
+        """Whether a required component failed to load."""
+        return any(c.state == FAILED for c in self.components.values() if c.required)
+
+    def status(self) -> Dict:
+        """Get per-component state and load time."""
+        return {name: c.status() for name, c in self.components.items()}
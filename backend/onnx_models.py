@@ -0,0 +1,416 @@
+"""
+ONNX Runtime inference for Hugging Face classifiers and extractive QA models.
+
+A checkpoint is exported once to ONNX (needs torch), optionally quantized to
+dynamic int8, and cached on disk together with its tokenizer and config.
+Later loads only need onnxruntime and the tokenizer, and inference runs on
+the CPU execution provider without autograd or Python-side model code.
+
+Every export is checked against the PyTorch model it came from on a few
+sample inputs; the result is logged and kept in parity.json next to the
+model. OnnxSequenceClassifier and OnnxQuestionAnswerer take the same inputs
+and return the same outputs as the transformers pipelines they replace.
+"""
+
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", "./onnx_cache")
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))  # 0 lets ONNX Runtime decide
+ONNX_OPSET = 14
+
+# (first, second) sequences traced for export and compared for parity;
+# different lengths so padding is exercised too
+PARITY_SAMPLES = [
+    (
+        "What is the main claim?",
+        "The city council approved the largest transit budget in its history "
+        "on Tuesday, officials said.",
+    ),
+    ("Is this true?", "Scientists found no link between the vaccine and autism."),
+    (
+        "What happened?",
+        "A viral post claims the moon landing was staged, but the photos, rock "
+        "samples and independent tracking stations all confirm it took place.",
+    ),
+    ("Who said it?", "The senator said unemployment fell to 3%."),
+]
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def onnx_model_dir(
+    model_name: str,
+    quantize: bool,
+    cache_dir: str = ONNX_CACHE_DIR,
+    revision: str = "",
+) -> str:
+    """Cache directory for one exported checkpoint."""
+    slug = re.sub(r"[^\w.-]+", "--", model_name.strip("/\\"))
+    if revision:
+        slug += f"-{revision}"
+    return os.path.join(cache_dir, slug + ("-int8" if quantize else ""))
+
+
+def _session(model_path: str, threads: Optional[int] = None):
+    import onnxruntime
+
+    if threads is None:
+        # Read at call time: forked workers set their share (see prefork.py)
+        threads = ONNX_THREADS
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if threads:
+        options.intra_op_num_threads = threads
+    return onnxruntime.InferenceSession(
+        model_path, options, providers=["CPUExecutionProvider"]
+    )
+
+
+def compare_outputs(
+    expected: Sequence[np.ndarray], actual: Sequence[np.ndarray]
+) -> Dict[str, float]:
+    """
+    Compare model outputs from two backends.
+
+    Args:
+        expected: Reference outputs (PyTorch), one array per output
+        actual: Outputs of the backend under test, in the same order
+
+    Returns:
+        Largest absolute difference and the share of rows whose argmax over
+        the last axis agrees, over all outputs
+    """
+    max_abs_diff = max(
+        float(np.abs(e.astype(np.float32) - a.astype(np.float32)).max())
+        for e, a in zip(expected, actual)
+    )
+    agreement = min(
+        float(np.mean(e.argmax(axis=-1) == a.argmax(axis=-1)))
+        for e, a in zip(expected, actual)
+    )
+    return {"max_abs_diff": max_abs_diff, "argmax_agreement": agreement}
+
+
+def _export(
+    model_name: str,
+    model_class: str,
+    outputs: Dict[str, Dict[int, str]],
+    quantize: bool,
+    cache_dir: str,
+    revision: str,
+) -> str:
+    output_dir = onnx_model_dir(model_name, quantize, cache_dir, revision)
+    model_path = os.path.join(output_dir, "model.onnx")
+    if os.path.exists(os.path.join(output_dir, "config.json")):
+        return output_dir
+
+    import torch
+    import transformers
+
+    logger.info(f"Exporting {model_name} to ONNX in {output_dir}")
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = transformers.AutoTokenizer.from_pretrained(model_name)
+    model = getattr(transformers, model_class).from_pretrained(model_name)
+    model.eval()
+
+    sample = tokenizer(
+        [first for first, _ in PARITY_SAMPLES],
+        [second for _, second in PARITY_SAMPLES],
+        padding=True,
+        return_tensors="pt",
+    )
+    input_names = list(sample.keys())
+    output_names = list(outputs)
+    fp32_path = os.path.join(output_dir, "model-fp32.onnx")
+    with torch.inference_mode():
+        torch.onnx.export(
+            model,
+            (dict(sample),),
+            fp32_path,
+            input_names=input_names,
+            output_names=output_names,
+            dynamic_axes={
+                **{name: {0: "batch", 1: "sequence"} for name in input_names},
+                **outputs,
+            },
+            opset_version=ONNX_OPSET,
+        )
+        result = model(**sample)
+        expected = [getattr(result, name).float().numpy() for name in output_names]
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(fp32_path, model_path, weight_type=QuantType.QInt8)
+        os.remove(fp32_path)
+    else:
+        os.replace(fp32_path, model_path)
+
+    session = _session(model_path)
+    feed = {
+        i.name: sample[i.name].numpy().astype(np.int64) for i in session.get_inputs()
+    }
+    parity = compare_outputs(expected, session.run(output_names, feed))
+    log = logger.info if parity["argmax_agreement"] == 1.0 else logger.warning
+    log(f"ONNX parity with PyTorch for {model_name}: {parity}")
+    with open(os.path.join(output_dir, "parity.json"), "w") as f:
+        json.dump(parity, f)
+
+    # The config goes last: its presence marks a finished export
+    tokenizer.save_pretrained(output_dir)
+    model.config.save_pretrained(output_dir)
+    return output_dir
+
+
+def export_sequence_classifier(
+    model_name: str,
+    quantize: bool = True,
+    cache_dir: str = ONNX_CACHE_DIR,
+    revision: str = "",
+) -> str:
+    """
+    Export a sequence classification checkpoint to ONNX unless already cached.
+
+    Args:
+        model_name: Hugging Face model name or local path
+        quantize: Quantize weights to dynamic int8
+        cache_dir: Directory holding exported models
+        revision: Version of the checkpoint, so a retrained local model
+            gets a new export instead of the cached one
+
+    Returns:
+        Directory with model.onnx, parity.json, the tokenizer and the config
+    """
+    return _export(
+        model_name,
+        "AutoModelForSequenceClassification",
+        {"logits": {0: "batch"}},
+        quantize,
+        cache_dir,
+        revision,
+    )
+
+
+def export_question_answering(
+    model_name: str,
+    quantize: bool = True,
+    cache_dir: str = ONNX_CACHE_DIR,
+    revision: str = "",
+) -> str:
+    """
+    Export an extractive question answering checkpoint to ONNX unless cached.
+
+    Args:
+        model_name: Hugging Face model name or local path
+        quantize: Quantize weights to dynamic int8
+        cache_dir: Directory holding exported models
+        revision: Version of the checkpoint
+
+    Returns:
+        Directory with model.onnx, parity.json, the tokenizer and the config
+    """
+    axes = {0: "batch", 1: "sequence"}
+    return _export(
+        model_name,
+        "AutoModelForQuestionAnswering",
+        {"start_logits": axes, "end_logits": axes},
+        quantize,
+        cache_dir,
+        revision,
+    )
+
+
+class _OnnxModel:
+    def __init__(self, model_dir: str, threads: Optional[int] = None):
+        """
+        Load an exported model.
+
+        Args:
+            model_dir: Directory written by one of the export functions
+            threads: Intra-op threads (0 lets ONNX Runtime decide); defaults
+                to ONNX_THREADS
+        """
+        from transformers import AutoConfig, AutoTokenizer
+
+        self.session = _session(os.path.join(model_dir, "model.onnx"), threads)
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.config = AutoConfig.from_pretrained(model_dir)
+        parity_path = os.path.join(model_dir, "parity.json")
+        self.parity: Optional[Dict[str, float]] = None
+        if os.path.exists(parity_path):
+            with open(parity_path) as f:
+                self.parity = json.load(f)
+
+    def _run(self, inputs, output_names: List[str]) -> List[np.ndarray]:
+        feed = {name: inputs[name].astype(np.int64) for name in self.input_names}
+        return self.session.run(output_names, feed)
+
+
+class OnnxSequenceClassifier(_OnnxModel):
+    """Stands in for a transformers text-classification pipeline."""
+
+    def __init__(self, model_dir: str, threads: Optional[int] = None):
+        super().__init__(model_dir, threads)
+        self.id2label: Dict[int, str] = {
+            int(index): label for index, label in self.config.id2label.items()
+        }
+
+    def logits(
+        self,
+        texts: List[str],
+        text_pairs: Optional[List[str]] = None,
+        max_length: int = 256,
+    ) -> np.ndarray:
+        """
+        Run one batch through the model.
+
+        Args:
+            texts: First sequences (premises for NLI)
+            text_pairs: Optional second sequences (hypotheses for NLI)
+            max_length: Token limit per example; the first sequence is cut
+
+        Returns:
+            float32 array of shape (len(texts), num_labels)
+        """
+        inputs = self.tokenizer(
+            list(texts),
+            list(text_pairs) if text_pairs is not None else None,
+            padding=True,
+            truncation="only_first" if text_pairs is not None else True,
+            max_length=max_length,
+            return_tensors="np",
+        )
+        return self._run(inputs, ["logits"])[0]
+
+    def __call__(
+        self,
+        texts: Union[str, List[str]],
+        batch_size: Optional[int] = None,
+        max_length: int = 512,
+    ) -> List[Dict[str, Any]]:
+        """
+        Classify texts.
+
+        Args:
+            texts: A text or list of texts
+            batch_size: Texts per forward pass (default: all at once)
+            max_length: Token limit per text
+
+        Returns:
+            {"label", "score"} of the top label for each text
+        """
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        batch_size = batch_size or max(1, len(texts))
+        multi_label = (
+            self.config.problem_type == "multi_label_classification"
+            or self.config.num_labels == 1
+        )
+        results = []
+        for i in range(0, len(texts), batch_size):
+            logits = self.logits(texts[i : i + batch_size], max_length=max_length)
+            scores = 1 / (1 + np.exp(-logits)) if multi_label else _softmax(logits)
+            for row in scores:
+                best = int(row.argmax())
+                results.append(
+                    {"label": self.id2label[best], "score": float(row[best])}
+                )
+        return results
+
+
+class OnnxQuestionAnswerer(_OnnxModel):
+    """Stands in for a transformers question-answering pipeline."""
+
+    def __call__(
+        self,
+        inputs: Union[Dict[str, str], List[Dict[str, str]]],
+        batch_size: Optional[int] = None,
+        max_length: int = 384,
+        doc_stride: int = 128,
+        max_answer_len: int = 15,
+    ) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Extract the best answer span from each context.
+
+        Contexts longer than max_length are split into overlapping spans and
+        the best-scoring answer over all of an example's spans is returned.
+
+        Args:
+            inputs: {"question", "context"} dict or list of them
+            batch_size: Spans per forward pass (default: all at once)
+            max_length: Tokens per span, question included
+            doc_stride: Tokens shared by consecutive spans
+            max_answer_len: Longest answer in tokens
+
+        Returns:
+            {"score", "start", "end", "answer"} per input; a bare dict for a
+            single dict input
+        """
+        single = isinstance(inputs, dict)
+        examples = [inputs] if single else list(inputs)
+        if not examples:
+            return []
+        encoded = self.tokenizer(
+            [example["question"] for example in examples],
+            [example["context"] for example in examples],
+            padding=True,
+            truncation="only_second",
+            max_length=max_length,
+            stride=doc_stride,
+            return_overflowing_tokens=True,
+            return_offsets_mapping=True,
+            return_tensors="np",
+        )
+        spans = len(encoded["input_ids"])
+        batch_size = batch_size or spans
+        start_logits, end_logits = [], []
+        for i in range(0, spans, batch_size):
+            batch = {
+                name: encoded[name][i : i + batch_size] for name in self.input_names
+            }
+            starts, ends = self._run(batch, ["start_logits", "end_logits"])
+            start_logits.append(starts)
+            end_logits.append(ends)
+        start_logits = np.concatenate(start_logits)
+        end_logits = np.concatenate(end_logits)
+
+        best: Dict[int, Dict[str, Any]] = {}
+        for span in range(spans):
+            # Answers can only come from context tokens
+            in_context = np.array([s == 1 for s in encoded.sequence_ids(span)])
+            if not in_context.any():
+                continue
+            start = _softmax(np.where(in_context, start_logits[span], -10000.0))
+            end = _softmax(np.where(in_context, end_logits[span], -10000.0))
+            # Spans that end after they start and are at most max_answer_len long
+            candidates = np.tril(np.triu(np.outer(start, end)), max_answer_len - 1)
+            first, last = np.unravel_index(candidates.argmax(), candidates.shape)
+            score = float(candidates[first, last])
+            example = int(encoded["overflow_to_sample_mapping"][span])
+            if example in best and best[example]["score"] >= score:
+                continue
+            offsets = encoded["offset_mapping"][span]
+            char_start, char_end = int(offsets[first][0]), int(offsets[last][1])
+            best[example] = {
+                "score": score,
+                "start": char_start,
+                "end": char_end,
+                "answer": examples[example]["context"][char_start:char_end],
+            }
+
+        results = [
+            best.get(i, {"score": 0.0, "start": 0, "end": 0, "answer": ""})
+            for i in range(len(examples))
+        ]
+        return results[0] if single else results
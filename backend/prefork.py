@@ -0,0 +1,113 @@
+"""
+Pre-fork model sharing for multi-worker serving.
+
+With PRELOAD_MODELS=true, main.py loads the fork-safe components at import,
+before the server forks its workers (gunicorn --preload, see
+gunicorn.conf.py). The workers then share those pages copy-on-write instead
+of each holding its own copy. That covers the corpus store and its FAISS
+index (build them beforehand with init_fever_corpus.py, otherwise the corpus
+loads in each worker) and the weights of the torch models: the claim
+pipelines with CLAIM_MODEL_BACKEND=torch, the sentence transformer that
+embeds claims, and the NLI stance model with STANCE_BACKEND=torch. Loading
+weights runs no inference, and single_threaded_loading() keeps torch's
+OpenMP pool from starting in the parent, since its threads don't survive a
+fork. Each worker sets its own thread count after the fork
+(configure_worker_threads). ONNX Runtime sessions start their thread pools
+when they are created, so with the onnx backends those models still load in
+each worker, in the app's lifespan.
+
+Sharing only lasts while nothing writes to the pages. Weight tensors, numpy
+arrays and FAISS indexes keep their data in buffers that refcounting never
+touches. Python object headers do get written, though, and a garbage
+collection pass in a worker would write to every tracked object's header and
+copy its page. freeze_for_fork() moves everything allocated so far into the
+collector's permanent generation, so workers never scan it.
+"""
+
+import gc
+import logging
+import os
+from contextlib import contextmanager
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "false").lower() == "true"
+
+
+def freeze_for_fork():
+    """Exclude every object allocated so far from future collections."""
+    # Collect first so garbage isn't frozen along with the models
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Froze {gc.get_freeze_count()} objects for copy-on-write sharing")
+
+
+@contextmanager
+def single_threaded_loading():
+    """Run torch single-threaded inside the block, so no OpenMP pool starts."""
+    try:
+        import torch
+    except ImportError:
+        yield
+        return
+    threads = torch.get_num_threads()
+    torch.set_num_threads(1)
+    try:
+        yield
+    finally:
+        # Only records the setting; the pool starts at the next parallel op
+        torch.set_num_threads(threads)
+
+
+def configure_worker_threads(threads: int):
+    """
+    Set a forked worker's inference threads for torch and ONNX Runtime.
+
+    Args:
+        threads: Intra-op threads per worker; ONNX_THREADS wins when set
+    """
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    import onnx_models
+
+    if not onnx_models.ONNX_THREADS:
+        onnx_models.ONNX_THREADS = threads
+
+
+def process_memory() -> Dict:
+    """
+    Memory of this process from /proc/self/smaps_rollup (Linux).
+
+    Returns:
+        pid and, in MB: rss (resident), pss (resident with shared pages split
+        between the processes sharing them), shared and private resident
+        memory. Summing pss over the workers gives their real total.
+    """
+    memory = {"pid": os.getpid()}
+    fields = {
+        "Rss": "rss_mb",
+        "Pss": "pss_mb",
+        "Shared_Clean": "shared_mb",
+        "Shared_Dirty": "shared_mb",
+        "Private_Clean": "private_mb",
+        "Private_Dirty": "private_mb",
+    }
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in fields:
+                    key = fields[name]
+                    memory[key] = memory.get(key, 0.0) + int(rest.split()[0]) / 1024
+    except OSError:
+        # Not Linux, or a kernel without smaps_rollup
+        import resource
+
+        # ru_maxrss is KB on Linux, bytes on macOS; this is peak, not current
+        memory["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {k: round(v, 1) if isinstance(v, float) else v for k, v in memory.items()}
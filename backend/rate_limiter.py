@@ -0,0 +1,394 @@
+"""
+Rate limiting shared by every worker.
+
+Limits are rules evaluated together per key: a TokenBucket smooths bursts
+(e.g. requests per minute) and a SlidingWindow caps a quota (e.g. requests
+per day) without the double burst a fixed window allows at its boundary. All
+of a key's rules are checked and consumed in one atomic update of its state
+in a swappable store (RATE_LIMIT_URL):
+
+    memory://                   per-process dict (the default; one worker only)
+    sqlite:///path/limits.db    SQLite file shared by the workers on one host
+    redis://host:6379/0         Redis or any server speaking its protocol
+
+Timestamps are wall-clock so workers agree on them. A key's state expires
+once its rules would treat it as new, so idle keys are evicted instead of
+accumulating one entry per bearer token ever seen.
+"""
+
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from executor import ExecutionLayer, get_execution_layer
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_URL = os.getenv("RATE_LIMIT_URL", "memory://")
+# Safety cap on keys held by the in-memory store
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+# Update function: current state (None for a new key) -> (new state, result)
+UpdateFn = Callable[[Optional[Dict]], Tuple[Dict, Any]]
+
+
+class TokenBucket:
+    """Up to `limit` requests at once, refilled evenly over `period` seconds."""
+
+    def __init__(self, name: str, limit: int, period: float):
+        self.name = name
+        self.limit = limit
+        self.period = period
+        self.ttl = period  # a bucket idle this long is full again
+
+    def refresh(self, state: Optional[List], now: float) -> List:
+        if state is None:
+            return [float(self.limit), now]
+        tokens, updated = state
+        refill = max(0.0, now - updated) * self.limit / self.period
+        return [min(float(self.limit), tokens + refill), now]
+
+    def retry_after(self, state: List, cost: int) -> float:
+        """Seconds until `cost` requests fit; 0 if they fit now."""
+        missing = cost - state[0]
+        return max(0.0, missing * self.period / self.limit) if self.limit else math.inf
+
+    def consume(self, state: List, cost: int) -> List:
+        return [state[0] - cost, state[1]]
+
+    def used(self, state: List) -> float:
+        return self.limit - state[0]
+
+
+class SlidingWindow:
+    """At most `limit` requests in any `period` seconds (sliding-window counter)."""
+
+    def __init__(self, name: str, limit: int, period: float):
+        self.name = name
+        self.limit = limit
+        self.period = period
+        self.ttl = 2 * period  # the previous window stops counting after this
+
+    def refresh(self, state: Optional[List], now: float) -> List:
+        window = int(now // self.period)
+        if state is None:
+            return [window, 0, 0, now]
+        start, current, previous, _ = state
+        if window == start + 1:
+            previous, current = current, 0
+        elif window != start:
+            previous, current = 0, 0
+        return [window, current, previous, now]
+
+    def _estimate(self, state: List) -> float:
+        window, current, previous, now = state
+        elapsed = (now - window * self.period) / self.period
+        return previous * (1 - elapsed) + current
+
+    def retry_after(self, state: List, cost: int) -> float:
+        """Seconds until `cost` requests fit; 0 if they fit now."""
+        if self._estimate(state) + cost <= self.limit:
+            return 0.0
+        window, current, previous, now = state
+        window_left = (window + 1) * self.period - now
+        if current + cost > self.limit or not previous:
+            return window_left
+        # The previous window's weight has to decay until the request fits
+        needed = 1 - (self.limit - current - cost) / previous
+        return max(0.0, needed * self.period - (now - window * self.period))
+
+    def consume(self, state: List, cost: int) -> List:
+        return [state[0], state[1] + cost, state[2], state[3]]
+
+    def used(self, state: List) -> float:
+        return self._estimate(state)
+
+
+def per_minute_and_day(per_minute: int, per_day: int) -> List:
+    """The usual API rules: bursts per minute, quota per rolling day."""
+    return [
+        TokenBucket("minute", per_minute, 60),
+        SlidingWindow("day", per_day, 86400),
+    ]
+
+
+class MemoryStore:
+    """Per-process store; limits are not shared between workers."""
+
+    blocking = False
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max(1, max_keys)
+        self._entries: "OrderedDict[str, Tuple[Dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._updates = 0
+        self.evictions = 0
+
+    def update(self, key: str, fn: UpdateFn, ttl: float) -> Any:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            state = entry[0] if entry is not None and entry[1] > now else None
+            new_state, result = fn(state)
+            self._entries[key] = (new_state, now + ttl)
+            self._entries.move_to_end(key)
+
+            self._updates += 1
+            if self._updates % 1000 == 0:
+                self._evict_expired(now)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return result
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry[0] if entry is not None and entry[1] > time.time() else None
+
+    def _evict_expired(self, now: float):
+        expired = [key for key, (_, expires) in self._entries.items() if expires <= now]
+        for key in expired:
+            del self._entries[key]
+        self.evictions += len(expired)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteStore:
+    """Store in a SQLite file, shared by every worker on one host."""
+
+    blocking = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._updates = 0
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits "
+            "(key TEXT PRIMARY KEY, state TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections don't survive a fork, so workers forked after this
+        # object was created open their own
+        if getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return self._local.conn
+
+    def update(self, key: str, fn: UpdateFn, ttl: float) -> Any:
+        conn = self._connect()
+        now = time.time()
+        # IMMEDIATE takes the write lock up front, so the read-modify-write
+        # can't interleave with another worker's
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT state FROM rate_limits WHERE key = ? AND expires > ?",
+                (key, now),
+            ).fetchone()
+            new_state, result = fn(json.loads(row[0]) if row else None)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limits VALUES (?, ?, ?)",
+                (key, json.dumps(new_state), now + ttl),
+            )
+            self._updates += 1
+            if self._updates % 1000 == 0:
+                conn.execute("DELETE FROM rate_limits WHERE expires <= ?", (now,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def get(self, key: str) -> Optional[Dict]:
+        row = (
+            self._connect()
+            .execute(
+                "SELECT state FROM rate_limits WHERE key = ? AND expires > ?",
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+        return json.loads(row[0]) if row else None
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+
+class RedisStore:
+    """Store in Redis (needs the optional `redis` package)."""
+
+    blocking = True
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5)
+        self.prefix = prefix
+        self._watch_error = redis.WatchError
+
+    def update(self, key: str, fn: UpdateFn, ttl: float) -> Any:
+        name = self.prefix + key
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    # Optimistic transaction: retried if another worker wrote first
+                    pipe.watch(name)
+                    raw = pipe.get(name)
+                    new_state, result = fn(json.loads(raw) if raw else None)
+                    pipe.multi()
+                    pipe.set(name, json.dumps(new_state), px=max(1, int(ttl * 1000)))
+                    pipe.execute()
+                    return result
+                except self._watch_error:
+                    continue
+
+    def get(self, key: str) -> Optional[Dict]:
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw else None
+
+
+def create_store(url: str = RATE_LIMIT_URL):
+    """Build the store for a RATE_LIMIT_URL."""
+    if not url or url == "memory://":
+        return MemoryStore()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisStore(url)
+    if url.startswith("sqlite:///"):
+        return SQLiteStore(url[len("sqlite:///") :])
+    raise ValueError(f"Unsupported RATE_LIMIT_URL {url!r}")
+
+
+class RateLimiter:
+    def __init__(self, store=None, execution: Optional[ExecutionLayer] = None):
+        """
+        Initialize the limiter.
+
+        Args:
+            store: MemoryStore, SQLiteStore or RedisStore (defaults to the
+                store for RATE_LIMIT_URL)
+            execution: Execution layer used for blocking store calls
+        """
+        self.store = store if store is not None else create_store()
+        self.execution = execution or get_execution_layer()
+        self.stats = {"allowed": 0, "limited": 0, "store_errors": 0}
+
+    def hit(self, key: str, rules: Sequence, cost: int = 1) -> Dict:
+        """
+        Count a request against every rule, unless one of them is exhausted.
+
+        Args:
+            key: Client identity, e.g. the API key
+            rules: TokenBucket/SlidingWindow rules for this client
+            cost: Requests to count
+
+        Returns:
+            {"allowed", "limited_by" (rule name or None), "retry_after" (seconds),
+             "usage": {rule name: {"limit", "used", "remaining"}}}
+        """
+        now = time.time()
+
+        def apply(state: Optional[Dict]):
+            state = state or {}
+            refreshed = {
+                rule.name: rule.refresh(state.get(rule.name), now) for rule in rules
+            }
+            waits = {
+                rule.name: rule.retry_after(refreshed[rule.name], cost)
+                for rule in rules
+            }
+            limited_by = max(waits, key=waits.get) if any(waits.values()) else None
+            if limited_by is None:
+                # All-or-nothing: a denied request consumes from no rule
+                for rule in rules:
+                    refreshed[rule.name] = rule.consume(refreshed[rule.name], cost)
+            return refreshed, {
+                "allowed": limited_by is None,
+                "limited_by": limited_by,
+                "retry_after": waits[limited_by] if limited_by else 0.0,
+                "usage": self._usage(rules, refreshed),
+            }
+
+        try:
+            result = self.store.update(key, apply, max(rule.ttl for rule in rules))
+        except Exception as e:
+            # Fail open: an unreachable store shouldn't take the API down
+            self.stats["store_errors"] += 1
+            logger.warning(f"Rate limit store failed, allowing request: {e}")
+            return {
+                "allowed": True,
+                "limited_by": None,
+                "retry_after": 0.0,
+                "usage": {},
+            }
+        self.stats["allowed" if result["allowed"] else "limited"] += 1
+        return result
+
+    def peek(self, key: str, rules: Sequence) -> Dict:
+        """Get a key's usage per rule without counting a request."""
+        now = time.time()
+        try:
+            state = self.store.get(key) or {}
+        except Exception as e:
+            self.stats["store_errors"] += 1
+            logger.warning(f"Rate limit store failed: {e}")
+            state = {}
+        refreshed = {
+            rule.name: rule.refresh(state.get(rule.name), now) for rule in rules
+        }
+        return self._usage(rules, refreshed)
+
+    @staticmethod
+    def _usage(rules: Sequence, states: Dict) -> Dict:
+        usage = {}
+        for rule in rules:
+            used = max(0, int(math.ceil(rule.used(states[rule.name]) - 1e-9)))
+            usage[rule.name] = {
+                "limit": rule.limit,
+                "used": used,
+                "remaining": max(0, rule.limit - used),
+            }
+        return usage
+
+    async def ahit(self, key: str, rules: Sequence, cost: int = 1) -> Dict:
+        """hit() that keeps shared-store round trips off the event loop."""
+        if not self.store.blocking:
+            return self.hit(key, rules, cost)
+        return await self.execution.run_io(self.hit, key, rules, cost)
+
+    async def apeek(self, key: str, rules: Sequence) -> Dict:
+        """peek() that keeps shared-store round trips off the event loop."""
+        if not self.store.blocking:
+            return self.peek(key, rules)
+        return await self.execution.run_io(self.peek, key, rules)
+
+    def get_metrics(self) -> Dict:
+        """Get decision counters and the store in use."""
+        metrics = {**self.stats, "store": type(self.store).__name__}
+        if isinstance(self.store, MemoryStore):
+            metrics.update(keys=len(self.store), evictions=self.store.evictions)
+        return metrics
+
+
+# Global instance
+rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get or create global rate limiter instance."""
+    global rate_limiter
+    if rate_limiter is None:
+        rate_limiter = RateLimiter()
+    return rate_limiter
@@ -0,0 +1,293 @@
+"""
+Layered cache for /analyze results.
+
+A per-process LRU with TTL answers repeated submissions without touching the
+pipeline. An optional shared backend (RESULT_CACHE_URL) lets every worker
+and host reuse each other's results:
+
+    redis://host:6379/0         Redis or any server speaking its protocol
+    sqlite:///path/cache.db     SQLite file, a local stand-in for Redis that
+                                workers on one host can share
+
+Keys hash the normalized source text, URL, tier and the versions of the
+models and corpus, so results computed by an older model or corpus are never
+returned once those change.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from executor import ExecutionLayer, get_execution_layer
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "2048"))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "3600"))
+RESULT_CACHE_URL = os.getenv("RESULT_CACHE_URL", "")
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Fold Unicode forms, case and whitespace so trivial edits share a key."""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text)
+    return " ".join(text.casefold().split())
+
+
+def directory_fingerprint(path: str) -> str:
+    """
+    Cheap version id for a model directory from file names, sizes and mtimes.
+
+    Args:
+        path: Model directory (or file)
+
+    Returns:
+        Hex digest that changes when any file in `path` is replaced
+    """
+    digest = hashlib.sha256()
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    for root, _, files in sorted(os.walk(path)):
+        for name in sorted(files):
+            stat = os.stat(os.path.join(root, name))
+            digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
+
+class LocalCache:
+    """Thread-safe LRU cache with a per-entry TTL."""
+
+    def __init__(
+        self, max_entries: int = RESULT_CACHE_SIZE, ttl: float = RESULT_CACHE_TTL
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """Shared cache in a SQLite file; stands in for Redis on a single host."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._sets = 0
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS results "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections don't survive a fork, so workers forked after this
+        # object was created open their own
+        if getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return self._local.conn
+
+    def get(self, key: str) -> Optional[str]:
+        row = (
+            self._connect()
+            .execute(
+                "SELECT value FROM results WHERE key = ? AND expires > ?",
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def set(self, key: str, value: str, ttl: float):
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+            (key, value, time.time() + ttl),
+        )
+        self._sets += 1
+        if self._sets % 1000 == 0:
+            conn.execute("DELETE FROM results WHERE expires <= ?", (time.time(),))
+
+
+class RedisBackend:
+    """Shared cache in Redis (needs the optional `redis` package)."""
+
+    def __init__(self, url: str, prefix: str = "analyze:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self.prefix + key)
+        return value.decode("utf-8") if value is not None else None
+
+    def set(self, key: str, value: str, ttl: float):
+        self.client.set(self.prefix + key, value, ex=max(1, int(ttl)))
+
+
+def create_shared_backend(url: str = RESULT_CACHE_URL):
+    """Build the shared backend for a RESULT_CACHE_URL, or None if unset."""
+    if not url:
+        return None
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///") :])
+    raise ValueError(f"Unsupported RESULT_CACHE_URL {url!r}")
+
+
+class ResultCache:
+    def __init__(
+        self,
+        version_fn: Callable[[], Dict[str, str]],
+        local: Optional[LocalCache] = None,
+        shared=None,
+        execution: Optional[ExecutionLayer] = None,
+    ):
+        """
+        Initialize the layered cache.
+
+        Args:
+            version_fn: Returns the current model/corpus versions; any change
+                invalidates every cached result
+            local: In-process cache (defaults to a LocalCache from env settings)
+            shared: Optional backend with get(key) and set(key, value, ttl)
+            execution: Execution layer used for blocking shared-backend calls
+        """
+        self.version_fn = version_fn
+        self.local = local or LocalCache()
+        self.shared = shared
+        self.execution = execution or get_execution_layer()
+        self._versions: Optional[Dict[str, str]] = None
+        self.stats = {
+            "local_hits": 0,
+            "shared_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "shared_errors": 0,
+            "invalidations": 0,
+        }
+
+    def key(
+        self, source_text: Optional[str], source_url: Optional[str], tier: str
+    ) -> str:
+        """
+        Build the cache key for one /analyze request.
+
+        Args:
+            source_text: Submitted text (or URL)
+            source_url: Submitted source URL
+            tier: API tier, since tiers get different response sections
+
+        Returns:
+            Hex digest identifying the request and the current versions
+        """
+        versions = self.version_fn()
+        if versions != self._versions:
+            if self._versions is not None:
+                # Old entries can never be hit again, so free them now
+                self.local.clear()
+                self.stats["invalidations"] += 1
+                logger.info(f"Result cache invalidated: versions are now {versions}")
+            self._versions = versions
+
+        material = json.dumps(
+            {
+                "text": normalize_text(source_text),
+                "url": (source_url or "").strip(),
+                "tier": tier,
+                "versions": versions,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict]:
+        """Look a result up locally, then in the shared backend."""
+        value = self.local.get(key)
+        if value is not None:
+            self.stats["local_hits"] += 1
+            return value
+
+        if self.shared is not None:
+            try:
+                raw = await self.execution.run_io(self.shared.get, key)
+            except Exception as e:
+                self.stats["shared_errors"] += 1
+                logger.warning(f"Shared result cache lookup failed: {e}")
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                self.local.set(key, value)
+                self.stats["shared_hits"] += 1
+                return value
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: Dict):
+        """Store a result in both layers."""
+        self.local.set(key, value)
+        self.stats["stores"] += 1
+        if self.shared is not None:
+            try:
+                await self.execution.run_io(
+                    self.shared.set, key, json.dumps(value), self.local.ttl
+                )
+            except Exception as e:
+                self.stats["shared_errors"] += 1
+                logger.warning(f"Shared result cache store failed: {e}")
+
+    def get_metrics(self) -> Dict:
+        """Get hit/miss counters, hit rate and cache size."""
+        lookups = (
+            self.stats["local_hits"] + self.stats["shared_hits"] + self.stats["misses"]
+        )
+        hits = self.stats["local_hits"] + self.stats["shared_hits"]
+        return {
+            **self.stats,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "local_entries": len(self.local),
+            "local_evictions": self.local.evictions,
+            "shared_backend": type(self.shared).__name__ if self.shared else None,
+            "versions": self._versions,
+        }
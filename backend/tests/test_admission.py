@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+
+from admission import Overloaded, TierScheduler
+
+POLICIES = {
+    "enterprise": {"weight": 8, "target_factor": 10},
+    "free": {"weight": 1, "target_factor": 1},
+    "demo": {"weight": 1, "target_factor": 1},
+}
+
+
+def scheduler(**kwargs):
+    kwargs.setdefault("max_concurrent", 1)
+    kwargs.setdefault("policies", POLICIES)
+    kwargs.setdefault("service_ms", 1000)
+    return TierScheduler(**kwargs)
+
+
+async def queued(scheduler, tier, **kwargs):
+    task = asyncio.ensure_future(scheduler.acquire(tier, **kwargs))
+    await asyncio.sleep(0)
+    return task
+
+
+def test_targets_scale_with_measured_service_time():
+    async def run():
+        s = scheduler(service_ms=1000)
+        assert s.target("free") == pytest.approx(1.0)
+        assert s.target("enterprise") == pytest.approx(10.0)
+        assert s.target("unknown") == s.target("demo")
+        for _ in range(200):
+            async with s.slot("free"):
+                await asyncio.sleep(0)
+        # Fast requests pull the estimate, and with it every target, down
+        assert s.service_time < 0.01
+        assert s.get_metrics()["tiers"]["free"]["target_ms"] < 10
+
+    asyncio.run(run())
+
+
+def test_weighted_sharing_between_backlogged_tiers():
+    async def run():
+        s = scheduler()
+        await s.acquire("free")
+        order = []
+
+        async def request(tier):
+            await s.acquire(tier)
+            order.append(tier)
+            s.release()
+
+        tasks = [asyncio.ensure_future(request("free")) for _ in range(2)]
+        tasks += [asyncio.ensure_future(request("enterprise")) for _ in range(8)]
+        await asyncio.sleep(0)
+        s.release()
+        await asyncio.gather(*tasks)
+        assert order.index("free") > order.index("enterprise")
+        assert order.count("enterprise") == 8
+
+    asyncio.run(run())
+
+
+def test_queue_timeout_returns_503_and_leaves_queue():
+    async def run():
+        s = scheduler()
+        await s.acquire("free")
+        waiter = await queued(s, "free", timeout=0.05)
+        with pytest.raises(Overloaded) as shed:
+            await waiter
+        assert shed.value.status_code == 503
+        assert s.get_metrics()["tiers"]["free"]["queued"] == 0
+        assert s.stats["free"]["timed_out"] == 1
+        s.release()
+        assert s.get_metrics()["running"] == 0
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_leaves_queue():
+    async def run():
+        s = scheduler()
+        await s.acquire("free")
+        waiter = await queued(s, "free")
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert s.get_metrics()["tiers"]["free"]["queued"] == 0
+        s.release()
+        assert s.get_metrics()["running"] == 0
+
+    asyncio.run(run())
+
+
+def test_disconnected_client_leaves_queue(monkeypatch):
+    monkeypatch.setattr("admission.DISCONNECT_POLL_SECONDS", 0.01)
+
+    async def run():
+        s = scheduler()
+        await s.acquire("free")
+        gone = False
+
+        async def disconnected():
+            return gone
+
+        waiter = await queued(s, "free", disconnected=disconnected)
+        await asyncio.sleep(0.03)
+        assert not waiter.done()
+        gone = True
+        with pytest.raises(Overloaded):
+            await waiter
+        assert s.stats["free"]["abandoned"] == 1
+        assert s.get_metrics()["tiers"]["free"]["queued"] == 0
+
+    asyncio.run(run())
+
+
+def test_slot_handed_to_departing_waiter_is_released():
+    async def run():
+        s = scheduler()
+        await s.acquire("free")
+        waiter = await queued(s, "free")
+        # The slot is handed over, then the caller is cancelled before resuming
+        s.release()
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert s.get_metrics()["running"] == 0
+
+    asyncio.run(run())
+
+
+def test_sheds_when_head_is_over_target_or_queue_full():
+    async def run():
+        s = scheduler(service_ms=10, max_queue=2)
+        await s.acquire("enterprise")
+        first = await queued(s, "free", timeout=5)
+        await asyncio.sleep(0.02)
+        with pytest.raises(Overloaded) as shed:
+            await s.acquire("free")
+        assert shed.value.status_code == 503
+
+        a = await queued(s, "enterprise", timeout=5)
+        b = await queued(s, "enterprise", timeout=5)
+        with pytest.raises(Overloaded) as shed:
+            await s.acquire("enterprise")
+        assert shed.value.status_code == 429
+        for task in (first, a, b):
+            task.cancel()
+        await asyncio.gather(first, a, b, return_exceptions=True)
+
+    asyncio.run(run())
@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from batching import MicroBatcher
+from executor import ExecutionLayer
+
+
+@pytest.fixture
+def execution():
+    layer = ExecutionLayer(cpu_workers=2)
+    yield layer
+    layer.shutdown()
+
+
+def upper_batch(calls):
+    def batch_fn(items):
+        calls.append(list(items))
+        if "bad" in items:
+            raise ValueError("bad input")
+        return [item.upper() for item in items]
+
+    return batch_fn
+
+
+def test_concurrent_submits_share_one_batch(execution):
+    calls = []
+    batcher = MicroBatcher(
+        "test",
+        upper_batch(calls),
+        max_batch_size=8,
+        max_wait_ms=50,
+        execution=execution,
+    )
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(c) for c in "abcd"))
+
+    assert asyncio.run(run()) == ["A", "B", "C", "D"]
+    assert calls == [["a", "b", "c", "d"]]
+    assert batcher.get_metrics()["batch_size_histogram"] == {4: 1}
+
+
+def test_batch_size_cap(execution):
+    calls = []
+    batcher = MicroBatcher(
+        "test",
+        upper_batch(calls),
+        max_batch_size=2,
+        max_wait_ms=50,
+        execution=execution,
+    )
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(c) for c in "abcde"))
+
+    assert asyncio.run(run()) == list("ABCDE")
+    assert max(len(call) for call in calls) == 2
+
+
+def test_failing_input_fails_alone(execution):
+    calls = []
+    batcher = MicroBatcher(
+        "test",
+        upper_batch(calls),
+        max_batch_size=8,
+        max_wait_ms=50,
+        execution=execution,
+    )
+
+    async def run():
+        return await asyncio.gather(
+            *(batcher.submit(c) for c in ("a", "bad", "c")), return_exceptions=True
+        )
+
+    a, bad, c = asyncio.run(run())
+    assert (a, c) == ("A", "C")
+    assert isinstance(bad, ValueError)
+    assert batcher.failed_items == 1
+
+
+def test_wrong_result_count_is_an_error(execution):
+    batcher = MicroBatcher("test", lambda items: items[:-1], execution=execution)
+
+    async def run():
+        return await batcher.submit("a")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
+
+
+def test_crashed_loop_restarts_without_losing_queued_inputs(execution):
+    calls = []
+    batcher = MicroBatcher(
+        "test",
+        upper_batch(calls),
+        max_batch_size=1,
+        max_wait_ms=0,
+        execution=execution,
+    )
+
+    class CrashOnce(list):
+        crashed = False
+
+        def append(self, value):
+            if not self.crashed:
+                self.crashed = True
+                raise RuntimeError("loop bug")
+
+    batcher._wait_times = CrashOnce()
+
+    async def run():
+        return await asyncio.gather(
+            *(batcher.submit(c) for c in "abc"), return_exceptions=True
+        )
+
+    first, *rest = asyncio.run(run())
+    # The batch in hand gets the loop's error; the queued inputs still run
+    assert isinstance(first, RuntimeError)
+    assert rest == ["B", "C"]
+    assert batcher.worker_restarts == 1
+
+
+def test_new_event_loop_gets_a_new_queue(execution):
+    batcher = MicroBatcher("test", upper_batch([]), execution=execution)
+    assert asyncio.run(batcher.submit("a")) == "A"
+    assert asyncio.run(batcher.submit("b")) == "B"
@@ -0,0 +1,52 @@
+import numpy as np
+
+from claim_cache import SemanticClaimCache, claim_signature
+
+
+def vector(*values):
+    return np.array(values, dtype=np.float32)
+
+
+def test_signature_counts_negations_and_numbers():
+    assert claim_signature("Vaccines cause autism") == (0, ())
+    assert claim_signature("Vaccines do not cause autism") == (1, ())
+    assert claim_signature("Vaccines don’t cause autism") == (1, ())
+    assert claim_signature("1,000 people died in 2020") == (0, ("1000", "2020"))
+    assert claim_signature("Two million jobs") == (0, ("million", "two"))
+
+
+def test_paraphrase_reuses_verdict():
+    cache = SemanticClaimCache(2, threshold=0.9)
+    cache.store("Vaccines cause autism", vector(1, 0), "false")
+    hit = cache.lookup("Vaccines lead to autism", vector(1, 0.1))
+    assert hit["value"] == "false"
+    assert hit["claim"] == "Vaccines cause autism"
+
+
+def test_negated_claim_is_not_a_hit():
+    cache = SemanticClaimCache(2, threshold=0.9)
+    cache.store("Vaccines cause autism", vector(1, 0), "false")
+    assert cache.lookup("Vaccines do not cause autism", vector(1, 0.05)) is None
+    assert cache.stats["signature_mismatches"] == 1
+
+
+def test_changed_number_is_not_a_hit():
+    cache = SemanticClaimCache(2, threshold=0.9)
+    cache.store("Unemployment fell to 3% in 2019", vector(1, 0), "true")
+    assert cache.lookup("Unemployment fell to 3% in 2020", vector(1, 0)) is None
+
+
+def test_next_candidate_with_matching_signature_is_used():
+    cache = SemanticClaimCache(2, threshold=0.9)
+    cache.store("Vaccines cause autism", vector(1, 0), "false")
+    cache.store("Vaccines do not cause autism", vector(1, 0.2), "true")
+    hit = cache.lookup("Vaccines never cause autism", vector(1, 0))
+    assert hit["value"] == "true"
+
+
+def test_below_threshold_and_expired_are_misses():
+    cache = SemanticClaimCache(2, threshold=0.9, ttl=-1)
+    cache.store("Vaccines cause autism", vector(1, 0), "false")
+    assert cache.lookup("Vaccines cause autism", vector(1, 0)) is None
+    assert cache.stats["expired"] == 1
+    assert cache.lookup("Vaccines cause autism", vector(0, 1)) is None
@@ -0,0 +1,137 @@
+import faiss
+import numpy as np
+import pytest
+
+from corpus_index import (
+    INDEX_MANIFEST_FILE,
+    INDEX_TYPES,
+    build_index,
+    default_nlist,
+    default_pq_m,
+    id_selector_excluding,
+    index_manifest,
+    load_index,
+    resolve_build_params,
+    save_index,
+    search_params_excluding,
+    set_search_params,
+)
+
+DIMENSION = 16
+
+
+def embeddings(rows, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((rows, DIMENSION))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def store_manifest(rows, checksum="abc"):
+    return {
+        "model_name": "test-model",
+        "dimension": DIMENSION,
+        "rows": rows,
+        "checksum": checksum,
+    }
+
+
+def test_default_params():
+    assert default_nlist(10) == 1
+    # Capped so every list gets enough points to train
+    assert default_nlist(3900) == 100
+    assert default_nlist(1_000_000) == 4000
+    assert default_pq_m(384) == 48
+    assert 768 % default_pq_m(768) == 0 and default_pq_m(10) == 1
+
+
+def test_resolve_build_params():
+    assert resolve_build_params("flat", 1000, 384) == {}
+    assert resolve_build_params("hnsw", 1000, 384, hnsw_m=16) == {"hnsw_m": 16}
+    params = resolve_build_params("ivf_pq", 10000, 384, nlist=32)
+    assert params == {"nlist": 32, "pq_m": 48, "pq_bits": 8}
+    with pytest.raises(ValueError):
+        resolve_build_params("annoy", 1000, 384)
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_every_index_type_finds_itself(index_type):
+    vectors = embeddings(2000)
+    params = resolve_build_params(index_type, len(vectors), DIMENSION, nlist=8, pq_m=4)
+    index = build_index(vectors, index_type, params)
+    set_search_params(index, nprobe=8, ef_search=64)
+    assert index.ntotal == len(vectors)
+    _, ids = index.search(vectors[:20], 1)
+    assert (ids[:, 0] == np.arange(20)).mean() >= 0.9
+
+
+def test_small_corpus_falls_back_to_flat():
+    vectors = embeddings(100)
+    index = build_index(vectors, "ivf_flat", {"nlist": 16})
+    assert isinstance(faiss.downcast_index(index), faiss.IndexFlatIP)
+    # ivf_pq needs 256 centroids' worth of points for its codebooks
+    index = build_index(
+        embeddings(2000), "ivf_pq", {"nlist": 1, "pq_m": 4, "pq_bits": 8}
+    )
+    assert isinstance(faiss.downcast_index(index), faiss.IndexFlatIP)
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf_flat", "hnsw"])
+def test_selector_excludes_ids(index_type):
+    vectors = embeddings(2000)
+    params = resolve_build_params(index_type, len(vectors), DIMENSION, nlist=8)
+    index = build_index(vectors, index_type, params)
+    set_search_params(index, nprobe=8)
+    excluded = np.array([0, 1, 2], dtype=np.int64)
+    params = search_params_excluding(index, id_selector_excluding(excluded))
+    _, ids = index.search(vectors[:3], 5, params=params)
+    assert not np.isin(ids, excluded).any()
+    if index_type == "ivf_flat":
+        assert params.nprobe == 8
+
+
+def test_nothing_to_exclude_gives_no_selector():
+    assert id_selector_excluding(np.array([], dtype=np.int64)) is None
+
+
+def test_save_and_load_round_trip(tmp_path):
+    vectors = embeddings(500)
+    index = build_index(vectors)
+    manifest = index_manifest(store_manifest(500))
+    save_index(index, str(tmp_path), manifest)
+    for mmap in (True, False):
+        loaded = load_index(str(tmp_path), manifest, mmap=mmap)
+        assert loaded is not None and loaded.ntotal == 500
+        np.testing.assert_array_equal(
+            loaded.search(vectors[:5], 3)[1], index.search(vectors[:5], 3)[1]
+        )
+
+
+def test_stale_or_missing_index_is_not_loaded(tmp_path):
+    manifest = index_manifest(store_manifest(500))
+    assert load_index(str(tmp_path), manifest) is None
+
+    save_index(build_index(embeddings(500)), str(tmp_path), manifest)
+    assert load_index(str(tmp_path), index_manifest(store_manifest(500, "def"))) is None
+    assert (
+        load_index(str(tmp_path), index_manifest(store_manifest(500), "hnsw")) is None
+    )
+    # Without a store checksum there is no way to tell the index is current
+    unchecked = index_manifest(store_manifest(500, None))
+    save_index(build_index(embeddings(500)), str(tmp_path), unchecked)
+    assert load_index(str(tmp_path), unchecked) is None
+
+
+def test_row_count_mismatch_is_not_loaded(tmp_path):
+    manifest = index_manifest(store_manifest(500))
+    save_index(build_index(embeddings(400)), str(tmp_path), manifest)
+    assert load_index(str(tmp_path), manifest) is None
+
+
+def test_save_replaces_previous_index(tmp_path):
+    save_index(
+        build_index(embeddings(400)), str(tmp_path), index_manifest(store_manifest(400))
+    )
+    manifest = index_manifest(store_manifest(500))
+    save_index(build_index(embeddings(500)), str(tmp_path), manifest)
+    assert (tmp_path / INDEX_MANIFEST_FILE).exists()
+    assert load_index(str(tmp_path), manifest).ntotal == 500
@@ -0,0 +1,190 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from corpus_store import (
+    ChunkTable,
+    DeltaSegment,
+    StoreWriter,
+    load_delta,
+    load_store,
+    save_delta,
+    save_store,
+    store_exists,
+)
+
+
+def make_table(title: str, chunks: int = 2) -> ChunkTable:
+    return ChunkTable.from_articles(
+        {
+            f"{title}_{i}": {
+                "title": title,
+                "content": f"{title} chunk {i}",
+                "chunk_id": i,
+                "full_url": f"https://en.wikipedia.org/wiki/{title}",
+            }
+            for i in range(chunks)
+        }
+    )
+
+
+def save(store: str, title: str, chunks: int = 2) -> ChunkTable:
+    table = make_table(title, chunks)
+    embeddings = np.full((chunks, 4), len(title), dtype=np.float32)
+    save_store(store, table, embeddings, "test-model")
+    return table
+
+
+def test_round_trip(tmp_path):
+    store = str(tmp_path / "corpus")
+    save(store, "Paris", 3)
+    table, embeddings, manifest = load_store(store)
+    assert store_exists(store)
+    assert manifest["rows"] == 3 and manifest["model_name"] == "test-model"
+    assert embeddings.shape == (3, 4)
+    assert table.text(1) == "Paris chunk 1"
+
+
+def test_replace_swaps_link_and_removes_old_version(tmp_path):
+    store = str(tmp_path / "corpus")
+    save(store, "Paris")
+    first = os.path.realpath(store)
+    save(store, "Berlin")
+    assert os.path.islink(store)
+    assert not os.path.exists(first)
+    assert sorted(os.listdir(tmp_path)) == [
+        "corpus",
+        os.path.basename(os.path.realpath(store)),
+    ]
+    assert load_store(store)[0].text(0) == "Berlin chunk 0"
+
+
+def test_replaces_plain_directory_from_before_versioning(tmp_path):
+    store = str(tmp_path / "corpus")
+    os.makedirs(store)
+    with open(os.path.join(store, "manifest.json"), "w") as f:
+        f.write("{}")
+    save(store, "Paris")
+    assert os.path.islink(store)
+    assert not os.path.exists(store + ".old")
+    assert load_store(store)[0].text(0) == "Paris chunk 0"
+
+
+def test_memory_mapped_reader_survives_replace(tmp_path):
+    store = str(tmp_path / "corpus")
+    save(store, "Paris")
+    table, embeddings, _ = load_store(store)
+    save(store, "Berlin")
+    assert table.text(0) == "Paris chunk 0"
+    assert float(embeddings[0, 0]) == len("Paris")
+
+
+def test_readers_never_see_missing_store(tmp_path):
+    store = str(tmp_path / "corpus")
+    save(store, "Paris")
+    stop = threading.Event()
+    errors = []
+
+    def read():
+        while not stop.is_set():
+            try:
+                table, _, _ = load_store(store)
+                assert table.text(0) in ("Paris chunk 0", "Berlin chunk 0")
+            except FileNotFoundError:
+                # The version was deleted between resolving and opening
+                continue
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+            if not store_exists(store):
+                errors.append("store missing")
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    for i in range(30):
+        save(store, ("Paris", "Berlin")[i % 2])
+    stop.set()
+    reader.join()
+    assert errors == []
+
+
+def test_delta_saved_inside_base_and_removed_when_empty(tmp_path):
+    store = str(tmp_path / "corpus")
+    save(store, "Paris")
+    delta = DeltaSegment(
+        make_table("Rome", 1),
+        np.ones((1, 4), dtype=np.float32),
+        np.array([2], dtype=np.int64),
+        np.array([0], dtype=np.int64),
+    )
+    save_delta(store, delta, "test-model")
+    loaded, _ = load_delta(store)
+    assert loaded.table.text(0) == "Rome chunk 0"
+    assert loaded.tombstones.tolist() == [0]
+
+    save_delta(store, DeltaSegment.empty(4), "test-model")
+    assert load_delta(store) is None
+    assert os.listdir(os.path.realpath(store)).count("delta") == 0
+
+    # Compaction replaces the base, and the delta goes with it
+    save_delta(store, delta, "test-model")
+    save(store, "Berlin")
+    assert load_delta(store) is None
+
+
+def test_mismatched_rows_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        save_store(
+            str(tmp_path / "corpus"),
+            make_table("Paris", 2),
+            np.zeros((3, 4), dtype=np.float32),
+            "test-model",
+        )
+
+
+def test_store_writer_matches_save_store(tmp_path):
+    table = make_table("Paris", 3)
+    embeddings = np.arange(12, dtype=np.float32).reshape(3, 4)
+    expected = save_store(str(tmp_path / "saved"), table, embeddings, "test-model")
+
+    writer = StoreWriter(str(tmp_path / "streamed"), 4, "test-model", False)
+    writer.add_article(
+        "Paris",
+        "https://en.wikipedia.org/wiki/Paris",
+        [f"Paris chunk {i}" for i in range(3)],
+    )
+    writer.add_embeddings(embeddings[:2])
+    writer.add_embeddings(embeddings[2:])
+    manifest = writer.finish()
+
+    assert manifest["checksum"] == expected["checksum"]
+    streamed, streamed_embeddings, _ = load_store(str(tmp_path / "streamed"))
+    assert [streamed.text(i) for i in range(3)] == [table.text(i) for i in range(3)]
+    np.testing.assert_array_equal(streamed_embeddings, embeddings)
+    assert sorted(os.listdir(os.path.realpath(tmp_path / "streamed"))) == sorted(
+        os.listdir(os.path.realpath(tmp_path / "saved"))
+    )
+
+
+def test_store_writer_rejects_missing_embeddings_and_aborts(tmp_path):
+    store = str(tmp_path / "corpus")
+    save(store, "Paris")
+    writer = StoreWriter(store, 4, "test-model", False)
+    writer.add_article("Berlin", "", ["Berlin chunk 0", "Berlin chunk 1"])
+    writer.add_embeddings(np.zeros((1, 4), dtype=np.float32))
+    with pytest.raises(ValueError):
+        writer.finish()
+    writer.abort()
+    assert load_store(store)[0].text(0) == "Paris chunk 0"
+    assert sorted(os.listdir(tmp_path)) == [
+        "corpus",
+        os.path.basename(os.path.realpath(store)),
+    ]
+
+
+def test_store_writer_empty_store(tmp_path):
+    writer = StoreWriter(str(tmp_path / "corpus"), 4, "test-model", True)
+    assert writer.finish()["rows"] == 0
+    _, embeddings, manifest = load_store(str(tmp_path / "corpus"))
+    assert embeddings.shape == (0, 4) and manifest["normalized"]
@@ -0,0 +1,213 @@
+import asyncio
+import logging
+
+import httpx
+
+from fact_check_api import FactCheckClient
+
+REVIEW = {
+    "claims": [
+        {
+            "text": "The moon is made of cheese",
+            "claimReview": [{"textualRating": "False", "url": "https://example.org"}],
+        }
+    ]
+}
+
+
+def client(handler, **kwargs):
+    kwargs.setdefault("failure_threshold", 2)
+    kwargs.setdefault("reset_timeout", 60)
+    return FactCheckClient(
+        api_key="test-key",
+        api_url="https://factcheck.test/claims:search",
+        transport=httpx.MockTransport(handler),
+        cache_ttl=0,
+        **kwargs,
+    )
+
+
+class Handler:
+    def __init__(self, *responses, delay=0.0):
+        self.responses = list(responses)
+        self.delay = delay
+        self.requests = []
+
+    async def __call__(self, request):
+        self.requests.append(request)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        response = (
+            self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        )
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_review_is_parsed_and_query_sent():
+    handler = Handler(httpx.Response(200, json=REVIEW))
+    fact_check = client(handler)
+    result = run(fact_check.check_claim("Moon cheese"))
+    assert result["verdict"] == "False"
+    assert handler.requests[0].url.params["query"] == "Moon cheese"
+    assert handler.requests[0].url.params["key"] == "test-key"
+
+
+def test_breaker_opens_after_consecutive_failures():
+    handler = Handler(httpx.Response(503))
+    fact_check = client(handler, failure_threshold=2)
+
+    async def go():
+        return [await fact_check.check_claim(f"claim {i}") for i in range(5)]
+
+    assert run(go()) == [None] * 5
+    assert len(handler.requests) == 2
+    metrics = fact_check.get_metrics()
+    assert metrics["circuit"] == "open"
+    assert metrics["short_circuited"] == 3
+
+
+def test_connection_errors_and_bad_bodies_count_as_failures():
+    handler = Handler(
+        httpx.ConnectError("refused"), httpx.Response(200, content=b"<html>")
+    )
+    fact_check = client(handler, failure_threshold=2)
+
+    async def go():
+        return [await fact_check.check_claim(f"claim {i}") for i in range(3)]
+
+    assert run(go()) == [None] * 3
+    assert fact_check.get_metrics()["failures"] == 2
+    assert fact_check.get_metrics()["circuit"] == "open"
+
+
+def test_half_open_lets_one_probe_through():
+    handler = Handler(
+        httpx.Response(500),
+        httpx.Response(500),
+        httpx.Response(200, json=REVIEW),
+        delay=0.02,
+    )
+    fact_check = client(handler, failure_threshold=2, reset_timeout=0.05)
+
+    async def go():
+        await fact_check.check_claim("a")
+        await fact_check.check_claim("b")
+        assert fact_check.breaker.state == "open"
+        await asyncio.sleep(0.06)
+        assert fact_check.breaker.state == "half_open"
+        # Different queries, so only the breaker limits them to one probe
+        return await asyncio.gather(*(fact_check.check_claim(q) for q in "cde"))
+
+    results = run(go())
+    assert len(handler.requests) == 3
+    assert sum(result is not None for result in results) == 1
+    assert fact_check.breaker.state == "closed"
+
+
+def test_failed_probe_reopens_circuit():
+    handler = Handler(httpx.Response(500))
+    fact_check = client(handler, failure_threshold=1, reset_timeout=0.05)
+
+    async def go():
+        await fact_check.check_claim("a")
+        await asyncio.sleep(0.06)
+        await fact_check.check_claim("b")
+        return fact_check.breaker.state
+
+    assert run(go()) == "open"
+    assert len(handler.requests) == 2
+
+
+def test_identical_concurrent_queries_share_one_request():
+    handler = Handler(httpx.Response(200, json=REVIEW), delay=0.05)
+    fact_check = client(handler)
+
+    async def go():
+        return await asyncio.gather(
+            *(fact_check.check_claim("Moon  CHEESE") for _ in range(5))
+        )
+
+    results = run(go())
+    assert len(handler.requests) == 1
+    assert all(result == results[0] for result in results)
+    assert fact_check.get_metrics()["deduplicated"] == 4
+
+
+def test_cancelled_caller_does_not_cancel_shared_request():
+    handler = Handler(httpx.Response(200, json=REVIEW), delay=0.05)
+    fact_check = client(handler)
+
+    async def go():
+        first = asyncio.ensure_future(fact_check.check_claim("claim"))
+        second = asyncio.ensure_future(fact_check.check_claim("claim"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert run(go())["verdict"] == "False"
+    assert len(handler.requests) == 1
+
+
+def test_answers_are_cached():
+    handler = Handler(httpx.Response(200, json={}))
+    fact_check = FactCheckClient(
+        api_key="test-key",
+        api_url="https://factcheck.test/claims:search",
+        transport=httpx.MockTransport(handler),
+    )
+
+    async def go():
+        return [await fact_check.check_claim("claim") for _ in range(3)]
+
+    assert run(go()) == [None] * 3
+    assert len(handler.requests) == 1
+    assert fact_check.get_metrics()["cache_hits"] == 2
+
+
+def test_rejected_key_disables_client_and_logs_once(caplog):
+    handler = Handler(httpx.Response(403, json={"error": {"code": 403}}))
+    fact_check = client(handler)
+
+    async def go():
+        return [await fact_check.check_claim(f"claim {i}") for i in range(3)]
+
+    with caplog.at_level(logging.ERROR, logger="fact_check_api"):
+        assert run(go()) == [None] * 3
+    assert len(handler.requests) == 1
+    assert fact_check.get_metrics()["disabled"] == "HTTP 403"
+    assert fact_check.get_metrics()["circuit"] == "closed"
+    assert len([r for r in caplog.records if "API key" in r.getMessage()]) == 1
+
+
+def test_invalid_key_400_disables_client():
+    body = {"error": {"code": 400, "details": [{"reason": "API_KEY_INVALID"}]}}
+    handler = Handler(httpx.Response(400, json=body))
+    fact_check = client(handler)
+    run(fact_check.check_claim("claim"))
+    assert fact_check.disabled == "HTTP 400"
+
+
+def test_other_client_errors_keep_client_enabled():
+    handler = Handler(httpx.Response(400, json={"error": {"code": 400}}))
+    fact_check = client(handler)
+
+    async def go():
+        return [await fact_check.check_claim(f"claim {i}") for i in range(2)]
+
+    run(go())
+    assert len(handler.requests) == 2
+    assert fact_check.disabled is None
+    assert fact_check.breaker.state == "closed"
+
+
+def test_no_api_key_makes_no_requests():
+    handler = Handler(httpx.Response(200, json=REVIEW))
+    fact_check = FactCheckClient(api_key=None, transport=httpx.MockTransport(handler))
+    assert run(fact_check.check_claim("claim")) is None
+    assert handler.requests == []
@@ -0,0 +1,49 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("lxml")
+
+from html_extraction import _html_parser, extract_lxml  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(__file__)), "fixtures", "html")
+
+
+def load_fixtures():
+    pages = []
+    for name in sorted(os.listdir(FIXTURES)):
+        with open(os.path.join(FIXTURES, name), "rb") as f:
+            pages.append(f.read())
+    return pages
+
+
+def test_each_thread_gets_its_own_parser():
+    parsers = {}
+
+    def grab():
+        parsers[threading.get_ident()] = _html_parser("utf-8")
+
+    threads = [threading.Thread(target=grab) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(parser) for parser in parsers.values()}) == 2
+    assert _html_parser("utf-8") is _html_parser("utf-8")
+
+
+def test_concurrent_extraction_matches_sequential():
+    pages = load_fixtures()
+    # A declared charset other than the default takes another parser
+    pages.append(
+        '<html><head><meta charset="iso-8859-1"></head><body><h1>Café</h1>'
+        "<p>Crème brûlée is a dessert.</p></body></html>".encode("iso-8859-1")
+    )
+    expected = [extract_lxml(page) for page in pages]
+    assert "Crème brûlée" in expected[-1]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(extract_lxml, pages * 50))
+    assert results == expected * 50
@@ -0,0 +1,50 @@
+import pytest
+
+from evidence_stance import EvidenceStanceScorer
+from language_patterns import LanguagePatternMatcher
+
+
+def phrases(result):
+    return [m["phrase"] for m in result["matches"]]
+
+
+def test_word_boundaries_and_inflections():
+    matcher = LanguagePatternMatcher({"conspiracy": ["elite", "cover up"]})
+    result = matcher.match("Delete the ELITES' cover   up")
+    assert phrases(result) == ["elite", "cover up"]
+    assert result["counts"] == {"conspiracy": 2}
+
+
+def test_curly_apostrophe_matches_straight():
+    matcher = LanguagePatternMatcher({"urgency": ["don't miss"]})
+    assert phrases(matcher.match("Don’t miss this")) == ["don't miss"]
+
+
+@pytest.mark.parametrize(
+    "lexicon, text",
+    [
+        # "İ".lower() is "i̇", two characters, but IGNORECASE matches it to "i"
+        ("elite", "The ELİTE lie"),
+        # "ſ" (long s) matches "s" under IGNORECASE but lowercases to itself
+        ("ſtrong", "a strong claim"),
+        ("strong", "a ſtrong claim"),
+        ("straße", "STRAßE"),
+        ("ωmega", "Ωmega"),
+    ],
+)
+def test_non_ascii_case_variants_map_to_lexicon_entry(lexicon, text):
+    matcher = LanguagePatternMatcher({"category": [lexicon]})
+    result = matcher.match(text)
+    assert phrases(result) == [lexicon]
+    assert result["counts"] == {"category": 1}
+
+
+def test_keyword_stances_with_non_ascii_case_variant():
+    scorer = EvidenceStanceScorer(nli_model="")
+    stances = scorer.keyword_stances(["VERİFİED by experts", "ſo FALSE", "n/a"])
+    assert stances.tolist() == [1, -1, 0]
+
+
+def test_invalid_lexicons_rejected():
+    with pytest.raises(ValueError):
+        LanguagePatternMatcher({"category": "elite"})
@@ -0,0 +1,223 @@
+import multiprocessing
+import sqlite3
+import types
+
+import pytest
+
+import rate_limiter
+from rate_limiter import (
+    MemoryStore,
+    RateLimiter,
+    SlidingWindow,
+    SQLiteStore,
+    TokenBucket,
+    create_store,
+    per_minute_and_day,
+)
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter, "time", types.SimpleNamespace(time=clock.time))
+    return clock
+
+
+def hits(limiter, key, rules, count):
+    return [limiter.hit(key, rules)["allowed"] for _ in range(count)]
+
+
+# --- TokenBucket -----------------------------------------------------------
+
+
+def test_bucket_allows_a_full_burst_then_limits(clock):
+    limiter = RateLimiter(MemoryStore())
+    rules = [TokenBucket("minute", 5, 60)]
+    assert hits(limiter, "k", rules, 5) == [True] * 5
+    denied = limiter.hit("k", rules)
+    assert not denied["allowed"]
+    assert denied["limited_by"] == "minute"
+    # One token comes back every 12 seconds
+    assert denied["retry_after"] == pytest.approx(12)
+    assert denied["usage"]["minute"] == {"limit": 5, "used": 5, "remaining": 0}
+
+
+def test_bucket_refills_evenly(clock):
+    limiter = RateLimiter(MemoryStore())
+    rules = [TokenBucket("minute", 5, 60)]
+    hits(limiter, "k", rules, 5)
+    clock.now += 11.9
+    assert not limiter.hit("k", rules)["allowed"]
+    clock.now += 0.1
+    assert limiter.hit("k", rules)["allowed"]
+    assert not limiter.hit("k", rules)["allowed"]
+    # Never refills past the limit
+    clock.now += 3600
+    assert hits(limiter, "k", rules, 6) == [True] * 5 + [False]
+
+
+def test_bucket_cost_larger_than_limit_never_fits():
+    bucket = TokenBucket("minute", 5, 60)
+    state = bucket.refresh(None, 0.0)
+    assert bucket.retry_after(state, 5) == 0
+    assert bucket.retry_after(state, 6) == pytest.approx(12)
+
+
+def test_zero_limit_bucket_waits_forever():
+    bucket = TokenBucket("minute", 0, 60)
+    assert bucket.retry_after(bucket.refresh(None, 0.0), 1) == float("inf")
+
+
+# --- SlidingWindow ---------------------------------------------------------
+
+
+def test_window_counts_up_to_limit(clock):
+    clock.now = 100 * 60.0
+    limiter = RateLimiter(MemoryStore())
+    rules = [SlidingWindow("minute", 3, 60)]
+    assert hits(limiter, "k", rules, 4) == [True, True, True, False]
+    # Nothing from a previous window, so it waits for the window to end
+    assert limiter.hit("k", rules)["retry_after"] == pytest.approx(60)
+
+
+def test_window_has_no_double_burst_at_the_boundary(clock):
+    clock.now = 100 * 60.0 + 59
+    limiter = RateLimiter(MemoryStore())
+    rules = [SlidingWindow("minute", 4, 60)]
+    assert hits(limiter, "k", rules, 4) == [True] * 4
+    # A fixed window would allow 4 more right after the boundary
+    clock.now += 2
+    assert not limiter.hit("k", rules)["allowed"]
+    # The previous window's weight decays: at 25% through, 3 of its 4 count
+    clock.now = 101 * 60.0 + 15
+    assert hits(limiter, "k", rules, 2) == [True, False]
+
+
+def test_window_retry_after_waits_for_previous_window_to_decay():
+    window = SlidingWindow("minute", 4, 60)
+    state = window.refresh(None, 0.0)
+    state = window.consume(state, 4)
+    state = window.refresh(state, 60.0)
+    # Needs a quarter of the previous window to drop out: 15 seconds
+    assert window.retry_after(state, 1) == pytest.approx(15)
+    assert window.retry_after(window.refresh(state, 75.0), 1) == 0
+
+
+def test_window_forgets_after_two_periods(clock):
+    clock.now = 0.0
+    limiter = RateLimiter(MemoryStore())
+    rules = [SlidingWindow("minute", 2, 60)]
+    hits(limiter, "k", rules, 2)
+    clock.now += 120
+    assert hits(limiter, "k", rules, 2) == [True, True]
+
+
+# --- RateLimiter ------------------------------------------------------------
+
+
+def test_denied_request_consumes_from_no_rule(clock):
+    limiter = RateLimiter(MemoryStore())
+    rules = [TokenBucket("minute", 10, 60), SlidingWindow("day", 2, 86400)]
+    hits(limiter, "k", rules, 2)
+    denied = limiter.hit("k", rules)
+    assert denied["limited_by"] == "day"
+    # The bucket was not charged for the denied request
+    assert denied["usage"]["minute"]["used"] == 2
+    assert limiter.peek("k", rules)["minute"]["used"] == 2
+
+
+def test_keys_are_independent(clock):
+    limiter = RateLimiter(MemoryStore())
+    rules = per_minute_and_day(1, 100)
+    assert limiter.hit("a", rules)["allowed"]
+    assert limiter.hit("b", rules)["allowed"]
+    assert not limiter.hit("a", rules)["allowed"]
+    assert limiter.get_metrics()["allowed"] == 2
+    assert limiter.get_metrics()["limited"] == 1
+
+
+def test_store_errors_fail_open():
+    class Broken:
+        blocking = False
+
+        def update(self, *args):
+            raise sqlite3.OperationalError("database is locked")
+
+    limiter = RateLimiter(Broken())
+    assert limiter.hit("k", [TokenBucket("minute", 1, 60)])["allowed"]
+    assert limiter.stats["store_errors"] == 1
+
+
+def test_memory_store_caps_keys(clock):
+    store = MemoryStore(max_keys=3)
+    limiter = RateLimiter(store)
+    rules = [TokenBucket("minute", 1, 60)]
+    for key in "abcde":
+        limiter.hit(key, rules)
+    assert len(store) == 3 and store.evictions == 2
+    # The oldest key was evicted, so it starts over
+    assert limiter.hit("a", rules)["allowed"]
+
+
+def test_create_store_urls(tmp_path):
+    assert isinstance(create_store("memory://"), MemoryStore)
+    assert isinstance(create_store(f"sqlite:///{tmp_path}/limits.db"), SQLiteStore)
+    with pytest.raises(ValueError):
+        create_store("postgres://localhost")
+
+
+# --- SQLiteStore shared between processes -----------------------------------
+
+
+def test_sqlite_store_round_trip(tmp_path, clock):
+    limiter = RateLimiter(SQLiteStore(str(tmp_path / "limits.db")))
+    rules = [TokenBucket("minute", 2, 60)]
+    assert hits(limiter, "k", rules, 3) == [True, True, False]
+    assert limiter.peek("k", rules)["minute"]["remaining"] == 0
+
+
+def _hammer(path, count, results):
+    limiter = RateLimiter(SQLiteStore(path))
+    rules = [TokenBucket("minute", 150, 3600), SlidingWindow("day", 1000, 86400)]
+    results.put(sum(hits(limiter, "shared", rules, count)))
+
+
+def _hammer_inherited(store, count, results):
+    # Uses the store object created in the parent before the fork
+    limiter = RateLimiter(store)
+    rules = [TokenBucket("minute", 150, 3600), SlidingWindow("day", 1000, 86400)]
+    results.put(sum(hits(limiter, "shared", rules, count)))
+
+
+@pytest.mark.parametrize("inherit", [False, True])
+def test_processes_sharing_sqlite_file_never_overshoot(tmp_path, inherit):
+    path = str(tmp_path / "limits.db")
+    store = SQLiteStore(path)
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    if inherit:
+        workers = [
+            context.Process(target=_hammer_inherited, args=(store, 200, results))
+            for _ in range(2)
+        ]
+    else:
+        workers = [
+            context.Process(target=_hammer, args=(path, 200, results)) for _ in range(2)
+        ]
+    for worker in workers:
+        worker.start()
+    allowed = [results.get(timeout=60) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+    # 400 attempts against a bucket of 150: BEGIN IMMEDIATE serializes the
+    # read-modify-write, so exactly 150 get through between the two processes
+    assert sum(allowed) == 150
@@ -0,0 +1,123 @@
+import asyncio
+import time
+import types
+
+import pytest
+
+import result_cache
+from executor import ExecutionLayer
+from result_cache import (
+    LocalCache,
+    ResultCache,
+    SQLiteBackend,
+    create_shared_backend,
+    normalize_text,
+)
+
+
+@pytest.fixture
+def execution():
+    layer = ExecutionLayer(io_workers=2)
+    yield layer
+    layer.shutdown()
+
+
+class Versions:
+    def __init__(self):
+        self.current = {"claim_model": "a", "corpus": "1"}
+
+    def __call__(self):
+        return dict(self.current)
+
+
+def test_normalize_text_folds_trivial_edits():
+    assert normalize_text("  The  SKY\nis blue ") == "the sky is blue"
+    assert normalize_text("ﬁsh") == "fish"
+    assert normalize_text(None) == ""
+
+
+def test_local_cache_lru_and_ttl(monkeypatch):
+    now = [100.0]
+    clock = types.SimpleNamespace(monotonic=lambda: now[0], time=time.time)
+    monkeypatch.setattr(result_cache, "time", clock)
+    cache = LocalCache(max_entries=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.evictions == 1
+    now[0] += 11
+    assert cache.get("a") is None and cache.get("c") is None
+
+
+def test_key_depends_on_text_url_tier_and_versions():
+    versions = Versions()
+    cache = ResultCache(versions, local=LocalCache())
+    key = cache.key("The sky is blue", None, "free")
+    assert cache.key("  the SKY is blue", None, "free") == key
+    assert cache.key("The sky is blue", "https://a.example", "free") != key
+    assert cache.key("The sky is blue", None, "pro") != key
+    versions.current["corpus"] = "2"
+    assert cache.key("The sky is blue", None, "free") != key
+
+
+def test_version_change_clears_local_entries(execution):
+    versions = Versions()
+    cache = ResultCache(versions, local=LocalCache(), execution=execution)
+    key = cache.key("text", None, "free")
+    asyncio.run(cache.set(key, {"verdict": "true"}))
+    assert asyncio.run(cache.get(key)) == {"verdict": "true"}
+
+    versions.current["claim_model"] = "b"
+    assert asyncio.run(cache.get(cache.key("text", None, "free"))) is None
+    assert len(cache.local) == 0
+    assert cache.get_metrics()["invalidations"] == 1
+
+
+def test_shared_backend_is_shared_between_caches(tmp_path, execution):
+    url = f"sqlite:///{tmp_path}/results.db"
+    first = ResultCache(Versions(), LocalCache(), create_shared_backend(url), execution)
+    second = ResultCache(
+        Versions(), LocalCache(), create_shared_backend(url), execution
+    )
+    key = first.key("text", None, "free")
+    asyncio.run(first.set(key, {"verdict": "false"}))
+
+    assert asyncio.run(second.get(key)) == {"verdict": "false"}
+    assert asyncio.run(second.get(key)) == {"verdict": "false"}
+    metrics = second.get_metrics()
+    assert metrics["shared_hits"] == 1 and metrics["local_hits"] == 1
+    assert metrics["shared_backend"] == "SQLiteBackend"
+
+
+def test_sqlite_entries_expire(tmp_path, monkeypatch):
+    backend = SQLiteBackend(str(tmp_path / "results.db"))
+    backend.set("k", "v", ttl=5)
+    assert backend.get("k") == "v"
+    later = time.time() + 6
+    clock = types.SimpleNamespace(monotonic=time.monotonic, time=lambda: later)
+    monkeypatch.setattr(result_cache, "time", clock)
+    assert backend.get("k") is None
+
+
+def test_shared_backend_errors_are_misses(execution):
+    class Broken:
+        def get(self, key):
+            raise ConnectionError("down")
+
+        def set(self, key, value, ttl):
+            raise ConnectionError("down")
+
+    cache = ResultCache(Versions(), LocalCache(), Broken(), execution)
+    key = cache.key("text", None, "free")
+    assert asyncio.run(cache.get(key)) is None
+    asyncio.run(cache.set(key, {"verdict": "true"}))
+    # The local layer still works
+    assert asyncio.run(cache.get(key)) == {"verdict": "true"}
+    assert cache.get_metrics()["shared_errors"] == 2
+
+
+def test_create_shared_backend_urls():
+    assert create_shared_backend("") is None
+    with pytest.raises(ValueError):
+        create_shared_backend("memcached://localhost")
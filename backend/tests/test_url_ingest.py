@@ -0,0 +1,116 @@
+import asyncio
+
+import httpx
+import pytest
+
+import url_ingest
+from executor import ExecutionLayer
+from url_ingest import UrlIngester
+
+PAGE = (
+    b"<html><body><h1>Moon landing faked, says blog</h1>"
+    b"<p>The blog claims the 1969 landing was filmed in a studio.</p>"
+    b"</body></html>"
+)
+
+
+@pytest.fixture
+def execution():
+    layer = ExecutionLayer(cpu_workers=2)
+    yield layer
+    layer.shutdown()
+
+
+class Origin:
+    """Serves PAGE with an ETag and answers 304 when it is presented."""
+
+    def __init__(self, status=200, body=PAGE):
+        self.status = status
+        self.body = body
+        self.requests = []
+
+    async def __call__(self, request):
+        self.requests.append(request)
+        await asyncio.sleep(0.01)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(self.status, content=self.body, headers={"ETag": '"v1"'})
+
+
+def ingester(origin, execution, **kwargs):
+    return UrlIngester(
+        execution=execution, transport=httpx.MockTransport(origin), **kwargs
+    )
+
+
+def fetch(ingester, *urls):
+    async def run():
+        try:
+            return await asyncio.gather(*(ingester.fetch_text(url) for url in urls))
+        finally:
+            await ingester.aclose()
+
+    return asyncio.run(run())
+
+
+def test_fetches_and_extracts_text(execution):
+    origin = Origin()
+    (text,) = fetch(ingester(origin, execution), "https://news.example/a")
+    assert "Moon landing faked" in text and "filmed in a studio" in text
+    assert origin.requests[0].headers["User-Agent"] == url_ingest.USER_AGENT
+
+
+def test_non_http_urls_are_not_fetched(execution):
+    origin = Origin()
+    assert fetch(ingester(origin, execution), "file:///etc/passwd") == [None]
+    assert origin.requests == []
+
+
+def test_fresh_entries_are_served_from_cache(execution):
+    origin = Origin()
+    client = ingester(origin, execution)
+    (first,) = fetch(client, "https://news.example/a")
+    (second,) = fetch(client, "https://news.example/a")
+    assert second == first
+    assert len(origin.requests) == 1
+    assert client.get_metrics()["cache_hits"] == 1
+
+
+def test_stale_entries_are_revalidated(execution):
+    origin = Origin()
+    client = ingester(origin, execution, cache_ttl=0)
+    (first,) = fetch(client, "https://news.example/a")
+    (second,) = fetch(client, "https://news.example/a")
+    assert second == first
+    assert origin.requests[1].headers["If-None-Match"] == '"v1"'
+    assert client.stats["revalidated"] == 1 and client.stats["fetches"] == 2
+
+
+def test_concurrent_requests_share_one_fetch(execution):
+    origin = Origin()
+    client = ingester(origin, execution)
+    texts = fetch(client, *["https://news.example/a"] * 5)
+    assert len(set(texts)) == 1 and texts[0]
+    assert len(origin.requests) == 1
+    assert client.stats["deduplicated"] == 4
+
+
+def test_http_errors_return_none(execution):
+    client = ingester(Origin(status=404), execution)
+    assert fetch(client, "https://news.example/missing") == [None]
+    assert client.stats["failures"] == 1
+
+    def refuse(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    client = UrlIngester(execution=execution, transport=httpx.MockTransport(refuse))
+    assert fetch(client, "https://down.example/") == [None]
+    assert client.stats["failures"] == 1
+
+
+def test_large_bodies_are_truncated(execution):
+    body = PAGE + b"<p>" + b"padding " * 10_000 + b"</p>"
+    client = ingester(Origin(body=body), execution, max_bytes=len(PAGE) + 100)
+    (text,) = fetch(client, "https://news.example/long")
+    assert "Moon landing faked" in text
+    assert client.stats["truncated"] == 1
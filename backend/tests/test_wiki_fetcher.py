@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("wikipediaapi")
+
+from wiki_fetcher import WikiFetcher  # noqa: E402
+
+
+class FakeSource:
+    host = "fake"
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.fetched = []
+        self.lock = threading.Lock()
+
+    def fetch(self, title):
+        if title == self.fail_on:
+            raise RuntimeError("boom")
+        with self.lock:
+            self.fetched.append(title)
+        return {"title": title, "text": f"{title} text", "url": ""}
+
+
+def fetcher(source, **kwargs):
+    return WikiFetcher(source, workers=2, rate_limit=0, max_retries=0, **kwargs)
+
+
+def test_fetch_in_background_yields_every_article():
+    titles = [f"T{i}" for i in range(50)]
+    articles = list(fetcher(FakeSource()).fetch_in_background(titles, queue_size=4))
+    assert sorted(a["title"] for a in articles) == sorted(titles)
+
+
+def test_fetch_continues_while_consumer_is_busy():
+    source = FakeSource()
+    articles = fetcher(source).fetch_in_background(
+        (f"T{i}" for i in range(8)), queue_size=8
+    )
+    next(articles)
+    time.sleep(0.3)
+    # The producer filled the queue while this thread was "embedding"
+    assert len(source.fetched) == 8
+    articles.close()
+
+
+def test_closing_early_stops_producer():
+    source = FakeSource()
+    articles = fetcher(source).fetch_in_background(
+        (f"T{i}" for i in range(10_000)), queue_size=2
+    )
+    next(articles)
+    articles.close()
+    fetched = len(source.fetched)
+    time.sleep(0.2)
+    assert len(source.fetched) == fetched < 10_000
+    assert not any(t.name == "wiki-fetch-producer" for t in threading.enumerate())
+
+
+def test_producer_errors_reach_the_consumer():
+    def titles():
+        yield "A"
+        raise RuntimeError("title stream failed")
+
+    with pytest.raises(RuntimeError, match="title stream failed"):
+        list(fetcher(FakeSource()).fetch_in_background(titles()))
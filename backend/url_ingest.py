@@ -0,0 +1,207 @@
+"""
+Async URL ingestion for /analyze.
+
+Pages are downloaded through one pooled HTTP client, streamed with a byte cap
+and parsed off the event loop. The extracted text is cached by URL: fresh
+entries are served directly, stale ones are revalidated with If-None-Match /
+If-Modified-Since so an unchanged page costs a 304 instead of a download and
+parse, and concurrent requests for the same URL share one fetch.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+import httpx
+
+from executor import ExecutionLayer, get_execution_layer
+from html_extraction import extract_text_from_html
+from result_cache import LocalCache
+
+logger = logging.getLogger(__name__)
+
+URL_FETCH_TIMEOUT = float(os.getenv("URL_FETCH_TIMEOUT", "10"))
+URL_FETCH_MAX_BYTES = int(os.getenv("URL_FETCH_MAX_BYTES", str(5 * 1024 * 1024)))
+URL_FETCH_MAX_CONNECTIONS = int(os.getenv("URL_FETCH_MAX_CONNECTIONS", "50"))
+# Seconds extracted text is served without asking the origin again
+URL_CACHE_TTL = float(os.getenv("URL_CACHE_TTL", "600"))
+# Seconds a stale entry is kept for conditional revalidation
+URL_CACHE_STALE_TTL = float(os.getenv("URL_CACHE_STALE_TTL", "86400"))
+URL_CACHE_SIZE = int(os.getenv("URL_CACHE_SIZE", "2048"))
+
+USER_AGENT = "MisinfoDetector/1.0"
+
+
+class UrlIngester:
+    def __init__(
+        self,
+        timeout: float = URL_FETCH_TIMEOUT,
+        max_bytes: int = URL_FETCH_MAX_BYTES,
+        max_connections: int = URL_FETCH_MAX_CONNECTIONS,
+        cache_ttl: float = URL_CACHE_TTL,
+        stale_ttl: float = URL_CACHE_STALE_TTL,
+        cache_size: int = URL_CACHE_SIZE,
+        execution: Optional[ExecutionLayer] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """
+        Initialize the ingester. The HTTP pool is created on first use.
+
+        Args:
+            timeout: Seconds allowed per request
+            max_bytes: Bodies are cut off after this many bytes
+            max_connections: Size of the shared connection pool
+            cache_ttl: Seconds extracted text is served without revalidation
+            stale_ttl: Seconds entries are kept for revalidation
+            cache_size: URLs kept in the cache
+            execution: Execution layer used to parse pages off the event loop
+            transport: Optional httpx transport, e.g. httpx.MockTransport
+        """
+        self.timeout = httpx.Timeout(timeout, connect=min(timeout, 3.0))
+        self.max_bytes = max_bytes
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self.cache_ttl = cache_ttl
+        self.cache = LocalCache(max_entries=cache_size, ttl=max(cache_ttl, stale_ttl))
+        self.execution = execution or get_execution_layer()
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.stats = {
+            "fetches": 0,
+            "cache_hits": 0,
+            "revalidated": 0,
+            "deduplicated": 0,
+            "truncated": 0,
+            "failures": 0,
+        }
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                transport=self.transport,
+                follow_redirects=True,
+                headers={"User-Agent": USER_AGENT},
+            )
+        return self._client
+
+    async def fetch_text(self, url: str) -> Optional[str]:
+        """
+        Get the extracted article text of a URL.
+
+        Args:
+            url: Page to fetch
+
+        Returns:
+            Headline and paragraph text, or None if the page could not be fetched
+        """
+        if not url.startswith(("http://", "https://")):
+            return None
+
+        entry = self.cache.get(url)
+        if entry is not None and time.monotonic() - entry["checked"] < self.cache_ttl:
+            self.stats["cache_hits"] += 1
+            return entry["text"]
+
+        # Concurrent requests for one URL share a fetch that outlives any caller
+        task = self._in_flight.get(url)
+        if task is not None:
+            self.stats["deduplicated"] += 1
+        else:
+            task = asyncio.ensure_future(self._fetch(url, entry))
+            self._in_flight[url] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(url, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, url: str, entry: Optional[Dict]) -> Optional[str]:
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        self.stats["fetches"] += 1
+        try:
+            async with self._get_client().stream(
+                "GET", url, headers=headers
+            ) as response:
+                if response.status_code == 304 and entry is not None:
+                    self.stats["revalidated"] += 1
+                    self.cache.set(url, {**entry, "checked": time.monotonic()})
+                    return entry["text"]
+                if response.status_code != 200:
+                    logger.warning(
+                        f"Fetching {url} returned HTTP {response.status_code}"
+                    )
+                    self.stats["failures"] += 1
+                    return None
+                body = await self._read_capped(response)
+                validators = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                }
+        except (httpx.HTTPError, httpx.InvalidURL) as e:
+            logger.warning(f"Error fetching {url}: {e}")
+            self.stats["failures"] += 1
+            return None
+
+        try:
+            text = await self.execution.run_cpu(extract_text_from_html, body)
+        except Exception as e:
+            logger.warning(f"Error parsing {url}: {e}")
+            self.stats["failures"] += 1
+            return None
+        self.cache.set(url, {"text": text, "checked": time.monotonic(), **validators})
+        return text
+
+    async def _read_capped(self, response: httpx.Response) -> bytes:
+        """Read a streamed body, stopping at max_bytes."""
+        length = response.headers.get("Content-Length")
+        if length and length.isdigit() and int(length) > self.max_bytes:
+            logger.info(
+                f"{response.url} is {length} bytes, reading the first {self.max_bytes}"
+            )
+
+        chunks = []
+        size = 0
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.max_bytes:
+                # Article text sits early in the page; the rest is rarely needed
+                self.stats["truncated"] += 1
+                break
+        return b"".join(chunks)[: self.max_bytes]
+
+    def get_metrics(self) -> Dict:
+        """Get fetch and cache counters."""
+        return {
+            **self.stats,
+            "cached_urls": len(self.cache),
+            "in_flight": len(self._in_flight),
+        }
+
+    async def aclose(self):
+        """Close the connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Global instance
+url_ingester: Optional[UrlIngester] = None
+
+
+def get_url_ingester() -> UrlIngester:
+    """Get or create global URL ingester instance."""
+    global url_ingester
+    if url_ingester is None:
+        url_ingester = UrlIngester()
+    return url_ingester
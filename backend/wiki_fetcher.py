@@ -0,0 +1,398 @@
+"""
+Parallel, resumable article fetcher for building the FEVER evidence corpus.
+
+Titles are fetched by a bounded thread pool with per-host rate limiting and
+retry with exponential backoff. Every finished title is appended to a JSONL
+checkpoint, so an interrupted build resumes where it stopped instead of
+refetching everything. fetch_in_background() runs the whole fetch in a
+producer thread that fills a bounded queue, so downloading continues while
+the caller is busy with earlier articles.
+
+Articles come from Wikipedia by default, or from a local stand-in (a
+directory of `<title>.txt` files or a JSONL dump of {"title", "text", "url"}
+records) set with WIKI_LOCAL_SOURCE, which lets the corpus be built offline.
+"""
+
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
+
+import wikipediaapi
+
+logger = logging.getLogger(__name__)
+
+WIKI_FETCH_WORKERS = int(os.getenv("WIKI_FETCH_WORKERS", "8"))
+# Requests per second per host; Wikipedia asks API clients to stay modest
+WIKI_RATE_LIMIT = float(os.getenv("WIKI_RATE_LIMIT", "20"))
+WIKI_MAX_RETRIES = int(os.getenv("WIKI_MAX_RETRIES", "3"))
+WIKI_LOCAL_SOURCE = os.getenv("WIKI_LOCAL_SOURCE")
+# Fetched articles waiting for the consumer of fetch_in_background()
+WIKI_FETCH_QUEUE = int(os.getenv("WIKI_FETCH_QUEUE", "256"))
+
+
+class WikipediaSource:
+    """Fetch article text from the Wikipedia API."""
+
+    host = "en.wikipedia.org"
+
+    def __init__(self, user_agent: str = "MisinfoDetector/1.0"):
+        self.user_agent = user_agent
+        # wikipediaapi keeps a requests session per client, so one per thread
+        self._local = threading.local()
+
+    def _client(self) -> wikipediaapi.Wikipedia:
+        if not hasattr(self._local, "wiki"):
+            self._local.wiki = wikipediaapi.Wikipedia(
+                language="en",
+                extract_format=wikipediaapi.ExtractFormat.WIKI,
+                user_agent=self.user_agent,
+            )
+        return self._local.wiki
+
+    def fetch(self, title: str) -> Optional[Dict]:
+        """Fetch one article; None if it does not exist. Raises on network errors."""
+        page = self._client().page(title)
+        if not page.exists():
+            return None
+        return {"title": title, "text": page.text, "url": page.fullurl}
+
+
+class LocalArticleSource:
+    """Read articles from a directory of text files or a JSONL dump."""
+
+    host = "local"
+
+    def __init__(self, path: str):
+        """
+        Index a local article source.
+
+        Args:
+            path: Directory of `<title>.txt` files (underscores for spaces,
+                "_" for "/"), or a JSONL file of {"title", "text", "url"} records
+        """
+        self.path = path
+        self._offsets: Dict[str, int] = {}
+        self._files: Dict[str, str] = {}
+
+        if os.path.isdir(path):
+            for name in os.listdir(path):
+                if name.endswith(".txt"):
+                    self._files[self._key(name[:-4])] = os.path.join(path, name)
+        else:
+            # Remember byte offsets so large dumps are never held in memory
+            with open(path, "rb") as f:
+                offset = 0
+                for line in f:
+                    if line.strip():
+                        self._offsets[self._key(json.loads(line)["title"])] = offset
+                    offset += len(line)
+        logger.info(f"Indexed {len(self._files) + len(self._offsets)} local articles")
+
+    @staticmethod
+    def _key(title: str) -> str:
+        return title.replace("_", " ").replace("/", " ").strip().lower()
+
+    def fetch(self, title: str) -> Optional[Dict]:
+        """Read one article; None if the source does not have it."""
+        key = self._key(title)
+        url = f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}"
+
+        if key in self._files:
+            with open(self._files[key], encoding="utf-8") as f:
+                return {"title": title, "text": f.read(), "url": url}
+
+        if key in self._offsets:
+            with open(self.path, "rb") as f:
+                f.seek(self._offsets[key])
+                record = json.loads(f.readline())
+            return {
+                "title": title,
+                "text": record["text"],
+                "url": record.get("url", url),
+            }
+
+        return None
+
+
+class HostRateLimiter:
+    """Token bucket per host, shared by all fetch threads."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, host: str):
+        """Block until a request to `host` is allowed."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, updated = self._buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - updated) * self.rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                delay = (1 - tokens) / self.rate
+            time.sleep(delay)
+
+
+class FetchCheckpoint:
+    """
+    Append-only JSONL record of finished titles and their articles.
+
+    Only the finished titles and the byte offsets of their records are kept
+    in memory; a resumed fetch reads each article back from the file when it
+    gets to it, so resuming a large build doesn't load every article.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Set[str] = set()
+        self._offsets: Dict[str, int] = {}
+        self._reader = None
+        torn = False
+
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                offset = 0
+                for line in f:
+                    torn = not line.endswith(b"\n")
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        record = None  # torn last line from an interrupted run
+                    if record is not None:
+                        self.done.add(record["title"])
+                        if record.get("article"):
+                            self._offsets[record["title"]] = offset
+                    offset += len(line)
+            logger.info(f"Resuming fetch: {len(self.done)} titles already done")
+
+        self._file = open(path, "a", encoding="utf-8", newline="\n")
+        if torn:
+            # Start new records on a line of their own
+            self._file.write("\n")
+
+    def article(self, title: str) -> Optional[Dict]:
+        """Read a checkpointed article back; None if the title had none."""
+        offset = self._offsets.get(title)
+        if offset is None:
+            return None
+        if self._reader is None:
+            self._reader = open(self.path, "rb")
+        self._reader.seek(offset)
+        return json.loads(self._reader.readline())["article"]
+
+    def record(self, title: str, article: Optional[Dict]):
+        self._file.write(json.dumps({"title": title, "article": article}) + "\n")
+        self._file.flush()
+        self.done.add(title)
+
+    def close(self):
+        self._file.close()
+        if self._reader is not None:
+            self._reader.close()
+
+
+class WikiFetcher:
+    def __init__(
+        self,
+        source=None,
+        workers: int = WIKI_FETCH_WORKERS,
+        rate_limit: float = WIKI_RATE_LIMIT,
+        max_retries: int = WIKI_MAX_RETRIES,
+        backoff: float = 0.5,
+        checkpoint_path: Optional[str] = None,
+    ):
+        """
+        Initialize the fetcher.
+
+        Args:
+            source: Object with a `host` attribute and a `fetch(title)` method;
+                defaults to WIKI_LOCAL_SOURCE if set, otherwise Wikipedia
+            workers: Maximum concurrent fetches
+            rate_limit: Requests per second per host (0 disables limiting)
+            max_retries: Retries per title after the first attempt
+            backoff: Base delay in seconds for exponential backoff
+            checkpoint_path: JSONL file used to resume interrupted fetches
+        """
+        if source is None:
+            source = (
+                LocalArticleSource(WIKI_LOCAL_SOURCE)
+                if WIKI_LOCAL_SOURCE
+                else WikipediaSource()
+            )
+        self.source = source
+        self.workers = max(1, workers)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.checkpoint_path = checkpoint_path
+        # Local sources are not rate limited
+        self.rate_limiter = HostRateLimiter(
+            rate_limit if source.host != LocalArticleSource.host else 0
+        )
+        self.stats = {"fetched": 0, "missing": 0, "failed": 0, "resumed": 0}
+
+    def fetch_one(self, title: str) -> Optional[Dict]:
+        """
+        Fetch a single article, retrying transient errors with backoff.
+
+        Args:
+            title: Article title
+
+        Returns:
+            Dict with title, text and url, or None if the article does not exist
+        """
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(self.source.host)
+            try:
+                return self.source.fetch(title)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff * 2**attempt * (1 + random.random())
+                logger.debug(f"Retrying '{title}' in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+    def fetch(self, titles: Iterable[str]) -> Iterator[Dict]:
+        """
+        Fetch articles concurrently, yielding each one as it completes.
+
+        `titles` may be a lazy iterator; at most a few batches of titles are
+        in flight at once. Articles already in the checkpoint are yielded
+        without being fetched again.
+
+        Args:
+            titles: Article titles to fetch
+
+        Yields:
+            Dicts with title, text and url, in completion order
+        """
+        checkpoint = (
+            FetchCheckpoint(self.checkpoint_path) if self.checkpoint_path else None
+        )
+        max_in_flight = self.workers * 4
+        seen: Set[str] = set()
+
+        try:
+            with ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="wiki-fetch"
+            ) as pool:
+                in_flight = {}
+                title_iter = iter(titles)
+                exhausted = False
+
+                while in_flight or not exhausted:
+                    # Keep the pool fed without reading every title up front
+                    while not exhausted and len(in_flight) < max_in_flight:
+                        try:
+                            title = next(title_iter)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                        if title in seen:
+                            continue
+                        seen.add(title)
+                        if checkpoint and title in checkpoint.done:
+                            self.stats["resumed"] += 1
+                            article = checkpoint.article(title)
+                            if article:
+                                yield article
+                            continue
+                        in_flight[pool.submit(self.fetch_one, title)] = title
+
+                    if not in_flight:
+                        continue
+                    finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        title = in_flight.pop(future)
+                        try:
+                            article = future.result()
+                        except Exception as e:
+                            # Not checkpointed, so a resumed run tries again
+                            self.stats["failed"] += 1
+                            logger.warning(f"Error fetching article '{title}': {e}")
+                            continue
+                        if checkpoint:
+                            checkpoint.record(title, article)
+                        if article is None:
+                            self.stats["missing"] += 1
+                            continue
+                        self.stats["fetched"] += 1
+                        yield article
+        finally:
+            if checkpoint:
+                checkpoint.close()
+
+    def fetch_in_background(
+        self, titles: Iterable[str], queue_size: int = WIKI_FETCH_QUEUE
+    ) -> Iterator[Dict]:
+        """
+        Fetch articles like fetch(), from a producer thread.
+
+        The producer keeps fetching while the caller processes earlier
+        articles, until `queue_size` articles are waiting. `titles` is read
+        from the producer thread. Closing the iterator early stops the
+        producer.
+
+        Args:
+            titles: Article titles to fetch
+            queue_size: Fetched articles held for the caller at most
+
+        Yields:
+            Dicts with title, text and url, in completion order
+
+        Raises:
+            Whatever fetch() raised in the producer
+        """
+        articles: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        stop = threading.Event()
+        done = object()
+
+        def put(item) -> bool:
+            # Give up once the consumer is gone instead of blocking forever
+            while not stop.is_set():
+                try:
+                    articles.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            fetched = self.fetch(titles)
+            try:
+                for article in fetched:
+                    if not put(article):
+                        break
+            except Exception as e:
+                put(e)
+            finally:
+                fetched.close()
+                put(done)
+
+        producer = threading.Thread(
+            target=produce, name="wiki-fetch-producer", daemon=True
+        )
+        producer.start()
+        try:
+            while True:
+                item = articles.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            producer.join()